@@ -1,7 +1,27 @@
 import streamlit as st
-import pandas as pd
-import google.generativeai as genai
 import traceback
+import hashlib
+import json
+import os
+import atexit
+import time
+import uuid
+
+# Solo módulos livianos antes de la primera pantalla: pandas, Arrow y Gemini se importan con el primer archivo
+from cortex_arranque import precargar, registrar_rerun
+from cortex_cache import CacheDisco, CacheMemoria
+from cortex_cuota import estimar_tokens, planificador
+from cortex_gemini import configurar, modelo as modelo_gemini
+from cortex_trazas import filas_de, tokens_de, trazador
+
+t_rerun = time.perf_counter()
+trazas = trazador()
+
+# Lo que pide el bloque del archivo subido: se importa en segundo plano mientras se elige el archivo
+MODULOS_ANALISIS = (
+    "pandas", "pyarrow", "google.generativeai", "cortex_bodega", "cortex_columnar", "cortex_cubo",
+    "cortex_datos", "cortex_export", "cortex_ingesta", "cortex_radar", "cortex_render", "cortex_sandbox",
+)
 
 # ==========================================
 # 1. CONFIGURACIÓN Y ESTÉTICA
@@ -19,18 +39,6 @@ st.markdown("""
     </style>
     """, unsafe_allow_html=True)
 
-# Funciones robustas de limpieza
-def limpiar_numeros(serie):
-    if pd.api.types.is_numeric_dtype(serie):
-        return serie.fillna(0)
-    try:
-        return serie.astype(str).str.replace(r'[^\d.,-]', '', regex=True).str.replace(',', '.').astype(float).fillna(0)
-    except:
-        return pd.to_numeric(serie, errors='coerce').fillna(0)
-
-def limpiar_fechas(serie):
-    return pd.to_datetime(serie, format='mixed', dayfirst=True, errors='coerce')
-
 # ==========================================
 # 2. INICIALIZACIÓN DE IA Y ESTADOS
 # ==========================================
@@ -38,32 +46,171 @@ if "GEMINI_API_KEY" not in st.secrets:
     st.error("❌ Error Crítico: No se encontró 'GEMINI_API_KEY' en tus secretos.")
     st.stop()
 
-try:
-    api_key = st.secrets["GEMINI_API_KEY"]
-    genai.configure(api_key=api_key)
-    model = genai.GenerativeModel('gemini-2.5-flash')
-except Exception as e:
-    st.error(f"❌ Error conectando con Gemini: {str(e)}")
-    st.stop()
+# La key se aplica y el modelo se crea al primer uso, una sola vez por proceso (ver cortex_gemini)
+configurar(st.secrets["GEMINI_API_KEY"])
 
 if "messages" not in st.session_state:
     st.session_state.messages = []
+if "id_sesion" not in st.session_state:
+    st.session_state.id_sesion = uuid.uuid4().hex
 
 # ==========================================
-# 3. MOTOR DE RUTEO INTELIGENTE (EL KRAKEN)
+# 3. CACHÉ DE REPORTES SANEADOS (COMPARTIDA ENTRE RERUNS Y SESIONES)
 # ==========================================
-def detectar_tipo_reporte(columnas):
-    cols_str = " ".join(columnas).lower()
-    if "nombreprovider" in cols_str and "totallinea" in cols_str:
-        return "Órdenes de Compra"
-    elif "estado compra ágil" in cols_str or "estado compra agil" in cols_str:
-        return "Compras Ágiles"
-    elif "estado licitación" in cols_str or "estado licitacion" in cols_str:
-        return "Licitaciones"
-    elif "fecha lectura" in cols_str or "precio sin oferta" in cols_str:
-        return "Convenio Marco"
+# Cachés, almacén y bodega se piden en la sección 5, con el primer archivo: sus clases viven en módulos pesados
+@st.cache_resource
+def obtener_cache_reportes():
+    max_mb = int(os.environ.get("CORTEX_CACHE_MEMORIA_MB", 1024))
+    return CacheMemoria(max_bytes=max_mb * 1024 * 1024, medidor=medir_reporte)
+
+@st.cache_resource
+def obtener_cache_radares():
+    # Radares con agrupación distinta a la por negocio (comprador, producto), calculados a pedido
+    max_mb = int(os.environ.get("CORTEX_CACHE_RADAR_MB", 256))
+    return CacheMemoria(max_bytes=max_mb * 1024 * 1024, medidor=lambda radar: int(radar.negocios().memory_usage(deep=True).sum()))
+
+@st.cache_resource
+def obtener_almacen_columnar():
+    directorio = os.path.join(os.environ.get("CORTEX_CACHE_DIR", ".cortex_cache"), "columnar")
+    max_gb = float(os.environ.get("CORTEX_COLUMNAR_GB", 5))
+    return AlmacenColumnar(directorio, max_bytes=int(max_gb * 1024 ** 3))
+
+# Bodega histórica: cada archivo subido se acumula por tipo de reporte y mes
+@st.cache_resource
+def obtener_bodega():
+    directorio = os.environ.get("CORTEX_BODEGA_DIR", os.path.join(os.environ.get("CORTEX_CACHE_DIR", ".cortex_cache"), "bodega"))
+    return Bodega(directorio)
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def resumen_bodega(tipo_reporte, version):
+    """Registros y monto por mes, agregados dentro de Arrow (la versión invalida al ingerir)."""
+    return bodega.agregar(tipo_reporte, "periodo")
+
+# Pool de procesos para el código generado: se lanza en la primera consulta y lo comparten todas las sesiones
+@st.cache_resource
+def obtener_pool_ejecucion():
+    pool = PoolEjecucion(
+        procesos=int(os.environ.get("CORTEX_EJECUTORES", min(4, os.cpu_count() or 2))),
+        limite_cpu_s=int(os.environ.get("CORTEX_LIMITE_CPU_S", 30)),
+        limite_memoria_mb=int(os.environ.get("CORTEX_LIMITE_MEMORIA_MB", 2048)),
+    )
+    atexit.register(pool.cerrar)
+    return pool
+
+# Código generado que ya funcionó, reutilizable en cualquier archivo con el mismo esquema
+@st.cache_resource
+def obtener_cache_codigo():
+    directorio = os.path.join(os.environ.get("CORTEX_CACHE_DIR", ".cortex_cache"), "codigo")
+    return CacheDisco(directorio, max_bytes=20 * 1024 * 1024, max_edad_s=90 * 24 * 3600)
+
+cache_codigo = obtener_cache_codigo()
+
+def clave_codigo(prompt, tipo_reporte, columnas, system_instruction):
+    """Prompt normalizado + tipo de reporte + esquema resuelto + versión de las instrucciones al modelo."""
+    partes = [normalizar_prompt(prompt), tipo_reporte] + [columnas[k] for k in sorted(columnas)]
+    partes.append(hashlib.sha256(system_instruction.encode("utf-8")).hexdigest()[:12])
+    return hashlib.sha256(json.dumps(partes, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+def huella_archivo(uploaded_file):
+    """SHA-256 del contenido, calculado una sola vez por archivo subido en la sesión.
+
+    Se lee por bloques de 1 MB: `getvalue()` haría una copia completa de un CSV de varios GB.
+    """
+    huellas = st.session_state.setdefault("huellas_archivos", {})
+    if uploaded_file.file_id not in huellas:
+        huella = hashlib.sha256()
+        uploaded_file.seek(0)
+        for bloque in iter(lambda: uploaded_file.read(1 << 20), b""):
+            huella.update(bloque)
+        uploaded_file.seek(0)
+        huellas[uploaded_file.file_id] = huella.hexdigest()
+    return huellas[uploaded_file.file_id]
+
+def encabezados_archivo(uploaded_file):
+    """Fila de encabezados del archivo subido (se lee una sola vez por sesión)."""
+    encabezados = st.session_state.setdefault("encabezados_archivos", {})
+    if uploaded_file.file_id not in encabezados:
+        encabezados[uploaded_file.file_id] = leer_encabezados(uploaded_file.getvalue(), uploaded_file.name)
+    return encabezados[uploaded_file.file_id]
+
+def boton_descarga(tabla, clave, nombre):
+    """Descarga de la tabla completa (no solo la página) en xlsx, CSV o Parquet.
+
+    El archivo se genera al hacer clic, en otro hilo y por tandas (ver cortex_export).
+    """
+    c_formato, c_boton = st.columns([3, 1], vertical_alignment="bottom")
+    formato = c_formato.selectbox("Formato de descarga", list(FORMATOS), format_func=lambda f: FORMATOS[f][0], key=f"{clave}_formato")
+    if formato == "xlsx" and len(tabla) > MAX_FILAS_XLSX:
+        c_formato.caption(f"Excel admite {MAX_FILAS_XLSX:,} filas: para las {len(tabla):,} completas usa CSV o Parquet.")
+
+    def generar():
+        with trazas.tramo("export", formato=formato, filas=len(tabla)) as tramo:
+            contenido = exportar_bytes(tabla, formato, hoja=nombre)
+            tramo["bytes"] = len(contenido)
+        return contenido
+
+    c_boton.download_button("📥 Descargar", data=generar, file_name=f"{nombre}.{formato}", mime=FORMATOS[formato][1],
+                            key=f"{clave}_descarga", on_click="ignore", width="stretch")
+
+def mostrar_tabla(tabla, clave, columnas_moneda=(), orden_inicial=None, ascendente=False, descarga=None):
+    """Tabla paginada en el servidor: filtro, orden y formato de moneda solo sobre la página visible.
+
+    Con `descarga` (nombre base del archivo) ofrece bajar la tabla filtrada y ordenada completa.
+    Retorna los bytes (Arrow) de la página enviada al navegador.
+    """
+    t0 = time.perf_counter()
+    if len(tabla) > FILAS_POR_PAGINA:
+        c_filtro, c_orden, c_sentido, c_pagina = st.columns([3, 2, 1, 1])
+        texto = c_filtro.text_input("🔎 Filtrar", key=f"{clave}_filtro", placeholder="Texto en cualquier columna")
+        opciones = ["(sin orden)"] + list(tabla.columns)
+        orden = c_orden.selectbox("Ordenar por", opciones, key=f"{clave}_orden",
+                                  index=opciones.index(orden_inicial) if orden_inicial in opciones else 0)
+        ascendente = c_sentido.toggle("Ascendente", value=ascendente, key=f"{clave}_ascendente")
+        vista = filtrar_y_ordenar(tabla, texto, None if orden == "(sin orden)" else orden, ascendente)
+        paginas = max(1, -(-len(vista) // FILAS_POR_PAGINA))
+        numero = c_pagina.number_input(f"Página (de {paginas})", min_value=1, max_value=paginas, value=1, key=f"{clave}_pagina")
+        filas, _ = pagina(vista, numero)
     else:
-        return "Análisis General"
+        vista = filtrar_y_ordenar(tabla, orden=orden_inicial, ascendente=ascendente)
+        filas, numero = vista, 1
+    visible = formatear_moneda(filas, columnas_moneda)
+    st.dataframe(visible, use_container_width=True, hide_index=True)
+    enviados = medir_payload(visible)
+    if len(tabla) > FILAS_POR_PAGINA:
+        inicio = (numero - 1) * FILAS_POR_PAGINA
+        st.caption(f"Filas {inicio + 1 if len(vista) else 0:,}–{inicio + len(filas):,} de {len(vista):,} · "
+                   f"{enviados / 1024:,.0f} KB enviados · {(time.perf_counter() - t0) * 1000:.0f} ms")
+    if descarga:
+        boton_descarga(vista, clave, descarga)
+    return enviados
+
+def mostrar_resultado(resultado, prompt, clave, FECHA_COL=None):
+    """Respuesta del chat: texto, tabla paginada y gráfico reducido según la pregunta. Retorna bytes enviados."""
+    if isinstance(resultado, str):
+        st.markdown(resultado)
+        return len(resultado.encode("utf-8"))
+    if not isinstance(resultado, (pd.Series, pd.DataFrame)):
+        st.write(resultado)
+        return None
+    # El índice suele ser la dimensión agrupada (proveedor, fecha...): se muestra como columna
+    tabla = resultado.to_frame() if isinstance(resultado, pd.Series) else resultado
+    if tabla.index.name is not None or not pd.api.types.is_integer_dtype(tabla.index):
+        tabla = tabla.reset_index()
+    enviados = mostrar_tabla(tabla, clave, descarga="Resultado_Cortex")
+    prompt_lower = prompt.lower()
+    try:
+        if any(word in prompt_lower for word in ["tendencia", "evolución", "fecha", "tiempo"]):
+            grafico = reducir_para_grafico(resultado, FECHA_COL)
+            if len(grafico) < len(resultado):
+                st.caption(f"📉 Gráfico reducido a {len(grafico):,} de {len(resultado):,} puntos conservando su forma.")
+            st.line_chart(grafico)
+            enviados += medir_payload(grafico)
+        elif any(word in prompt_lower for word in ["top", "market", "ranking", "compradores", "proveedores"]):
+            if len(resultado.columns) <= 2:
+                st.bar_chart(resultado.set_index(resultado.columns[0]))
+    except:
+        pass
+    return enviados
 
 # ==========================================
 # 4. INTERFAZ: SIDEBAR Y CARGA DE DATOS
@@ -77,86 +224,191 @@ with st.sidebar:
     st.markdown("---")
     if st.button("🧹 Limpiar Historial de Chat"):
         st.session_state.messages = []
+        st.session_state.pop("ultimo_resultado", None)
         st.rerun()
 
+    stats_codigo = cache_codigo.estadisticas()
+    st.caption(f"♻️ Caché de código: {stats_codigo['entradas']} consultas · {stats_codigo['aciertos']} aciertos / {stats_codigo['fallos']} fallos")
+    cuota = planificador().estadisticas()
+    st.caption(f"🚦 Cola IA: {cuota['en_cola']} en espera · {cuota['rpm_usado']}/{cuota['rpm']} RPM · {cuota['reintentos_429']} reintentos por 429")
+
+    # Panel de latencias por etapa (solo con CORTEX_ADMIN en secrets)
+    if st.secrets.get("CORTEX_ADMIN", False):
+        with st.expander("📈 Latencias por etapa (admin)"):
+            st.dataframe(trazas.resumen(), hide_index=True, use_container_width=True)
+            st.download_button("⬇️ Métricas (Prometheus)", trazas.prometheus(), file_name="cortex_metricas.txt", mime="text/plain")
+
 # ==========================================
 # 5. NÚCLEO DE PROCESAMIENTO Y SANEAMIENTO
 # ==========================================
 if uploaded_file:
+    import pandas as pd
+
+    from cortex_bodega import Bodega, RangoDemasiadoGrande
+    from cortex_columnar import AlmacenColumnar, clave_columnar
+    from cortex_cubo import CATALOGO_PROMPTS, normalizar_prompt, responder_catalogo
+    from cortex_datos import cargar_y_sanear, detectar_tipo_reporte, leer_encabezados, medir_reporte
+    from cortex_export import FORMATOS, MAX_FILAS_XLSX, exportar_bytes
+    from cortex_ingesta import es_csv_grande, ingerir_csv_por_tandas
+    from cortex_radar import COLUMNA_CONTEO, RadarCompetencia
+    from cortex_render import FILAS_POR_PAGINA, filtrar_y_ordenar, formatear_moneda, medir_payload, pagina, reducir_para_grafico
+    from cortex_sandbox import ConsultaCancelada, ErrorSandbox, PoolEjecucion, activar_copy_on_write
+
+    activar_copy_on_write()
+    cache_reportes = obtener_cache_reportes()
+    cache_radares = obtener_cache_radares()
+    almacen_columnar = obtener_almacen_columnar()
+    bodega = obtener_bodega()
+    # Un CSV más grande que CORTEX_CSV_TANDAS_MB no se carga entero: se recorre por tandas (ver cortex_ingesta)
+    por_tandas = es_csv_grande(uploaded_file.name, uploaded_file.size)
+
+if uploaded_file and por_tandas:
+    huella = huella_archivo(uploaded_file)
+    clave_reporte = f"{huella}_tandas"
+    reporte = cache_reportes.obtener(clave_reporte)
+    if reporte is None:
+        avance = st.progress(0.0, text="📥 Leyendo el CSV por tandas...")
+
+        def al_avanzar(leidos, total):
+            avance.progress(leidos / max(total, 1), text=f"📥 Leyendo el CSV por tandas: {leidos / 1e6:,.0f} de {total / 1e6:,.0f} MB")
+
+        try:
+            reporte = ingerir_csv_por_tandas(uploaded_file, uploaded_file.name, al_avanzar=al_avanzar)
+        except Exception as e:
+            st.error(f"Error al leer el archivo: {e}")
+            st.stop()
+        avance.empty()
+        cache_reportes.guardar(clave_reporte, reporte)
+
+    tipo_reporte = reporte["tipo_reporte"]
+    MONT_COL = reporte["MONT_COL"]
+    st.title(f"🤖 Cortex Analytics: Módulo {tipo_reporte}")
+    st.success(f"✅ Archivo leído por tandas: **{reporte['filas']:,} registros** en {reporte['tandas']} tandas, sin cargarlo entero en memoria.")
+    if reporte["bytes_invalidos"]:
+        st.warning(f"⚠️ {reporte['bytes_invalidos']:,} bytes del archivo no eran UTF-8 válido y se reemplazaron por '�'. "
+                   "Si algún nombre se ve mal, vuelve a exportar el archivo en UTF-8.")
+    st.info("💡 Con un archivo de este tamaño Cortex muestra el radar y los totales por proveedor y comprador. "
+            "El chat y la bodega histórica necesitan el archivo completo en memoria: para usarlos, sube el export acotado a un período.")
+    st.markdown("---")
+
+    st.subheader("🎯 Radar de Oportunidades: Océanos Azules")
+    radar = reporte["radar"]
+    if radar is not None:
+        max_competidores = st.number_input("Baja competencia: hasta N proveedores", min_value=2, max_value=50, value=2)
+        unicornios_df = reporte["unicornios_df"]
+        baja_comp_df = reporte["baja_comp_df"] if max_competidores == 2 else radar.con_competidores(2, max_competidores)
+        col_u1, col_u2 = st.columns(2)
+        etiqueta_baja = "Solo 2 Proveedores" if max_competidores == 2 else f"2 a {max_competidores} Proveedores"
+        col_u1.metric("🦄 Negocios Unicornio (1 solo Proveedor)", len(unicornios_df))
+        col_u2.metric(f"🛡️ Baja Competencia ({etiqueta_baja})", len(baja_comp_df))
+        if not unicornios_df.empty:
+            st.markdown("#### 🔍 Detalle de Negocios Unicornio")
+            mostrar_tabla(unicornios_df.drop(columns=COLUMNA_CONTEO), "radar", columnas_moneda=[MONT_COL] if MONT_COL else (),
+                          orden_inicial=MONT_COL, descarga="Radar_Unicornios")
+    else:
+        st.warning("⚠️ Faltan columnas de ID o Proveedor mapeadas para calcular los monopolios.")
+
+    st.markdown("---")
+    st.subheader("🏆 Totales por proveedor y por comprador")
+    totales = {"Proveedores": reporte["totales_proveedor"], "Compradores": reporte["totales_comprador"]}
+    totales = {titulo: tabla for titulo, tabla in totales.items() if tabla is not None}
+    for pestana, (titulo, tabla) in zip(st.tabs(list(totales)), totales.items()):
+        with pestana:
+            st.caption(f"{len(tabla):,} {titulo.lower()} distintos")
+            mostrar_tabla(tabla, f"totales_{titulo.lower()}", columnas_moneda=["Monto"] if "Monto" in tabla else (),
+                          orden_inicial="Monto" if "Monto" in tabla else "Registros", descarga=f"Totales_{titulo}")
+
+elif uploaded_file:
     try:
-        if uploaded_file.name.endswith('csv'):
-            try:
-                df = pd.read_csv(uploaded_file)
-            except UnicodeDecodeError:
-                df = pd.read_csv(uploaded_file, encoding='latin1')
-        else:
-            df = pd.read_excel(uploaded_file)
-        
-        df.columns = df.columns.str.strip()
+        encabezados = encabezados_archivo(uploaded_file)
     except Exception as e:
         st.error(f"Error al leer el archivo: {e}")
         st.stop()
 
-    tipo_reporte = detectar_tipo_reporte(df.columns.tolist())
+    # Solo se cargan las columnas que usa el módulo detectado; el resto se pide explícitamente
+    with st.sidebar:
+        columnas_extra = st.multiselect("➕ Columnas adicionales para el análisis", options=encabezados)
+
+    huella = huella_archivo(uploaded_file)
+    clave_reporte = clave_columnar(huella, detectar_tipo_reporte(encabezados), columnas_extra)
+    reporte = cache_reportes.obtener(clave_reporte)
+
+    if reporte is None:
+        # Segundo nivel: el almacén columnar sobrevive a reinicios y evita re-parsear el Excel
+        reporte = almacen_columnar.obtener(clave_reporte)
+        if reporte is None:
+            with st.spinner("🛡️ Saneando datos y mapeando inteligencia (Cerebro Múltiple)..."):
+                try:
+                    reporte = cargar_y_sanear(uploaded_file.getvalue(), uploaded_file.name, columnas_extra)
+                except Exception as e:
+                    st.error(f"Error al leer el archivo: {e}")
+                    st.stop()
+                almacen_columnar.guardar(clave_reporte, reporte)
+        cache_reportes.guardar(clave_reporte, reporte)
+
+    # Cada archivo se suma una sola vez a la bodega (por huella); las filas ya guardadas no se duplican
+    if not bodega.contiene(reporte["tipo_reporte"], huella):
+        with st.spinner("🗄️ Agregando el archivo a la bodega histórica..."):
+            ingesta = bodega.ingerir(reporte, huella, uploaded_file.name)
+        st.toast(f"🗄️ Bodega: {ingesta['filas_nuevas']:,} filas nuevas · {ingesta['duplicadas']:,} ya estaban guardadas")
+
+    meta_bodega = bodega.meta(reporte["tipo_reporte"])
+    rango_bodega = None
+    if meta_bodega and meta_bodega.get("FECHA_COL"):
+        with st.sidebar:
+            st.markdown("---")
+            st.markdown("**🗄️ Bodega histórica**")
+            st.caption(f"{len(meta_bodega['archivos'])} archivos · {sum(meta_bodega['periodos'].values()):,} filas · {len(meta_bodega['periodos'])} meses")
+            if st.toggle("Analizar el histórico en vez del archivo"):
+                extremos = bodega.rango_fechas(reporte["tipo_reporte"])
+                if extremos:
+                    seleccion = st.date_input("Rango de fechas", value=extremos, min_value=extremos[0], max_value=extremos[1])
+                    if len(seleccion) == 2:
+                        rango_bodega = seleccion
+            with st.expander("📅 Meses cargados"):
+                st.dataframe(resumen_bodega(reporte["tipo_reporte"], meta_bodega["version"]), hide_index=True, use_container_width=True)
+
+    if rango_bodega:
+        # Solo se leen de la bodega las particiones y filas del rango; radar, cubo y chat operan sobre ese reporte
+        tipo_bodega = reporte["tipo_reporte"]
+        clave_rango = bodega.clave_rango(tipo_bodega, *rango_bodega)
+        reporte_rango = cache_reportes.obtener(clave_rango)
+        if reporte_rango is None:
+            try:
+                with st.spinner("🗄️ Consultando la bodega histórica..."):
+                    with trazas.tramo("read", origen="bodega", tipo_reporte=tipo_bodega) as tramo:
+                        reporte_rango = bodega.reporte(tipo_bodega, *rango_bodega)
+                        tramo["filas"] = len(reporte_rango["df"])
+                cache_reportes.guardar(clave_rango, reporte_rango)
+            except RangoDemasiadoGrande as e:
+                # El rango no se carga: se sigue con el archivo subido
+                st.warning(f"🗄️ {e} Acota el rango de fechas para analizar el histórico.")
+                rango_bodega = None
+        if reporte_rango is not None:
+            reporte, clave_reporte = reporte_rango, clave_rango
+
+    # El reporte cacheado se comparte entre sesiones: NO mutar `df` ni los marcos del radar
+    df = reporte["df"]
+    tipo_reporte = reporte["tipo_reporte"]
+    col_map_final = reporte["col_map_final"]
+
+    # --- VARIABLES CORTAS Y GLOBALES (ANTI-DISLEXIA IA) ---
+    MONT_COL = reporte["MONT_COL"]
+    PROV_COL = reporte["PROV_COL"]
+    COMP_COL = reporte["COMP_COL"]
+    ID_COL = reporte["ID_COL"]
+    FECHA_COL = reporte["FECHA_COL"]
+    COLS_PROD = reporte["COLS_PROD"]
+
     st.title(f"🤖 Cortex Analytics: Módulo {tipo_reporte}")
     
-    with st.spinner("🛡️ Saneando datos y mapeando inteligencia (Cerebro Múltiple)..."):
-        col_map = {}
-        cols_detalle_prod = []
-
-        if tipo_reporte in ["Licitaciones", "Compras Ágiles"]:
-            if 'Cantidad Adjudicada' in df.columns: df['Cantidad Adjudicada'] = limpiar_numeros(df['Cantidad Adjudicada'])
-            if 'Monto Unitario' in df.columns: df['Monto Unitario'] = limpiar_numeros(df['Monto Unitario'])
-            if 'Cantidad Adjudicada' in df.columns and 'Monto Unitario' in df.columns:
-                df['Monto_Total_Estimado'] = df['Cantidad Adjudicada'] * df['Monto Unitario']
-            if 'Fecha Adjudicación' in df.columns: df['Fecha_Datetime'] = limpiar_fechas(df['Fecha Adjudicación'])
-
-            col_map = {
-                'MONTO_REAL': 'Monto_Total_Estimado' if 'Monto_Total_Estimado' in df.columns else 'Monto Unitario',
-                'PROVEEDOR_CLAVE': 'Nombre Proveedor',
-                'COMPRADOR_CLAVE': 'Nombre Organismo',
-                'FECHA_CLAVE': 'Fecha_Datetime',
-                'ID_CLAVE': 'CodigoExterno' if 'CodigoExterno' in df.columns else 'ID Licitación'
-            }
-            cols_detalle_prod = ['Nombre Producto', 'Descripcion Producto']
-
-        elif tipo_reporte == "Órdenes de Compra":
-            if 'TotalLinea' in df.columns: df['TotalLinea'] = limpiar_numeros(df['TotalLinea'])
-            if 'FechaAceptacion' in df.columns: df['Fecha_Datetime'] = limpiar_fechas(df['FechaAceptacion'])
-
-            col_map = {
-                'MONTO_REAL': 'TotalLinea',
-                'PROVEEDOR_CLAVE': 'NombreProvider',
-                'COMPRADOR_CLAVE': 'NombreUnidad', 
-                'FECHA_CLAVE': 'Fecha_Datetime',
-                'ID_CLAVE': 'Codigo'
-            }
-            cols_detalle_prod = ['Producto', 'EspecificacionProveedor']
-
-        elif tipo_reporte == "Convenio Marco":
-            if 'Precio Oferta' in df.columns: df['Precio Oferta'] = limpiar_numeros(df['Precio Oferta'])
-            if 'Fecha Lectura' in df.columns: df['Fecha_Datetime'] = limpiar_fechas(df['Fecha Lectura'])
-
-            col_map = {
-                'MONTO_REAL': 'Precio Oferta',
-                'PROVEEDOR_CLAVE': 'Empresa',
-                'COMPRADOR_CLAVE': 'Región',
-                'FECHA_CLAVE': 'Fecha_Datetime',
-                'ID_CLAVE': 'ID Producto'
-            }
-            cols_detalle_prod = ['Nombre Producto', 'Formato']
-        
-        col_map_final = {k: v for k, v in col_map.items() if v in df.columns}
-
-        # --- VARIABLES CORTAS Y GLOBALES (ANTI-DISLEXIA IA) ---
-        MONT_COL = col_map_final.get('MONTO_REAL')
-        PROV_COL = col_map_final.get('PROVEEDOR_CLAVE')
-        COMP_COL = col_map_final.get('COMPRADOR_CLAVE')
-        ID_COL = col_map_final.get('ID_CLAVE')
-        FECHA_COL = col_map_final.get('FECHA_CLAVE')
-        COLS_PROD = [c for c in cols_detalle_prod if c in df.columns]
-    
-    st.success(f"✅ Archivo blindado y listo. **{len(df):,} registros procesados.**")
+    if rango_bodega:
+        st.success(f"🗄️ Histórico {rango_bodega[0]:%d-%m-%Y} → {rango_bodega[1]:%d-%m-%Y}: **{len(df):,} registros** de {len(meta_bodega['archivos'])} archivos.")
+    else:
+        st.success(f"✅ Archivo blindado y listo. **{len(df):,} registros procesados.**")
+    if reporte.get("memoria_antes"):
+        ahorro = 1 - reporte["memoria_despues"] / reporte["memoria_antes"]
+        st.caption(f"🗜️ Memoria del reporte: {reporte['memoria_antes'] / 1e6:,.1f} MB → {reporte['memoria_despues'] / 1e6:,.1f} MB ({ahorro:.0%} menos, columnas de texto categóricas)")
     st.markdown("---")
 
     # ==========================================
@@ -166,31 +418,46 @@ if uploaded_file:
     st.info("💡 **Inteligencia de Mercado:** Cortex escanea buscando negocios donde la competencia es mínima o nula (Monopolios).")
     
     if ID_COL and PROV_COL:
-        competencia = df.groupby(ID_COL)[PROV_COL].nunique().reset_index()
-        competencia.columns = [ID_COL, 'Num_Competidores']
-        df_unicos = df.drop_duplicates(subset=[ID_COL]).merge(competencia, on=ID_COL)
-        
-        unicornios_df = df_unicos[df_unicos['Num_Competidores'] == 1]
-        baja_comp_df = df_unicos[df_unicos['Num_Competidores'] == 2]
+        etiqueta_negocio = "Negocios" if tipo_reporte in ["Órdenes de Compra", "Compras Ágiles"] else "Licitaciones"
+        agrupaciones = {etiqueta_negocio: ID_COL, "Compradores": COMP_COL, "Productos": COLS_PROD[0] if COLS_PROD else None}
+        agrupaciones = {etiqueta: col for etiqueta, col in agrupaciones.items() if col}
+
+        with st.expander("⚙️ Ajustes del radar"):
+            col_a1, col_a2 = st.columns(2)
+            agrupacion = col_a1.selectbox("Contar proveedores distintos por:", list(agrupaciones))
+            max_competidores = col_a2.number_input("Baja competencia: hasta N proveedores", min_value=2, max_value=50, value=2)
+
+        if agrupacion == etiqueta_negocio and max_competidores == 2:
+            # Configuración por defecto: ya viene calculada con el reporte
+            unicornios_df = reporte["unicornios_df"]
+            baja_comp_df = reporte["baja_comp_df"]
+        else:
+            clave_radar = (clave_reporte, agrupaciones[agrupacion])
+            radar = cache_radares.obtener(clave_radar)
+            if radar is None:
+                with trazas.tramo("radar", tipo_reporte=tipo_reporte, agrupacion=agrupaciones[agrupacion]) as tramo:
+                    radar = RadarCompetencia(PROV_COL, agrupaciones[agrupacion]).agregar(df)
+                    tramo["filas"] = len(radar.negocios())
+                cache_radares.guardar(clave_radar, radar)
+            unicornios_df = radar.con_competidores(1)
+            baja_comp_df = radar.con_competidores(2, max_competidores)
         
         col_u1, col_u2 = st.columns(2)
-        etiqueta_negocio = "Negocios" if tipo_reporte in ["Órdenes de Compra", "Compras Ágiles"] else "Licitaciones"
-        col_u1.metric(f"🦄 {etiqueta_negocio} Unicornio (1 solo Proveedor)", len(unicornios_df))
-        col_u2.metric("🛡️ Baja Competencia (Solo 2 Proveedores)", len(baja_comp_df))
+        etiqueta_baja = "Solo 2 Proveedores" if max_competidores == 2 else f"2 a {max_competidores} Proveedores"
+        col_u1.metric(f"🦄 {agrupacion} Unicornio (1 solo Proveedor)", len(unicornios_df))
+        col_u2.metric(f"🛡️ Baja Competencia ({etiqueta_baja})", len(baja_comp_df))
         
         if not unicornios_df.empty:
-            st.markdown(f"#### 🔍 Detalle de {etiqueta_negocio} Unicornio")
+            st.markdown(f"#### 🔍 Detalle de {agrupacion} Unicornio")
             col_prod_base = COLS_PROD[0] if len(COLS_PROD) > 0 else None
             col_prod_desc = COLS_PROD[1] if len(COLS_PROD) > 1 else None
             
             cols_to_show = [c for c in [ID_COL, COMP_COL, col_prod_base, col_prod_desc, PROV_COL, MONT_COL] if c is not None and c in df.columns]
             tabla_mostrar = unicornios_df[cols_to_show]
             
-            if MONT_COL:
-                tabla_mostrar = tabla_mostrar.sort_values(by=MONT_COL, ascending=False)
-                st.dataframe(tabla_mostrar.style.format({MONT_COL: "${:,.0f}"}), use_container_width=True, hide_index=True)
-            else:
-                st.dataframe(tabla_mostrar, use_container_width=True, hide_index=True)
+            # Paginada en el servidor: el formato de moneda se aplica solo a la página visible
+            mostrar_tabla(tabla_mostrar, "radar", columnas_moneda=[MONT_COL] if MONT_COL else (), orden_inicial=MONT_COL,
+                          descarga="Radar_Unicornios")
     else:
         st.warning("⚠️ Faltan columnas de ID o Proveedor mapeadas para calcular los monopolios.")
 
@@ -202,40 +469,21 @@ if uploaded_file:
     st.subheader(f"💬 Consultor Estratégico Cortex")
     
     with st.expander("📖 Catálogo de Prompts Comerciales (Copia y pega la pregunta que necesites)"):
-        col_a, col_b = st.columns(2)
-        with col_a:
-            st.markdown("**📊 Análisis de Competencia**")
-            st.markdown('<div class="prompt-box">Genera un informe comercial de Market Share por proveedor.</div>', unsafe_allow_html=True)
-            st.markdown('<div class="prompt-box">¿Cuáles son los 5 proveedores que más dinero mueven?</div>', unsafe_allow_html=True)
-            st.markdown('<div class="prompt-box">Muestra el ranking de las empresas con más adjudicaciones.</div>', unsafe_allow_html=True)
-            st.markdown('<div class="prompt-box">Compara el precio máximo y mínimo ofertado por cada empresa.</div>', unsafe_allow_html=True)
-            st.markdown('<div class="prompt-box">¿Qué competidor tiene el precio promedio más bajo ofertado?</div>', unsafe_allow_html=True)
-            
-            st.markdown("**🛒 Compradores y Clientes**")
-            st.markdown('<div class="prompt-box">Genera un ranking de los 5 mayores compradores u organismos.</div>', unsafe_allow_html=True)
-            st.markdown('<div class="prompt-box">¿Qué regiones o instituciones concentran el mayor gasto?</div>', unsafe_allow_html=True)
-            st.markdown('<div class="prompt-box">Dime el detalle de compras del organismo que más gasta.</div>', unsafe_allow_html=True)
-            st.markdown('<div class="prompt-box">¿Cuántas compras/licitaciones únicas hay por cada comprador?</div>', unsafe_allow_html=True)
-            st.markdown('<div class="prompt-box">Muestra la tabla de compradores ordenados por monto total.</div>', unsafe_allow_html=True)
-
-        with col_b:
-            st.markdown("**📦 Productos y Precios**")
-            st.markdown('<div class="prompt-box">¿Cuál es el producto que genera más volumen de dinero?</div>', unsafe_allow_html=True)
-            st.markdown('<div class="prompt-box">Haz un análisis de la tendencia de precios en el tiempo.</div>', unsafe_allow_html=True)
-            st.markdown('<div class="prompt-box">Genera un reporte detallado del producto más demandado.</div>', unsafe_allow_html=True)
-            st.markdown('<div class="prompt-box">¿Cuál es el precio promedio, máximo y mínimo por producto?</div>', unsafe_allow_html=True)
-            st.markdown('<div class="prompt-box">Muestra los 5 productos con mayor cantidad adjudicada.</div>', unsafe_allow_html=True)
-            
-            st.markdown("**🎯 Estrategia y Oportunidades**")
-            st.markdown('<div class="prompt-box">¿Cuáles son los negocios más rentables (Top 5 por mayor monto)?</div>', unsafe_allow_html=True)
-            st.markdown('<div class="prompt-box">Resume los montos totales adjudicados agrupados por fecha.</div>', unsafe_allow_html=True)
-            st.markdown('<div class="prompt-box">¿Cuál es el ticket promedio (monto) por negocio?</div>', unsafe_allow_html=True)
-            st.markdown('<div class="prompt-box">Crea un resumen estadístico general de todos los datos.</div>', unsafe_allow_html=True)
-            st.markdown('<div class="prompt-box">Genera un informe detallando las oportunidades de negocio en este archivo.</div>', unsafe_allow_html=True)
-
-    for message in st.session_state.messages:
+        secciones = list(CATALOGO_PROMPTS.items())
+        for columna, mitad in zip(st.columns(2), (secciones[:2], secciones[2:])):
+            with columna:
+                for titulo, prompts in mitad:
+                    st.markdown(f"**{titulo}**")
+                    for texto in prompts:
+                        st.markdown(f'<div class="prompt-box">{texto}</div>', unsafe_allow_html=True)
+
+    ultimo = st.session_state.get("ultimo_resultado")
+    for indice, message in enumerate(st.session_state.messages):
         with st.chat_message(message["role"]):
             st.markdown(message["content"])
+            # La última respuesta se vuelve a dibujar para que su tabla se pueda paginar, ordenar y filtrar
+            if ultimo is not None and ultimo["indice"] == indice:
+                mostrar_resultado(ultimo["resultado"], ultimo["prompt"], f"resultado_{indice}", FECHA_COL)
 
     if prompt := st.chat_input("Pega aquí uno de los Prompts Comerciales..."):
         st.session_state.messages.append({"role": "user", "content": prompt})
@@ -260,62 +508,96 @@ if uploaded_file:
                 REGLAS CRÍTICAS (SI VIOLAS ESTO, EL SISTEMA FALLA):
                 1. DATAFRAME `df`: ¡PROHIBIDO usar las palabras `data`, `dataset`! Siempre `df`.
                 2. SIN FUNCIONES: CÓDIGO LINEAL. PROHIBIDO USAR `def`.
-                3. VARIABLES GLOBALES: NUNCA escribas 'Nombre Proveedor' o col_map_final['...']. Usa las variables globales `MONT_COL`, `PROV_COL`, `COMP_COL`, `ID_COL`, `COLS_PROD` directamente. Ejemplo correcto: `df.groupby(PROV_COL)[MONT_COL].sum()`.
+                3. VARIABLES GLOBALES: NUNCA escribas 'Nombre Proveedor' o col_map_final['...']. Usa las variables globales `MONT_COL`, `PROV_COL`, `COMP_COL`, `ID_COL`, `COLS_PROD` directamente. Ejemplo correcto: `df.groupby(PROV_COL, observed=True)[MONT_COL].sum()`.
                 4. DECLARACIÓN: La variable `resultado` debe declararse en el ámbito global.
                 5. SOLO CÓDIGO: Devuelve SOLO código Python puro. SIN markdown (sin ```python).
                 6. ANTI-ALUCINACIONES: ¡PROHIBIDO inventar nombres! Extrae todo de `df`.
                 7. TABLAS PURAS: Si preguntan "detalle de compras", asigna el DataFrame DIRECTO a `resultado`. CERO TEXTO.
+                8. CATEGÓRICAS: Las columnas de texto son de tipo `category`. En todo `groupby` usa `observed=True` (ej: `df.groupby(PROV_COL, observed=True)`).
                 
                 RECETARIO DE INTELIGENCIA COMERCIAL:
                 - Si preguntan "Dime el detalle de compras del organismo que más gasta":
-                  top_org = df.groupby(COMP_COL)[MONT_COL].sum().idxmax()
+                  top_org = df.groupby(COMP_COL, observed=True)[MONT_COL].sum().idxmax()
                   df_filt = df[df[COMP_COL] == top_org]
                   cols = [c for c in [ID_COL, COMP_COL, PROV_COL, MONT_COL] + COLS_PROD if c in df.columns]
                   resultado = df_filt[cols].drop_duplicates()
                   
                 - Si preguntan "¿Cuántas compras/licitaciones únicas hay por cada comprador?":
-                  resultado = df.groupby(COMP_COL).agg({{ID_COL: ['nunique', 'unique']}}).reset_index()
+                  resultado = df.groupby(COMP_COL, observed=True).agg({{ID_COL: ['nunique', 'unique']}}).reset_index()
                 """
                 
                 clean_code = "No se pudo generar código. Posible error de conexión con la IA o límite de API."
                 
                 try:
-                    response = model.generate_content([system_instruction, prompt])
-                    clean_code = response.text.replace("```python", "").replace("```", "").strip()
-                    
-                    # 🚀 INYECTANDO LAS VARIABLES GLOBALES DIRECTAMENTE AL ENTORNO PARA EVITAR TIPEOS 🚀
-                    scope = {
-                        "df": df.copy(), "pd": pd, 
-                        "MONT_COL": MONT_COL, "PROV_COL": PROV_COL, "COMP_COL": COMP_COL,
-                        "ID_COL": ID_COL, "FECHA_COL": FECHA_COL, "COLS_PROD": COLS_PROD
-                    }
-                    exec(clean_code, scope)
-                    
-                    if "resultado" not in scope:
-                        raise ValueError("No se generó la variable 'resultado'.")
-                        
-                    resultado = scope["resultado"]
-
-                    st.markdown("**Análisis de Cortex:**")
-                    
-                    if isinstance(resultado, str):
-                        st.markdown(resultado) 
-                    elif isinstance(resultado, (pd.Series, pd.DataFrame)):
-                        st.dataframe(resultado, use_container_width=True) 
-                        prompt_lower = prompt.lower()
-                        try: 
-                            if any(word in prompt_lower for word in ["tendencia", "evolución", "fecha", "tiempo"]):
-                                st.line_chart(resultado)
-                            elif any(word in prompt_lower for word in ["top", "market", "ranking", "compradores", "proveedores"]):
-                                if len(resultado.columns) <= 2:
-                                    st.bar_chart(resultado.set_index(resultado.columns[0]))
-                        except:
-                            pass 
+                    # ⚡ Preguntas del catálogo que el cubo pre-calculado ya responde: sin IA ni exec
+                    t_inicio = time.perf_counter()
+                    with trazas.tramo("exec", origen="cubo") as tramo:
+                        resultado = responder_catalogo(prompt, reporte.get("cubo"))
+                        tramo["filas"] = filas_de(resultado)
+
+                    if resultado is not None:
+                        clean_code = "# Respondido desde el cubo de agregados pre-calculado"
+                        st.caption(f"⚡ Respuesta instantánea desde el cubo de agregados ({(time.perf_counter() - t_inicio) * 1000:.0f} ms, sin llamada a la IA).")
                     else:
-                        st.write(resultado)
-                            
+                        with trazas.tramo("prompt", tipo_reporte=tipo_reporte) as tramo:
+                            columnas = {
+                                "MONT_COL": MONT_COL, "PROV_COL": PROV_COL, "COMP_COL": COMP_COL,
+                                "ID_COL": ID_COL, "FECHA_COL": FECHA_COL, "COLS_PROD": COLS_PROD
+                            }
+                            clave = clave_codigo(prompt, tipo_reporte, columnas, system_instruction)
+                            guardado = cache_codigo.obtener(clave)
+                            tramo["bytes"] = len(system_instruction.encode("utf-8")) + len(prompt.encode("utf-8"))
+                            tramo["cache_codigo"] = guardado is not None
+
+                        # 🚀 INYECTANDO LAS VARIABLES GLOBALES DIRECTAMENTE AL ENTORNO PARA EVITAR TIPEOS 🚀
+                        # El código corre en un proceso aparte que abre el reporte desde el almacén columnar
+                        def ejecutar_en_sandbox(codigo, origen):
+                            with trazas.tramo("exec", origen=origen) as tramo:
+                                ruta_datos = almacen_columnar.ruta_datos(clave_reporte)
+                                if not os.path.exists(ruta_datos):
+                                    almacen_columnar.guardar(clave_reporte, reporte)
+                                resultado = obtener_pool_ejecucion().ejecutar(ruta_datos, codigo, columnas)
+                                tramo["filas"] = filas_de(resultado)
+                            return resultado
+
+                        if guardado is not None:
+                            clean_code = guardado["codigo"]
+                            try:
+                                resultado = ejecutar_en_sandbox(clean_code, "cache_codigo")
+                                st.caption(f"♻️ Código reutilizado de una consulta anterior ({(time.perf_counter() - t_inicio) * 1000:.0f} ms, sin llamada a la IA).")
+                            except ErrorSandbox as e:
+                                # El código guardado ya no sirve: se borra para no repetir el error en cada consulta
+                                cache_codigo.invalidar(clave)
+                                if isinstance(e, ConsultaCancelada):
+                                    raise
+                                guardado = None  # se le pide de nuevo a la IA
+
+                        if guardado is None:
+                            with trazas.tramo("generate", modelo="gemini-2.5-flash") as tramo:
+                                response = planificador().llamar(
+                                    lambda: modelo_gemini("gemini-2.5-flash").generate_content([system_instruction, prompt]),
+                                    estimar_tokens([system_instruction, prompt]),
+                                    usuario=st.session_state.id_sesion
+                                )
+                                tramo["tokens_entrada"], tramo["tokens_salida"] = tokens_de(response)
+                            clean_code = response.text.replace("```python", "").replace("```", "").strip()
+                            resultado = ejecutar_en_sandbox(clean_code, "sandbox")
+                            # Solo se guarda código que corrió y produjo `resultado`
+                            cache_codigo.guardar(clave, {"codigo": clean_code, "prompt": prompt, "tipo_reporte": tipo_reporte})
+
+                    with trazas.tramo("render", filas=filas_de(resultado)) as tramo:
+                        st.markdown("**Análisis de Cortex:**")
+                        indice = len(st.session_state.messages)
+                        tramo["bytes"] = mostrar_resultado(resultado, prompt, f"resultado_{indice}", FECHA_COL)
+                        st.session_state.ultimo_resultado = {"indice": indice, "resultado": resultado, "prompt": prompt}
+
                     st.session_state.messages.append({"role": "assistant", "content": "Análisis estratégico completado."})
                 
+                except ConsultaCancelada as e:
+                    st.warning(f"⏱️ {e} Intenta acotar la pregunta (menos columnas, un período o un proveedor específico).")
+                    with st.expander("Ver detalles del error para soporte"):
+                        st.code(f"Error: {e}\n\nCódigo que la IA intentó ejecutar:\n{clean_code}")
+
                 except Exception as e:
                     st.error("⚠️ Cortex no pudo procesar esta consulta específica con este archivo.")
                     with st.expander("Ver detalles del error para soporte"):
@@ -323,3 +605,6 @@ if uploaded_file:
 
 else:
     st.info("👋 Sube tu archivo Excel/CSV para activar el motor de inteligencia de negocios.")
+    precargar(MODULOS_ANALISIS)
+
+registrar_rerun("analytics", t_rerun, archivo=bool(uploaded_file))
@@ -1,13 +1,22 @@
 import streamlit as st
-import google.generativeai as genai
-import pandas as pd
-import json
-import re
-import io
-import tempfile
-import os
-import ast
 import time
+import os
+import queue
+import atexit
+import uuid
+import contextvars
+import logging
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+# Antes del login solo lo liviano: el resto se importa (y se precarga en segundo plano) después
+from cortex_arranque import precargar, registrar_rerun
+from cortex_trazas import trazador
+
+t_rerun = time.perf_counter()
+trazas = trazador()
+
+# Lo que pide la aplicación tras el login y al auditar: se importa mientras se escribe la clave
+MODULOS_AUDITORIA = ("google.generativeai", "pandas", "xlsxwriter", "cortex_extraccion", "cortex_indice", "cortex_export")
 
 # --- 1. CONFIGURACIÓN VISUAL ---
 st.set_page_config(
@@ -115,9 +124,71 @@ def check_password():
     return False
 
 if not check_password():
+    precargar(MODULOS_AUDITORIA)
+    registrar_rerun("cortex", t_rerun, login=True)
     st.stop()  # Detiene la ejecución si no hay login
 
 # --- 3. APLICACIÓN CORTEX (Solo carga si pasó el login) ---
+from cortex_archivos import GestorArchivosGemini
+from cortex_cache import CacheDisco
+from cortex_cuota import como_usuario, planificador
+from cortex_extraccion import MAPA_COLUMNAS, MODO_COMPLETO, MODO_SECCIONES, extraer_matriz_cacheada, mapear_fila, construir_excel_matriz
+from cortex_gemini import configurar
+from cortex_indice import ORIGEN_PAGINAS, IndiceLicitaciones, ruta_indice
+
+# Gemini, pandas y xlsxwriter recién se usan al auditar: siguen cargándose en segundo plano
+precargar(MODULOS_AUDITORIA)
+
+# Caché de matrices ya auditadas: una sola instancia por proceso, compartida por todas las sesiones
+@st.cache_resource
+def obtener_cache_extracciones():
+    directorio = os.path.join(os.environ.get("CORTEX_CACHE_DIR", ".cortex_cache"), "extracciones")
+    return CacheDisco(directorio, max_bytes=200 * 1024 * 1024, max_edad_s=30 * 24 * 3600)
+
+cache_extracciones = obtener_cache_extracciones()
+
+# PDFs ya subidos a Gemini: se reutilizan entre re-ejecuciones y reintentos, y se borran al vencer o al salir
+@st.cache_resource
+def obtener_gestor_archivos():
+    gestor = GestorArchivosGemini()
+    atexit.register(gestor.cerrar)
+    return gestor
+
+gestor_archivos = obtener_gestor_archivos()
+
+# Índice de búsqueda (SQLite FTS5) con los 24 campos y el texto de cada licitación auditada
+@st.cache_resource
+def obtener_indice():
+    return IndiceLicitaciones(ruta_indice())
+
+indice = obtener_indice()
+
+def extraer_e_indexar(pdf_bytes, nombre, forzar, **opciones):
+    """Extracción con caché + alta en el índice; si el índice falla, la auditoría sigue (retorna el error)."""
+    datos_raw, desde_cache, detalle = extraer_matriz_cacheada(pdf_bytes, cache_extracciones, forzar, **opciones)
+    try:
+        indice.indexar_pdf(pdf_bytes, datos_raw, nombre, forzar=forzar, paginas=(detalle or {}).get("texto_paginas"))
+        error_indice = None
+    except Exception as e:
+        # El índice es un extra: cualquier falla (SQLite, disco, pypdf) no debe botar la auditoría
+        logging.getLogger("cortex.indice").warning("No se pudo indexar %s", nombre, exc_info=True)
+        error_indice = e
+    return datos_raw, desde_cache, detalle, error_indice
+
+if "id_sesion" not in st.session_state:
+    st.session_state.id_sesion = uuid.uuid4().hex
+
+def pintar_en_vivo(lugar, nombre, parcial):
+    """Paneles y matriz parcial de un documento mientras sus campos llegan en streaming."""
+    with lugar.container():
+        st.caption(f"📡 {nombre}: {len(parcial)}/{len(MAPA_COLUMNAS)} campos recibidos")
+        c1, c2 = st.columns(2)
+        with c1:
+            st.error(f"🚫 **Inadmisibilidad:**\n\n{parcial.get('c22', '⏳ leyendo...')}")
+        with c2:
+            st.warning(f"⚠️ **Garantías:**\n\n{parcial.get('c19', '⏳ leyendo...')}")
+        filas = [{"Campo": titulo, "Valor": str(parcial[clave])} for clave, titulo in MAPA_COLUMNAS.items() if clave in parcial]
+        st.dataframe(filas, hide_index=True, use_container_width=True)
 
 # --- SIDEBAR ---
 with st.sidebar:
@@ -128,8 +199,27 @@ with st.sidebar:
     st.markdown("---")
     st.success("🟢 **Acceso:** Seguro (SSL)")
     st.info("🧬 **Versión:** Secure V30.0")
+    stats_cache = cache_extracciones.estadisticas()
+    st.caption(f"💾 Caché: {stats_cache['entradas']} matrices auditadas · {stats_cache['aciertos']} reutilizadas")
+    gestor_archivos.purgar_vencidos()
+    archivos_vivos = gestor_archivos.pendientes()
+    st.caption(
+        f"☁️ Archivos en Gemini: {len(archivos_vivos)} ({sum(a['bytes'] for a in archivos_vivos) / 1e6:.1f} MB) · "
+        f"{gestor_archivos.subidas} subidas, {gestor_archivos.reutilizados} reutilizadas"
+    )
+    stats_indice = indice.estadisticas()
+    st.caption(f"🔎 Índice: {stats_indice['licitaciones']} licitaciones · {stats_indice['paginas']:,} páginas")
+    cuota = planificador().estadisticas()
+    st.caption(f"🚦 Cola IA: {cuota['en_cola']} en espera · {cuota['rpm_usado']}/{cuota['rpm']} RPM · {cuota['reintentos_429']} reintentos por 429")
+
+    # Panel de latencias por etapa (solo con CORTEX_ADMIN en secrets)
+    if st.secrets.get("CORTEX_ADMIN", False):
+        with st.expander("📈 Latencias por etapa (admin)"):
+            st.dataframe(trazas.resumen(), hide_index=True, use_container_width=True)
+            st.download_button("⬇️ Métricas (Prometheus)", trazas.prometheus(), file_name="cortex_metricas.txt", mime="text/plain")
     
     if st.button("🚪 CERRAR SESIÓN"):
+        gestor_archivos.liberar_dueno(st.session_state.id_sesion)
         st.session_state.password_correct = False
         st.rerun()
 
@@ -137,25 +227,44 @@ with st.sidebar:
 st.title("🧠 Cortex: Auditoría Matriz 24")
 st.markdown("Soy **Cortex**, agente para analizar bases de manera dedicada.")
 
+# --- BÚSQUEDA EN LICITACIONES YA AUDITADAS ---
+with st.expander("🔎 Buscar en licitaciones auditadas"):
+    c_texto, c_donde = st.columns([3, 2])
+    consulta = c_texto.text_input("Buscar:", placeholder='canje, "boleta de garantía", multa AND UTM', key="busqueda_texto")
+    opciones_origen = {ORIGEN_PAGINAS: "Texto de las bases", **MAPA_COLUMNAS}
+    origenes = c_donde.multiselect("En:", list(opciones_origen), format_func=opciones_origen.get, placeholder="Campos y texto")
+    if consulta:
+        t_busqueda = time.perf_counter()
+        hallazgos = indice.buscar(consulta, origenes=origenes)
+        st.caption(f"{len(hallazgos)} licitación(es) en {(time.perf_counter() - t_busqueda) * 1000:.0f} ms")
+        for hallazgo in hallazgos:
+            st.markdown(f"**{hallazgo['id']}** · {hallazgo['nombre'] or ''} · relevancia {hallazgo['puntaje']:.1f}")
+            for origen, fragmento in hallazgo["aciertos"]:
+                donde = MAPA_COLUMNAS.get(origen, f"Página {origen[1:]}")
+                # "$" se escapa para que los montos no se lean como LaTeX
+                texto = fragmento.replace("\n", " ").replace("$", "\\$")
+                st.markdown(f"> _{donde}:_ {texto}")
+
 # --- INPUT ---
-uploaded_file = st.file_uploader("📂 Cargar Bases (PDF):", type=["pdf"])
+uploaded_files = st.file_uploader("📂 Cargar Bases (PDF):", type=["pdf"], accept_multiple_files=True)
 
-# --- FUNCIONES ---
-def limpiar_y_reparar_json(texto):
-    try:
-        texto = re.sub(r'```json', '', texto)
-        texto = re.sub(r'```', '', texto)
-        inicio = texto.find('{')
-        fin = texto.rfind('}') + 1
-        if inicio == -1 or fin == 0: return {}
-        json_str = texto[inicio:fin]
-        return json.loads(json_str, strict=False)
-    except:
-        try: return ast.literal_eval(json_str)
-        except: return {}
+# Máximo de bases auditándose en paralelo contra Gemini (modo lote)
+MAX_EXTRACCIONES_PARALELAS = int(st.secrets.get("CORTEX_MAX_PARALELO", 4))
 
 # --- LÓGICA ---
-if uploaded_file is not None:
+if uploaded_files:
+    
+    forzar_extraccion = st.checkbox("🔄 Forzar re-extracción (ignorar caché)", value=False)
+    modo_lectura = st.radio(
+        "📑 Lectura de las bases:",
+        [MODO_SECCIONES, MODO_COMPLETO],
+        format_func=lambda m: "Solo secciones relevantes (más rápido)" if m == MODO_SECCIONES else "Documento completo",
+        horizontal=True
+    )
+    extraccion_fragmentada = st.checkbox(
+        "🧩 Extracción fragmentada (los 24 campos en 4 grupos paralelos)", value=False,
+        help="Fechas/plazos, garantías/multas, requisitos y productos/presupuesto se piden a la vez; un grupo fallido se reintenta solo."
+    )
     
     if st.button("⚡ GENERAR MATRIZ 24 COLUMNAS"):
         
@@ -164,124 +273,134 @@ if uploaded_file is not None:
         status_box = st.empty()
         bar = st.progress(0)
         
-        archivo_gemini = None 
-        
         try:
-            # A. CONEXIÓN DIRECTA (AQUÍ ESTÁ LA CORRECCIÓN)
+            # A. CONEXIÓN DIRECTA
             status_box.info("🔐 Cortex: Conectando motor AI...")
             if "GOOGLE_API_KEY" in st.secrets:
-                genai.configure(api_key=st.secrets["GOOGLE_API_KEY"])
+                # Se aplica una sola vez por proceso (y de nuevo solo si la key cambia)
+                configurar(st.secrets["GOOGLE_API_KEY"])
             else:
                 st.error("❌ Falta API Key.")
                 st.stop()
             
-            # Asignamos el modelo de forma directa y segura
-            modelo_elegido = 'gemini-2.5-flash'
-            
-            bar.progress(20)
+            bar.progress(10)
             
-            # C. LECTURA Y SUBIDA
-            status_box.info("👁️ Cortex: Procesando documento seguro...")
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_file:
-                tmp_file.write(uploaded_file.getvalue())
-                tmp_path = tmp_file.name
+            # B. LECTURA EN MEMORIA (los hilos no pueden tocar el uploader)
+            documentos = [(f.name, f.getvalue()) for f in uploaded_files]
+            total = len(documentos)
             
-            archivo_gemini = genai.upload_file(tmp_path)
-            bar.progress(40)
+            # C. AUDITORÍA CONCURRENTE (pool acotado, una fila por licitación)
+            status_box.info(f"⚡ Cortex: Auditando {total} documento(s) en paralelo...")
+            estado_docs = [st.empty() for _ in documentos]
+            vivos = [st.empty() for _ in documentos]
+            for i, (nombre, _) in enumerate(documentos):
+                estado_docs[i].info(f"⏳ {nombre}: en proceso...")
             
-            # D. PROMPT (24 PUNTOS)
-            prompt = """
-            ACTÚA COMO UN AUDITOR EXPERTO EN LICITACIONES PÚBLICAS.
-            Tu tarea es extraer INFORMACIÓN EXACTA para llenar una matriz de 24 columnas.
-            Si un dato no aparece, responde explícitamente "NO INDICA".
+            # Los hilos no tocan `st.*`: dejan cada campo en la cola y el hilo principal pinta
+            eventos = queue.Queue()
+            parciales = [{} for _ in documentos]
+            primer_campo = {}
             
-            Genera un JSON con las siguientes claves (c01 a c24):
-            1. "c01": ID Licitación.
-            2. "c02": Fecha preguntas y cierre.
-            3. "c03": Plazos licitación.
-            4. "c04": Productos ofertados (Principios activos).
-            5. "c05": Presupuesto institución.
-            6. "c06": Boletas Garantía (Monto/Glosa).
-            7. "c07": Duración contrato.
-            8. "c08": Vigencia mínima propuesta.
-            9. "c09": Reajuste (SI/NO).
-            10. "c10": Suscripción contrato (SI/NO).
-            11. "c11": Anexos admisibilidad.
-            12. "c12": Pauta evaluativa.
-            13. "c13": Requisitos administrativos.
-            14. "c14": Requisitos técnicos.
-            15. "c15": Requisitos económicos.
-            16. "c16": Plazo entrega (inc. emergencia).
-            17. "c17": Monto mínimo.
-            18. "c18": Faltante Cenabast (SI/NO).
-            19. "c19": Glosa Textual Garantía.
-            20. "c20": Vencimiento mínimo ofertar.
-            21. "c21": Canje y condiciones.
-            22. "c22": Causales inadmisibilidad.
-            23. "c23": Formato experiencia (SI/NO).
-            24. "c24": Multas asociadas.
-            """
+            def al_campo_de(idx):
+                return lambda clave, valor: eventos.put((idx, clave, valor, time.perf_counter()))
             
-            status_box.info(f"⚡ Cortex: Auditando cumplimiento normativo...")
-            model = genai.GenerativeModel(modelo_elegido)
-            response = model.generate_content([prompt, archivo_gemini])
+            resultados = {}
+            errores = {}
+            t_inicio = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=min(MAX_EXTRACCIONES_PARALELAS, total)) as pool, como_usuario(st.session_state.id_sesion):
+                # Cada hilo copia el contexto: sus llamadas a Gemini cuentan para esta sesión en la cola de cuota
+                futuros = {
+                    pool.submit(
+                        contextvars.copy_context().run,
+                        extraer_e_indexar, pdf_bytes, nombre, forzar_extraccion,
+                        modo=modo_lectura, fragmentado=extraccion_fragmentada, al_campo=al_campo_de(idx),
+                        archivos=gestor_archivos.de_sesion(st.session_state.id_sesion)
+                    ): idx
+                    for idx, (nombre, pdf_bytes) in enumerate(documentos)
+                }
+                pendientes = set(futuros)
+                terminados = 0
+                while pendientes:
+                    listos, pendientes = wait(pendientes, timeout=0.25, return_when=FIRST_COMPLETED)
+                    
+                    # VISTA EN VIVO (campos recibidos hasta ahora)
+                    actualizados = set()
+                    while True:
+                        try:
+                            idx, clave, valor, t_campo = eventos.get_nowait()
+                        except queue.Empty:
+                            break
+                        parciales[idx][clave] = valor
+                        primer_campo.setdefault(idx, t_campo - t_inicio)
+                        actualizados.add(idx)
+                    for idx in actualizados - {futuros[f] for f in listos}:
+                        pintar_en_vivo(vivos[idx], documentos[idx][0], parciales[idx])
+                    
+                    for futuro in listos:
+                        terminados += 1
+                        idx = futuros[futuro]
+                        nombre = documentos[idx][0]
+                        vivos[idx].empty()
+                        try:
+                            datos_raw, desde_cache, detalle, error_indice = futuro.result()
+                            resultados[idx] = mapear_fila(datos_raw)
+                            if desde_cache:
+                                estado_docs[idx].success(f"✅ {nombre}: desde caché ({time.perf_counter() - t_inicio:.1f} s)")
+                            else:
+                                tiempos = detalle["tiempos"]
+                                linea = f"✅ {nombre}: matriz extraída en {detalle['segundos']:.1f} s ({detalle['modo']})"
+                                if idx in primer_campo:
+                                    linea += f" · primer campo a los {primer_campo[idx]:.1f} s"
+                                if len(tiempos) > 1:
+                                    # Suma de los grupos ≈ lo que habría tardado pedirlos uno tras otro
+                                    lento = max(tiempos, key=tiempos.get)
+                                    linea += f" · {len(tiempos)} grupos en paralelo: {sum(tiempos.values()):.1f} s en serie, el más lento '{lento}' {tiempos[lento]:.1f} s"
+                                estado_docs[idx].success(linea)
+                            if error_indice is not None:
+                                st.toast(f"⚠️ {nombre}: no quedó en el índice de búsqueda ({error_indice})")
+                        except Exception as e:
+                            errores[idx] = e
+                            estado_docs[idx].error(f"❌ {nombre}: {e}")
+                        bar.progress(10 + int(80 * terminados / total))
             
-            bar.progress(85)
+            if not resultados:
+                raise RuntimeError("Ningún documento pudo ser procesado.")
             
-            # E. PROCESAMIENTO
+            # E. PROCESAMIENTO (orden original de carga)
             status_box.info("📝 Cortex: Estructurando reporte blindado...")
-            datos_raw = limpiar_y_reparar_json(response.text)
-            
-            # MAPA DE 24 COLUMNAS
-            mapa_columnas = {
-                "c01": "1. ID", "c02": "2. Fecha preguntas, fechas de cierre", "c03": "3. Plazos de la licitación",
-                "c04": "4. Productos ofertados", "c05": "5. Presupuesto institución", "c06": "6. Boleta de garantía",
-                "c07": "7. Duración de la licitación", "c08": "8. Vigencia mínima de la propuesta", "c09": "9. Si tiene reajuste la licitación",
-                "c10": "10. Hay suscripción de contrato", "c11": "11. Anexos de admisibilidad", "c12": "12. Pauta evaluativa",
-                "c13": "13. Requisitos administrativos", "c14": "14. Requisitos técnicos", "c15": "15. Requisitos económicos",
-                "c16": "16. Plazo de entrega (inc. emergencia)", "c17": "17. Monto mínimo", "c18": "18. Si es faltante Cenabast",
-                "c19": "19. Detección de glosa a ofertar", "c20": "20. Vencimiento mínimo a ofertar", "c21": "21. Canje y sus condiciones",
-                "c22": "22. Causales de inadmisibilidad", "c23": "23. Solicita formato de experiencia", "c24": "24. Multas asociadas"
-            }
-            
-            datos_finales = {}
-            for clave_json, titulo_excel in mapa_columnas.items():
-                datos_finales[titulo_excel] = datos_raw.get(clave_json, "No detectado")
+            filas = [resultados[idx] for idx in range(total) if idx in resultados]
             
             bar.progress(100)
-            status_box.success("✅ Matriz Generada.")
+            if errores:
+                status_box.warning(f"⚠️ Matriz Generada con {len(filas)} de {total} documentos ({len(errores)} con error).")
+            else:
+                status_box.success(f"✅ Matriz Generada ({len(filas)} documento(s) en {time.perf_counter() - t_inicio:.1f} s).")
             
             # ANIMACIÓN VICTORIA
             robot_spot.markdown('<div class="robot-container robot-success">😎</div>', unsafe_allow_html=True)
             
             # DASHBOARD
-            with st.container():
-                c1, c2 = st.columns(2)
-                with c1:
-                    st.error(f"🚫 **Inadmisibilidad:**\n\n{datos_finales['22. Causales de inadmisibilidad']}")
-                with c2:
-                    st.warning(f"⚠️ **Garantías:**\n\n{datos_finales['19. Detección de glosa a ofertar']}")
+            for idx, (nombre, _) in enumerate(documentos):
+                if idx not in resultados:
+                    continue
+                datos_finales = resultados[idx]
+                with st.expander(f"📄 {nombre} — {datos_finales['1. ID']}", expanded=(total == 1)):
+                    c1, c2 = st.columns(2)
+                    with c1:
+                        st.error(f"🚫 **Inadmisibilidad:**\n\n{datos_finales['22. Causales de inadmisibilidad']}")
+                    with c2:
+                        st.warning(f"⚠️ **Garantías:**\n\n{datos_finales['19. Detección de glosa a ofertar']}")
             
-            # F. EXCEL
-            df = pd.DataFrame([datos_finales])
-            columnas_ordenadas = list(mapa_columnas.values())
-            df = df[columnas_ordenadas]
-
-            buffer = io.BytesIO()
-            with pd.ExcelWriter(buffer, engine='xlsxwriter') as writer:
-                df.to_excel(writer, sheet_name='Matriz_Cortex', index=False)
-                workbook = writer.book
-                worksheet = writer.sheets['Matriz_Cortex']
-                fmt_header = workbook.add_format({'bold': True, 'bg_color': '#1e3c72', 'font_color': 'white', 'border': 1, 'align': 'center', 'valign': 'vcenter', 'text_wrap': True})
-                fmt_body = workbook.add_format({'text_wrap': True, 'border': 1, 'valign': 'top'})
-                worksheet.set_row(0, 50)
-                for col_num, value in enumerate(df.columns.values):
-                    worksheet.write(0, col_num, str(value), fmt_header)
-                    width = 40 if "inadmisibilidad" in str(value).lower() else 25
-                    worksheet.set_column(col_num, col_num, width, fmt_body)
+            # F. EXCEL (hoja consolidada)
+            with trazas.tramo("export", formato="xlsx", filas=len(filas)) as tramo:
+                buffer = construir_excel_matriz(filas)
+                tramo["bytes"] = buffer.getbuffer().nbytes
 
             st.divider()
-            filename = f"Reporte_Cortex_24P_{datos_finales.get('1. ID', 'General')}.xlsx"
+            if len(filas) == 1:
+                filename = f"Reporte_Cortex_24P_{filas[0].get('1. ID', 'General')}.xlsx"
+            else:
+                filename = f"Reporte_Cortex_24P_Lote_{len(filas)}.xlsx"
             st.download_button(
                 label="📥 DESCARGAR REPORTE",
                 data=buffer,
@@ -289,14 +408,11 @@ if uploaded_file is not None:
                 mime="application/vnd.ms-excel"
             )
             
-            # === AUTO-LIMPIEZA ===
-            if archivo_gemini:
-                archivo_gemini.delete()
-            os.remove(tmp_path)
-            
             time.sleep(4)
             robot_spot.markdown('<div class="robot-container robot-zen">🤖</div>', unsafe_allow_html=True)
 
         except Exception as e:
             st.error(f"❌ Error en el proceso: {e}")
             robot_spot.markdown('<div class="robot-container robot-zen">😵</div>', unsafe_allow_html=True)
+
+registrar_rerun("cortex", t_rerun, archivos=len(uploaded_files or []))
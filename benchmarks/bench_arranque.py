@@ -0,0 +1,120 @@
+"""Benchmark de arranque: costo de import de cada módulo y tiempo de la primera pantalla y de un rerun de cada app.
+
+Cada medición corre en un proceso nuevo (imports en frío, como tras un deploy):
+- import: segundos de importar cada módulo con Streamlit ya cargado (como en
+  el servidor), y qué módulos pesados arrastra lo que las apps importan antes
+  de su primera pantalla (debe quedar vacío);
+- apps: con AppTest y sin precarga en segundo plano, la primera ejecución
+  (login de Cortex, pantalla de carga de Analytics), un rerun en caliente y,
+  en Analytics, la ejecución que procesa el primer archivo (ahí se pagan los
+  imports pesados). Incluye el resumen de las etapas "import" y "rerun".
+
+El resultado es JSON para comparar corridas (ver también bench_suite).
+
+Uso (desde la raíz del repo):
+    python -m benchmarks.bench_arranque --salida arranque.json
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PESADOS = ("numpy", "pandas", "pyarrow", "google.generativeai", "google.api_core", "grpc", "pypdf", "xlsxwriter")
+ANTES_DE_LA_PANTALLA = ("cortex_arranque", "cortex_cache", "cortex_cuota", "cortex_gemini", "cortex_trazas")
+MODULOS = PESADOS + (
+    "cortex_extraccion", "cortex_indice", "cortex_archivos", "cortex_datos", "cortex_bodega", "cortex_radar",
+    "cortex_cubo", "cortex_export", "cortex_render", "cortex_sandbox", "cortex_columnar",
+)
+
+
+def _en_proceso_nuevo(*argumentos):
+    """Corre este módulo en un intérprete nuevo y retorna el JSON que imprime."""
+    salida = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_arranque", *argumentos],
+        cwd=RAIZ, capture_output=True, text=True, check=True,
+    )
+    return json.loads(salida.stdout.strip().splitlines()[-1])
+
+
+def medir_import(modulos):
+    import importlib
+
+    import streamlit  # noqa: F401  (el servidor ya lo tiene cargado al ejecutar las apps)
+
+    t0 = time.perf_counter()
+    for modulo in modulos:
+        importlib.import_module(modulo)
+    return {"segundos": time.perf_counter() - t0, "pesados": [m for m in PESADOS if m in sys.modules]}
+
+
+def medir_app(app, filas):
+    from streamlit.testing.v1 import AppTest
+
+    from cortex_trazas import trazador
+
+    medicion = {}
+    at = AppTest.from_file(os.path.join(RAIZ, f"app_{app}.py"), default_timeout=300)
+    at.secrets["GEMINI_API_KEY"] = at.secrets["GOOGLE_API_KEY"] = "falsa"
+    at.secrets["PASSWORD_ACCESO"] = "clave"
+    t0 = time.perf_counter()
+    at.run()
+    medicion["primera_pantalla_s"] = time.perf_counter() - t0
+    medicion["pesados_en_primera_pantalla"] = [m for m in PESADOS if m in sys.modules]
+    t0 = time.perf_counter()
+    at.run()
+    medicion["rerun_s"] = time.perf_counter() - t0
+    if app == "analytics" and filas:
+        from benchmarks.sintetico import generar_oc
+
+        contenido = io.BytesIO()
+        generar_oc(filas).to_csv(contenido, index=False)
+        at.sidebar.file_uploader[0].set_value(("reporte.csv", contenido.getvalue(), "text/csv"))
+        t0 = time.perf_counter()
+        at.run()
+        medicion["primer_archivo_s"] = time.perf_counter() - t0
+        medicion["filas"] = filas
+    medicion["errores"] = [str(e.value) for e in at.exception] + [str(e.value) for e in at.error]
+    medicion["trazas"] = [r for r in trazador().resumen() if r["etapa"] in ("import", "rerun")]
+    return medicion
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--filas", type=int, default=20_000, help="filas del CSV del primer archivo de Analytics (0 lo omite)")
+    parser.add_argument("--salida", help="archivo JSON de resultados (por defecto, stdout)")
+    parser.add_argument("--importar", nargs="+", help=argparse.SUPPRESS)
+    parser.add_argument("--app", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    # Modo hijo: una sola medición en este proceso, el JSON en la última línea
+    if args.importar or args.app:
+        medicion = medir_import(args.importar) if args.importar else medir_app(args.app, args.filas)
+        print(json.dumps(medicion, ensure_ascii=False, default=str))
+        return
+
+    with tempfile.TemporaryDirectory() as cache:
+        # Sin precarga: se mide lo que cada pantalla importa por sí misma, sin ensuciar .cortex_cache
+        os.environ.update({"CORTEX_PRECARGA": "0", "CORTEX_CACHE_DIR": cache, "CORTEX_TRAZAS_DIR": ""})
+        informe = {
+            "entorno": {"python": platform.python_version(), "plataforma": platform.platform(), "cpus": os.cpu_count()},
+            "import": {modulo: _en_proceso_nuevo("--importar", modulo)["segundos"] for modulo in MODULOS},
+            "antes_de_la_pantalla": _en_proceso_nuevo("--importar", *ANTES_DE_LA_PANTALLA),
+            "apps": {app: _en_proceso_nuevo("--app", app, "--filas", str(args.filas)) for app in ("cortex", "analytics")},
+        }
+    texto = json.dumps(informe, ensure_ascii=False, indent=2, default=str)
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            f.write(texto)
+    else:
+        print(texto)
+
+
+if __name__ == "__main__":
+    main()
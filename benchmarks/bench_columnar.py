@@ -0,0 +1,57 @@
+"""Benchmark: carga fría desde xlsx vs. reapertura tibia desde el almacén columnar.
+
+Uso (desde la raíz del repo):
+    python -m benchmarks.bench_columnar --filas 100000
+"""
+import argparse
+import io
+import tempfile
+import time
+
+from benchmarks.sintetico import generar_oc
+from cortex_columnar import AlmacenColumnar, clave_columnar
+from cortex_datos import cargar_y_sanear
+
+
+def generar_oc_xlsx(filas, columnas_relleno=50, semilla=0):
+    """Export OC sintético en xlsx, con columnas que el análisis no usa."""
+    buffer = io.BytesIO()
+    generar_oc(filas, columnas_relleno, semilla).to_excel(buffer, index=False)
+    return buffer.getvalue()
+
+
+def medir(funcion, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        resultado = funcion()
+        tiempos.append(time.perf_counter() - t0)
+    return min(tiempos), resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--filas", type=int, default=50_000)
+    parser.add_argument("--repeticiones", type=int, default=3)
+    args = parser.parse_args()
+
+    contenido = generar_oc_xlsx(args.filas)
+    print(f"xlsx sintético: {args.filas:,} filas, {len(contenido) / 1e6:.1f} MB")
+
+    frio, reporte = medir(lambda: cargar_y_sanear(contenido, "bench.xlsx"), 1)
+    with tempfile.TemporaryDirectory() as directorio:
+        almacen = AlmacenColumnar(directorio)
+        clave = clave_columnar("bench", reporte["tipo_reporte"])
+        t0 = time.perf_counter()
+        almacen.guardar(clave, reporte)
+        escritura = time.perf_counter() - t0
+        tibio, reabierto = medir(lambda: almacen.obtener(clave), args.repeticiones)
+
+    assert reabierto["df"].shape == reporte["df"].shape
+    print(f"carga fría (xlsx + saneamiento): {frio:8.3f} s")
+    print(f"escritura Arrow IPC:             {escritura:8.3f} s")
+    print(f"reapertura tibia (memory-map):   {tibio:8.3f} s  ({frio / tibio:,.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Benchmark: planificador de cuota con varios usuarios contra un modelo falso que responde 429.
+
+Simula usuarios concurrentes (uno con un lote grande, los demás con pocas
+consultas) y reporta rendimiento, reintentos, profundidad máxima de la cola
+y cuándo terminó cada usuario, con y sin planificador.
+
+Uso (desde la raíz del repo):
+    python -m benchmarks.bench_cuota --rpm 120 --rpm-api 150 --prob-429 0.05
+"""
+import argparse
+import collections
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.modelo_falso import ModeloFalso
+from cortex_cuota import PlanificadorCuota
+
+
+def correr(args, con_planificador):
+    ModeloFalso._llamadas.clear()
+    modelo = ModeloFalso(latencia_s=args.latencia, prob_429=args.prob_429, rpm_maximo=args.rpm_api)
+    plan = PlanificadorCuota(rpm=args.rpm, tpm=args.tpm, espera_base_s=0.5, espera_max_s=8)
+    cargas = {"lote": args.lote, **{f"usuario_{i}": args.consultas for i in range(args.usuarios)}}
+    fin, errores, max_cola = {}, collections.Counter(), [0]
+
+    def una(usuario):
+        try:
+            if con_planificador:
+                plan.llamar(lambda: modelo.generate_content(["consulta"]), 500, usuario=usuario)
+            else:
+                modelo.generate_content(["consulta"])
+        except Exception:
+            errores[usuario] += 1
+        fin[usuario] = time.perf_counter() - t0
+
+    def vigilar():
+        while not listo.is_set():
+            max_cola[0] = max(max_cola[0], plan.estadisticas()["en_cola"])
+            time.sleep(0.05)
+
+    listo = threading.Event()
+    threading.Thread(target=vigilar, daemon=True).start()
+    t0 = time.perf_counter()
+    # Un pool por usuario, como cada sesión de Streamlit con sus propios hilos
+    pools = {usuario: ThreadPoolExecutor(max_workers=args.hilos) for usuario in cargas}
+    for usuario, n in cargas.items():
+        for _ in range(n):
+            pools[usuario].submit(una, usuario)
+        if usuario == "lote":
+            time.sleep(0.1)  # el lote llega primero; los demás usuarios, un instante después
+    for pool in pools.values():
+        pool.shutdown(wait=True)
+    listo.set()
+    total = time.perf_counter() - t0
+    stats = plan.estadisticas()
+    return total, fin, errores, stats, max_cola[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rpm", type=int, default=120, help="presupuesto del planificador")
+    parser.add_argument("--tpm", type=int, default=1_000_000)
+    parser.add_argument("--rpm-api", type=int, default=150, help="RPM a partir del cual el modelo falso responde 429")
+    parser.add_argument("--prob-429", type=float, default=0.05)
+    parser.add_argument("--latencia", type=float, default=0.3)
+    parser.add_argument("--lote", type=int, default=120, help="llamadas del usuario con el lote grande")
+    parser.add_argument("--usuarios", type=int, default=3)
+    parser.add_argument("--consultas", type=int, default=5)
+    parser.add_argument("--hilos", type=int, default=8, help="hilos por usuario")
+    args = parser.parse_args()
+
+    for con_planificador in (False, True):
+        total, fin, errores, stats, max_cola = correr(args, con_planificador)
+        print(f"\n{'con' if con_planificador else 'sin'} planificador: {total:.1f} s")
+        print(f"  llamadas fallidas: {sum(errores.values())} · reintentos 429: {stats['reintentos_429']} · cola máxima: {max_cola}")
+        for usuario in sorted(fin):
+            print(f"  {usuario:<12} terminó a los {fin[usuario]:6.1f} s  (fallidas: {errores[usuario]})")
+
+
+if __name__ == "__main__":
+    main()
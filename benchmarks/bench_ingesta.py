@@ -0,0 +1,79 @@
+"""Benchmark: carga completa vs ingesta por tandas de un CSV de Órdenes de Compra (tiempo y memoria pico).
+
+"Completa" es `cargar_y_sanear` (el archivo y el DataFrame enteros en RAM);
+"tandas" es `ingerir_csv_por_tandas`, que solo conserva radar y totales. Cada
+modo corre en un proceso nuevo para que la memoria pico (VmHWM de Linux; el
+ru_maxrss se hereda del padre a través de exec) sea solo suya; también se
+informa la de un proceso que solo importa los módulos.
+
+Uso (desde la raíz del repo):
+    python -m benchmarks.bench_ingesta --filas 2000000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def memoria_pico_mb():
+    with open("/proc/self/status", encoding="ascii") as f:
+        return next(int(linea.split()[1]) for linea in f if linea.startswith("VmHWM:")) / 1024
+
+
+def medir(modo, ruta, filas_por_tanda):
+    from cortex_datos import cargar_y_sanear
+    from cortex_ingesta import ingerir_csv_por_tandas
+
+    t0 = time.perf_counter()
+    if modo == "completa":
+        with open(ruta, "rb") as f:
+            reporte = cargar_y_sanear(f.read(), os.path.basename(ruta))
+    elif modo == "tandas":
+        with open(ruta, "rb") as f:
+            reporte = ingerir_csv_por_tandas(f, os.path.basename(ruta), filas_por_tanda=filas_por_tanda)
+    else:
+        reporte = None
+    return {
+        "modo": modo,
+        "segundos": time.perf_counter() - t0,
+        "rss_pico_mb": memoria_pico_mb(),
+        "unicornios": len(reporte["unicornios_df"]) if reporte else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--filas", type=int, default=2_000_000)
+    parser.add_argument("--filas-por-tanda", type=int, default=200_000)
+    parser.add_argument("--medir", nargs=2, metavar=("MODO", "RUTA"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    # Modo hijo: una medición en este proceso, el JSON en la última línea
+    if args.medir:
+        print(json.dumps(medir(*args.medir, args.filas_por_tanda)))
+        return
+
+    from benchmarks.sintetico import generar_oc_sucia
+
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, "ordenes.csv")
+        generar_oc_sucia(args.filas).to_csv(ruta, index=False)
+        resultados = []
+        for modo in ("solo_imports", "completa", "tandas"):
+            salida = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_ingesta", "--medir", modo, ruta,
+                 "--filas-por-tanda", str(args.filas_por_tanda)],
+                cwd=RAIZ, capture_output=True, text=True, check=True,
+            )
+            resultados.append(json.loads(salida.stdout.strip().splitlines()[-1]))
+        informe = {"filas": args.filas, "mb_archivo": os.path.getsize(ruta) / 1e6, "resultados": resultados}
+    print(json.dumps(informe, indent=2))
+
+
+if __name__ == "__main__":
+    main()
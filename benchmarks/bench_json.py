@@ -0,0 +1,77 @@
+"""Benchmark: reparación regex + ast sobre la respuesta completa vs. lector JSON incremental.
+
+Mide el costo de parseo de una respuesta Matriz 24 (válida y con los defectos
+habituales: dict de Python, coma final, claves sin comillas, comillas simples
+con saltos de línea, cortada), cuántos campos recupera cada camino y,
+simulando un stream de Gemini a velocidad fija, cuándo queda disponible el
+primer campo en cada caso.
+
+Uso (desde la raíz del repo):
+    python -m benchmarks.bench_json --repeticiones 2000 --caracteres-por-s 400
+"""
+import argparse
+import json
+import time
+
+from cortex_extraccion import MAPA_COLUMNAS, limpiar_y_reparar_json
+from cortex_json import LectorJsonIncremental, leer_json_completo
+
+
+def respuestas():
+    campos = {c: f"Según bases, punto {i}: texto de \"ejemplo\" con\nsaltos y montos $1.500.000." for i, c in enumerate(MAPA_COLUMNAS)}
+    valida = "```json\n" + json.dumps(campos, ensure_ascii=False, indent=2) + "\n```"
+    en_una_linea = {c: v.replace("\n", " ") for c, v in campos.items()}
+    # Estilo dict de Python: json.loads falla y la reparación cae en ast.literal_eval
+    estilo_python = "Aquí está la matriz:\n" + repr(en_una_linea)
+    # Coma final tras el último campo: json.loads falla, ast.literal_eval la acepta
+    coma_final = json.dumps(en_una_linea, ensure_ascii=False, indent=2)[:-2] + ",\n}"
+    # Claves sin comillas (estilo JS) y comillas simples con saltos de línea: ni json ni ast
+    claves_libres = "{\n" + "".join(f"  {c}: {json.dumps(v, ensure_ascii=False)},\n" for c, v in en_una_linea.items()) + "}"
+    simples_multilinea = "{" + ", ".join(f"'{c}': '{v}'" for c, v in campos.items()) + "}"
+    # Cortada a mitad del último valor (límite de tokens de salida)
+    cortada = valida[:valida.rfind('"c24"') + 30]
+    return {
+        "json válido": (valida, len(campos)),
+        "dict python": (estilo_python, len(campos)),
+        "coma final": (coma_final, len(campos)),
+        "claves sin comillas": (claves_libres, len(campos)),
+        "comillas simples multilínea": (simples_multilinea, len(campos)),
+        "cortada": (cortada, len(campos)),
+    }
+
+
+def medir(funcion, texto, repeticiones):
+    t0 = time.perf_counter()
+    for _ in range(repeticiones):
+        funcion(texto)
+    return (time.perf_counter() - t0) / repeticiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeticiones", type=int, default=2000)
+    parser.add_argument("--caracteres-por-s", type=float, default=400.0, help="velocidad simulada del stream")
+    parser.add_argument("--pedazo", type=int, default=40, help="caracteres por pedazo del stream")
+    args = parser.parse_args()
+
+    for nombre, (texto, esperados) in respuestas().items():
+        assert len(leer_json_completo(texto)) == esperados, nombre
+        campos_regex_ast = len(limpiar_y_reparar_json(texto))
+        regex_ast = medir(limpiar_y_reparar_json, texto, args.repeticiones)
+        incremental = medir(leer_json_completo, texto, args.repeticiones)
+
+        lector = LectorJsonIncremental()
+        primer = None
+        for i in range(0, len(texto), args.pedazo):
+            if lector.alimentar(texto[i:i + args.pedazo]) and primer is None:
+                primer = (i + args.pedazo) / args.caracteres_por_s
+        completo = len(texto) / args.caracteres_por_s
+
+        print(f"{nombre}:")
+        print(f"  parseo regex + ast:      {regex_ast * 1e6:8.1f} µs ({campos_regex_ast}/{esperados} campos)")
+        print(f"  parseo lector:           {incremental * 1e6:8.1f} µs ({esperados}/{esperados} campos)")
+        print(f"  primer campo (simulado): {completo:6.2f} s → {primer:6.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Benchmark: payload y tiempo de render de la tabla del radar y de un gráfico, antes y después de paginar/reducir.
+
+"Antes" es lo que hacía la app: la tabla completa con un Styler de moneda y
+la serie completa al gráfico. "Después" es una página formateada y la serie
+reducida. Los bytes son los del mensaje Arrow que Streamlit envía al navegador.
+
+Uso (desde la raíz del repo):
+    python -m benchmarks.bench_render --filas 80000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+from streamlit.elements.arrow import marshall
+from streamlit.proto.ArrowData_pb2 import ArrowData
+
+from cortex_render import filtrar_y_ordenar, formatear_moneda, medir_payload, pagina, reducir_para_grafico
+
+
+def enviado(datos):
+    """(bytes del mensaje, segundos en armarlo) como lo hace st.dataframe."""
+    t0 = time.perf_counter()
+    proto = ArrowData()
+    marshall(proto, datos, default_uuid="bench")
+    return len(proto.SerializeToString()), time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--filas", type=int, default=80_000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    radar = pd.DataFrame({
+        "ID": np.arange(args.filas).astype(str),
+        "Proveedor": rng.choice(["Alfa SpA", "Beta Ltda", "Gamma EIRL"], args.filas),
+        "Monto": rng.random(args.filas) * 1e7,
+    })
+    pd.set_option("styler.render.max_elements", radar.size)
+    antes, t_antes = enviado(radar.sort_values("Monto", ascending=False).style.format({"Monto": "${:,.0f}"}))
+    t0 = time.perf_counter()
+    filas, _ = pagina(filtrar_y_ordenar(radar, None, "Monto", False), 1)
+    despues, t_despues = enviado(formatear_moneda(filas, ["Monto"]))
+    t_despues += time.perf_counter() - t0
+    print(f"tabla radar ({args.filas:,} filas)")
+    print(f"  antes (Styler completo):  {antes / 1e6:8.2f} MB  {t_antes:8.3f} s")
+    print(f"  después (una página):     {despues / 1e3:8.2f} KB  {t_despues:8.3f} s")
+
+    serie = pd.DataFrame({
+        "Fecha": pd.date_range("2020-01-01", periods=args.filas, freq="min"),
+        "Monto": rng.random(args.filas).cumsum(),
+    })
+    t0 = time.perf_counter()
+    reducida = reducir_para_grafico(serie, "Fecha")
+    t_reducir = time.perf_counter() - t0
+    print(f"gráfico de línea ({args.filas:,} puntos → {len(reducida):,})")
+    print(f"  antes:   {medir_payload(serie.set_index('Fecha')) / 1e6:8.2f} MB")
+    print(f"  después: {medir_payload(reducida) / 1e3:8.2f} KB  (reducción {t_reducir:.3f} s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Benchmark: copia profunda por consulta vs. vista copy-on-write con varias sesiones simultáneas.
+
+Uso (desde la raíz del repo):
+    python -m benchmarks.bench_sandbox --filas 300000 --sesiones 8
+"""
+import argparse
+import statistics
+import threading
+import time
+import tracemalloc
+
+from benchmarks.sintetico import generar_oc
+from cortex_datos import cargar_y_sanear
+from cortex_sandbox import activar_copy_on_write, ejecutar_codigo, preparar_scope
+
+# Código representativo de lo que genera Gemini para el catálogo
+CONSULTAS = [
+    "resultado = df.groupby(PROV_COL, observed=True)[MONT_COL].sum().sort_values(ascending=False).head(5)",
+    "top_org = df.groupby(COMP_COL, observed=True)[MONT_COL].sum().idxmax()\n"
+    "resultado = df[df[COMP_COL] == top_org][[ID_COL, COMP_COL, PROV_COL, MONT_COL]].drop_duplicates()",
+    "df['Mes'] = df[FECHA_COL].dt.to_period('M')\nresultado = df.groupby('Mes')[MONT_COL].sum()",
+]
+
+def correr_sesiones(reporte, sesiones, consultas_por_sesion, copiar):
+    columnas = {k: reporte[k] for k in ("MONT_COL", "PROV_COL", "COMP_COL", "ID_COL", "FECHA_COL", "COLS_PROD")}
+    latencias = []
+    lock = threading.Lock()
+
+    def sesion():
+        for i in range(consultas_por_sesion):
+            t0 = time.perf_counter()
+            scope = preparar_scope(reporte["df"], columnas)
+            if copiar:
+                scope["df"] = reporte["df"].copy()
+            ejecutar_codigo(CONSULTAS[i % len(CONSULTAS)], scope)
+            with lock:
+                latencias.append(time.perf_counter() - t0)
+
+    tracemalloc.start()
+    hilos = [threading.Thread(target=sesion) for _ in range(sesiones)]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    latencias.sort()
+    return statistics.median(latencias), latencias[int(0.95 * (len(latencias) - 1))], pico
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--filas", type=int, default=300_000)
+    parser.add_argument("--sesiones", type=int, default=8)
+    parser.add_argument("--consultas", type=int, default=6, help="consultas por sesión")
+    args = parser.parse_args()
+
+    activar_copy_on_write()
+    reporte = cargar_y_sanear(generar_oc(args.filas).to_csv(index=False).encode("utf-8"), "bench.csv")
+    base = reporte["df"].memory_usage(deep=True).sum() / 1e6
+    print(f"reporte: {args.filas:,} filas, {base:.1f} MB · {args.sesiones} sesiones x {args.consultas} consultas")
+
+    for nombre, copiar in (("copia profunda", True), ("vista copy-on-write", False)):
+        p50, p95, pico = correr_sesiones(reporte, args.sesiones, args.consultas, copiar)
+        print(f"{nombre:20s} p50 {p50 * 1000:8.1f} ms  p95 {p95 * 1000:8.1f} ms  pico asignado {pico / 1e6:8.1f} MB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Benchmark: extracción Matriz 24 con documento completo vs. solo secciones relevantes.
+
+Compara, por documento, latencia, tamaño del payload enviado y concordancia de
+los 24 campos contra la corrida con el documento completo (que hace de referencia).
+
+Uso (desde la raíz del repo):
+    python -m benchmarks.bench_secciones --corpus carpeta_con_pdfs
+    python -m benchmarks.bench_secciones --sinteticos 5 --paginas 150
+    python -m benchmarks.bench_secciones --corpus carpeta_con_pdfs --solo-local
+
+Sin --solo-local se llama a Gemini: requiere GOOGLE_API_KEY en el entorno.
+"""
+import argparse
+import os
+import time
+
+import google.generativeai as genai
+
+from benchmarks.sintetico import generar_bases_pdf
+from cortex_extraccion import MAPA_COLUMNAS, MODO_COMPLETO, MODO_SECCIONES, extraer_matriz_detallada
+from cortex_paginas import normalizar_texto, preparar_payload
+
+
+def cargar_corpus(args):
+    if args.corpus:
+        nombres = sorted(n for n in os.listdir(args.corpus) if n.lower().endswith(".pdf"))
+        for nombre in nombres:
+            with open(os.path.join(args.corpus, nombre), "rb") as f:
+                yield nombre, f.read()
+    else:
+        for i in range(args.sinteticos):
+            yield f"sintetico_{i}.pdf", generar_bases_pdf(args.paginas, semilla=i)
+
+
+def _tokens(valor):
+    return set(normalizar_texto(str(valor)).split())
+
+
+def concordancia(referencia, candidato):
+    """(campos idénticos tras normalizar, similitud Jaccard promedio de tokens) sobre c01..c24."""
+    identicos, jaccard = 0, 0.0
+    for clave in MAPA_COLUMNAS:
+        a, b = _tokens(referencia.get(clave, "")), _tokens(candidato.get(clave, ""))
+        identicos += a == b
+        jaccard += len(a & b) / len(a | b) if a | b else 1.0
+    return identicos, jaccard / len(MAPA_COLUMNAS)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus", help="carpeta con PDFs de bases reales")
+    parser.add_argument("--sinteticos", type=int, default=3, help="documentos sintéticos si no hay --corpus")
+    parser.add_argument("--paginas", type=int, default=120, help="páginas de cada documento sintético")
+    parser.add_argument("--solo-local", action="store_true", help="solo pre-procesamiento, sin llamar a Gemini")
+    args = parser.parse_args()
+
+    if not args.solo_local:
+        genai.configure(api_key=os.environ["GOOGLE_API_KEY"])
+
+    print(f"{'documento':<32} {'págs':>5} {'env.':>5} {'pdf KB':>8} {'texto KB':>9} {'prep s':>7}"
+          + ("" if args.solo_local else f" {'compl. s':>9} {'secc. s':>8} {'modo':>10} {'=campos':>8} {'jaccard':>8}"))
+    totales = {"pdf": 0, "payload": 0, "completo": 0.0, "secciones": 0.0, "identicos": 0, "docs": 0}
+    for nombre, pdf_bytes in cargar_corpus(args):
+        t0 = time.perf_counter()
+        payload = preparar_payload(pdf_bytes)
+        preparacion = time.perf_counter() - t0
+        bytes_payload = payload["bytes_payload"] if payload else len(pdf_bytes)
+        enviadas = len(payload["paginas_enviadas"]) if payload else "todo"
+        paginas = payload["paginas_totales"] if payload else "?"
+        fila = (f"{nombre[:32]:<32} {paginas:>5} {enviadas:>5} {len(pdf_bytes) / 1024:>8.1f} "
+                f"{bytes_payload / 1024:>9.1f} {preparacion:>7.2f}")
+        totales["pdf"] += len(pdf_bytes)
+        totales["payload"] += bytes_payload
+        totales["docs"] += 1
+
+        if not args.solo_local:
+            t0 = time.perf_counter()
+            referencia, _ = extraer_matriz_detallada(pdf_bytes, modo=MODO_COMPLETO)
+            t_completo = time.perf_counter() - t0
+            t0 = time.perf_counter()
+            recortado, detalle = extraer_matriz_detallada(pdf_bytes, modo=MODO_SECCIONES)
+            t_secciones = time.perf_counter() - t0
+            identicos, jaccard = concordancia(referencia, recortado)
+            fila += f" {t_completo:>9.1f} {t_secciones:>8.1f} {detalle['modo']:>10} {identicos:>5}/24 {jaccard:>8.2f}"
+            totales["completo"] += t_completo
+            totales["secciones"] += t_secciones
+            totales["identicos"] += identicos
+        print(fila)
+
+    if not totales["docs"]:
+        print("Corpus vacío.")
+        return
+    print(f"\npayload total: {totales['pdf'] / 1e6:.2f} MB → {totales['payload'] / 1e6:.2f} MB "
+          f"({100 * (1 - totales['payload'] / totales['pdf']):.0f}% menos)")
+    if not args.solo_local:
+        print(f"latencia total: {totales['completo']:.1f} s → {totales['secciones']:.1f} s · "
+              f"campos idénticos: {100 * totales['identicos'] / (24 * totales['docs']):.0f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""Suite de benchmarks offline: etapas de analytics por tipo de reporte y tamaño, más la extracción de Cortex.
+
+Genera reportes sintéticos (Licitaciones, Compras Ágiles, Órdenes de Compra,
+Convenio Marco) con montos sucios y fechas mezcladas, y mide por separado:
+ingesta, saneamiento, radar, cubo, ejecución de una consulta del chat (con un
+modelo falso, sin red) y exportación a xlsx, CSV y Parquet. Luego mide la
+extracción Matriz 24 de punta a punta sobre bases PDF sintéticas, también con
+el modelo falso.
+
+El resultado es JSON (una entrada por etapa) para comparar corridas.
+
+Uso (desde la raíz del repo):
+    python -m benchmarks.bench_suite --tamanos 10000 100000 --salida resultados.json
+    python -m benchmarks.bench_suite --tamanos 10000 100000 1000000 5000000 --tipos "Órdenes de Compra"
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import sys
+import time
+
+import google.generativeai as genai
+import pandas as pd
+
+from benchmarks import modelo_falso
+from benchmarks.sintetico import GENERADORES, generar_bases_pdf
+from cortex_cubo import construir_cubo
+from cortex_datos import (COLUMNAS_VALOR_POR_TIPO, calcular_radar, columnas_requeridas, compactar_tipos,
+                          detectar_tipo_reporte, leer_archivo, leer_encabezados, sanear_y_mapear)
+from cortex_export import FORMATOS, exportar
+from cortex_extraccion import (MODO_COMPLETO, MODO_SECCIONES, construir_excel_matriz, extraer_matriz_detallada,
+                               mapear_fila)
+from cortex_sandbox import ejecutar_codigo, preparar_scope
+from cortex_trazas import trazador
+
+MAX_FILAS_EXCEL = 1_048_575
+PREGUNTA_CHAT = "¿Cuáles son los 5 proveedores que más dinero mueven?"
+
+
+def medir(resultados, etapa, funcion, **contexto):
+    t0 = time.perf_counter()
+    salida = funcion()
+    segundos = time.perf_counter() - t0
+    resultados.append({"etapa": etapa, "segundos": round(segundos, 4), **contexto})
+    print(f"  {etapa:<32} {segundos:9.3f} s", file=sys.stderr)
+    return salida
+
+
+def serializar(df, formato):
+    if formato == "xlsx":
+        buffer = io.BytesIO()
+        df.to_excel(buffer, index=False, engine="xlsxwriter")
+        return buffer.getvalue(), "bench.xlsx"
+    return df.to_csv(index=False).encode("utf-8"), "bench.csv"
+
+
+def bench_reporte(resultados, tipo, filas, formato):
+    contexto = {"tipo": tipo, "filas": filas, "formato": formato}
+    if formato == "xlsx" and filas > MAX_FILAS_EXCEL:
+        formato = "csv"  # Excel no admite más filas; el export real a esta escala es CSV
+        contexto["formato"] = formato
+    contenido, nombre = serializar(GENERADORES[tipo](filas), formato)
+    contexto["bytes"] = len(contenido)
+    print(f"{tipo} · {filas:,} filas · {formato} · {len(contenido) / 1e6:.1f} MB", file=sys.stderr)
+
+    def ingesta():
+        encabezados = leer_encabezados(contenido, nombre)
+        tipo_detectado = detectar_tipo_reporte(encabezados)
+        columnas = columnas_requeridas(tipo_detectado, encabezados)
+        return tipo_detectado, leer_archivo(contenido, nombre, columnas=columnas, tipo_reporte=tipo_detectado)
+
+    tipo_detectado, df = medir(resultados, "ingesta", ingesta, **contexto)
+    assert tipo_detectado == tipo, (tipo_detectado, tipo)
+
+    def saneamiento():
+        limpio, col_map, cols_prod = sanear_y_mapear(df, tipo)
+        protegidas = set(COLUMNAS_VALOR_POR_TIPO.get(tipo, [])) | {"Monto_Total_Estimado"}
+        return compactar_tipos(limpio, protegidas), col_map, cols_prod
+
+    df, col_map, cols_prod = medir(resultados, "saneamiento", saneamiento, **contexto)
+    columnas = {
+        "MONT_COL": col_map.get("MONTO_REAL"), "PROV_COL": col_map.get("PROVEEDOR_CLAVE"),
+        "COMP_COL": col_map.get("COMPRADOR_CLAVE"), "ID_COL": col_map.get("ID_CLAVE"),
+        "FECHA_COL": col_map.get("FECHA_CLAVE"), "COLS_PROD": [c for c in cols_prod if c in df.columns],
+    }
+
+    unicornios, baja = medir(resultados, "radar", lambda: calcular_radar(df, columnas["ID_COL"], columnas["PROV_COL"]), **contexto)
+    medir(resultados, "cubo", lambda: construir_cubo(df, columnas), **contexto)
+
+    def chat():
+        modelo = genai.GenerativeModel("falso")
+        respuesta = modelo.generate_content(["instrucciones", PREGUNTA_CHAT])
+        codigo = respuesta.text.replace("```python", "").replace("```", "").strip()
+        return ejecutar_codigo(codigo, preparar_scope(df, columnas))
+
+    medir(resultados, "chat_exec", chat, **contexto)
+
+    for formato_export in FORMATOS:
+        def exportacion():
+            with exportar({"Unicornios": unicornios, "Baja_Competencia": baja} if formato_export == "xlsx" else unicornios,
+                          formato_export) as archivo:
+                return archivo.seek(0, io.SEEK_END)
+
+        filas_exportadas = len(unicornios) + len(baja) if formato_export == "xlsx" else len(unicornios)
+        medir(resultados, f"export_{formato_export}", exportacion, **contexto, filas_exportadas=filas_exportadas)
+
+
+def bench_extraccion(resultados, documentos, paginas):
+    pdfs = [generar_bases_pdf(paginas, semilla=i) for i in range(documentos)]
+    print(f"Extracción Matriz 24 · {documentos} bases de {paginas} páginas", file=sys.stderr)
+    for modo in (MODO_COMPLETO, MODO_SECCIONES):
+        for fragmentado in (False, True):
+            def extraer():
+                filas = []
+                for pdf_bytes in pdfs:
+                    datos_raw, _ = extraer_matriz_detallada(pdf_bytes, modo=modo, fragmentado=fragmentado)
+                    filas.append(mapear_fila(datos_raw))
+                return construir_excel_matriz(filas)
+
+            etapa = f"extraccion_{modo}" + ("_fragmentada" if fragmentado else "")
+            medir(resultados, etapa, extraer, documentos=documentos, paginas=paginas)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tamanos", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--tipos", nargs="+", default=list(GENERADORES), choices=list(GENERADORES))
+    parser.add_argument("--formato", choices=["csv", "xlsx"], default="csv")
+    parser.add_argument("--documentos", type=int, default=3, help="bases PDF para la extracción (0 la omite)")
+    parser.add_argument("--paginas", type=int, default=120)
+    parser.add_argument("--latencia-modelo", type=float, default=0.0, help="segundos por respuesta del modelo falso")
+    parser.add_argument("--salida", help="archivo JSON de resultados (por defecto, stdout)")
+    args = parser.parse_args()
+
+    modelo_falso.instalar(genai, latencia_s=args.latencia_modelo)
+    # Sin red no hay cuota que cuidar: que el planificador no frene la medición
+    os.environ.setdefault("CORTEX_RPM", str(10 ** 9))
+    os.environ.setdefault("CORTEX_TPM", str(10 ** 12))
+    # Las trazas por etapa quedan en el informe, no en el JSONL de la app
+    os.environ.setdefault("CORTEX_TRAZAS_DIR", "")
+    resultados = []
+    for filas in args.tamanos:
+        for tipo in args.tipos:
+            bench_reporte(resultados, tipo, filas, args.formato)
+    if args.documentos:
+        bench_extraccion(resultados, args.documentos, args.paginas)
+
+    informe = {
+        "entorno": {
+            "python": platform.python_version(), "pandas": pd.__version__,
+            "plataforma": platform.platform(), "cpus": os.cpu_count(),
+            "latencia_modelo_s": args.latencia_modelo,
+        },
+        "resultados": resultados,
+        "trazas": trazador().resumen(),
+    }
+    texto = json.dumps(informe, ensure_ascii=False, indent=2)
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            f.write(texto)
+    else:
+        print(texto)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Modelo Gemini falso para correr benchmarks y ensayos sin red ni cuota.
+
+Imita la parte de `genai.GenerativeModel` que usa Cortex: `generate_content`
+(con y sin `stream=True`) y `usage_metadata`. Tiene latencia configurable y
+responde 429 (`ResourceExhausted`) con una probabilidad dada o al superar un
+RPM propio, como lo haría la API real.
+"""
+import collections
+import json
+import random
+import threading
+import time
+
+from google.api_core.exceptions import ResourceExhausted
+
+from cortex_extraccion import MAPA_COLUMNAS
+
+CODIGO_POR_DEFECTO = "resultado = df.groupby(PROV_COL, observed=True)[MONT_COL].sum().sort_values(ascending=False).head(5)"
+
+
+class _Uso:
+    def __init__(self, entrada, salida):
+        self.prompt_token_count = entrada
+        self.candidates_token_count = salida
+        self.total_token_count = entrada + salida
+
+
+class _Respuesta:
+    def __init__(self, texto, entrada, salida=0):
+        self.text = texto
+        self.usage_metadata = _Uso(entrada, salida)
+
+
+class _RespuestaStream(_Respuesta):
+    def __init__(self, texto, entrada, salida, latencia_pedazo_s, tamano_pedazo=40):
+        super().__init__(texto, entrada, salida)
+        self._pedazos = [texto[i:i + tamano_pedazo] for i in range(0, len(texto), tamano_pedazo)]
+        self._latencia = latencia_pedazo_s
+
+    def __iter__(self):
+        for pedazo in self._pedazos:
+            time.sleep(self._latencia)
+            yield _Respuesta(pedazo, 0)
+
+
+class ModeloFalso:
+    """Sustituto de `genai.GenerativeModel`; las instancias comparten el contador de RPM."""
+
+    _llamadas = collections.deque()
+    _lock = threading.Lock()
+
+    def __init__(self, nombre="falso", latencia_s=0.5, prob_429=0.0, rpm_maximo=None, codigo=CODIGO_POR_DEFECTO, **_):
+        self.nombre = nombre
+        self.latencia_s = latencia_s
+        self.prob_429 = prob_429
+        self.rpm_maximo = rpm_maximo
+        self.codigo = codigo
+
+    def _responder(self, partes):
+        prompt = next((p for p in partes if isinstance(p, str)), "")
+        claves = [c for c in MAPA_COLUMNAS if f'"{c}"' in prompt]
+        if claves:
+            return "```json\n" + json.dumps({c: f"Dato sintético {c}" for c in claves}, ensure_ascii=False) + "\n```"
+        return f"```python\n{self.codigo}\n```"
+
+    def generate_content(self, partes, stream=False, **_):
+        ahora = time.monotonic()
+        with self._lock:
+            while self._llamadas and ahora - self._llamadas[0] >= 60:
+                self._llamadas.popleft()
+            saturado = self.rpm_maximo is not None and len(self._llamadas) >= self.rpm_maximo
+            self._llamadas.append(ahora)
+        if saturado or random.random() < self.prob_429:
+            raise ResourceExhausted("429 Resource has been exhausted (e.g. check quota).")
+
+        texto = self._responder(partes)
+        entrada = sum(len(p) for p in partes if isinstance(p, str)) // 4
+        salida = len(texto) // 4
+        if stream:
+            pedazos = max(1, len(texto) // 40)
+            return _RespuestaStream(texto, entrada, salida, self.latencia_s / pedazos)
+        time.sleep(self.latencia_s)
+        return _Respuesta(texto, entrada, salida)
+
+
+class ArchivoFalso:
+    def __init__(self, nombre):
+        self.name = nombre
+
+    def delete(self):
+        pass
+
+
+def instalar(genai, **opciones):
+    """Reemplaza en `genai` el modelo, la subida de archivos y `configure` por los falsos."""
+    contador = iter(range(10 ** 9))
+    genai.configure = lambda **_: None
+    genai.upload_file = lambda *_, **__: ArchivoFalso(f"files/falso-{next(contador)}")
+    genai.GenerativeModel = lambda nombre="falso", **kw: ModeloFalso(nombre, **{**opciones, **kw})
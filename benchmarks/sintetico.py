@@ -0,0 +1,197 @@
+"""Generadores de exports sintéticos de Mercado Público para los benchmarks."""
+import numpy as np
+import pandas as pd
+
+
+def generar_oc(filas, columnas_relleno=0, semilla=0):
+    """Export sintético de Órdenes de Compra con montos sucios en formato chileno."""
+    rng = np.random.default_rng(semilla)
+    df = pd.DataFrame({
+        "Codigo": [f"OC-{i // 3}" for i in range(filas)],
+        "NombreProvider": rng.choice([f"Proveedor {i}" for i in range(500)], filas),
+        "NombreUnidad": rng.choice([f"Hospital {i}" for i in range(200)], filas),
+        "TotalLinea": [f"${m:,}".replace(",", ".") for m in rng.integers(1_000, 10_000_000, filas)],
+        "FechaAceptacion": pd.Series(pd.date_range("2024-01-01", periods=filas, freq="min")).dt.strftime("%d-%m-%Y %H:%M"),
+        "Producto": rng.choice(["Paracetamol", "Ibuprofeno", "Amoxicilina", "Omeprazol"], filas),
+        "EspecificacionProveedor": "caja x 10",
+    })
+    for i in range(columnas_relleno):
+        df[f"Columna Relleno {i}"] = f"valor {i}"
+    return df
+
+
+# ==========================================
+# REPORTES SINTÉTICOS POR TIPO (MONTOS SUCIOS, FECHAS MEZCLADAS)
+# ==========================================
+# Para escalar a millones de filas, los textos se arman una vez sobre un pool
+# de valores distintos y luego se eligen por índice (sin formatear fila a fila).
+
+TAMANO_POOL = 50_000
+
+
+def _montos_sucios(rng, filas, minimo=1_000, maximo=10_000_000):
+    """Montos en formato chileno mezclados con US, sin separador, vacíos y basura."""
+    valores = rng.integers(minimo, maximo, TAMANO_POOL)
+    chilenos = [f"${v:,}".replace(",", ".") for v in valores]
+    pool = np.array(
+        chilenos[: TAMANO_POOL * 7 // 10]
+        + [f"{v}" for v in valores[TAMANO_POOL * 7 // 10: TAMANO_POOL * 9 // 10]]
+        + [f" {v:,}.50 " for v in valores[TAMANO_POOL * 9 // 10:]]
+        + ["", "N/A", "-"],
+        dtype=object,
+    )
+    return pool[rng.integers(0, len(pool), filas)]
+
+
+def _fechas_mezcladas(rng, filas, inicio="2022-01-01", dias=1_000):
+    """Fechas en dd-mm-aaaa (mayoría), dd/mm/aaaa hh:mm, ISO y algunas vacías."""
+    base = pd.Timestamp(inicio) + pd.to_timedelta(rng.integers(0, dias * 24 * 60, TAMANO_POOL), unit="min")
+    pool = np.concatenate([
+        base[: TAMANO_POOL * 8 // 10].strftime("%d-%m-%Y"),
+        base[TAMANO_POOL * 8 // 10: TAMANO_POOL * 9 // 10].strftime("%d/%m/%Y %H:%M"),
+        base[TAMANO_POOL * 9 // 10:].strftime("%Y-%m-%d"),
+        ["", "sin fecha"],
+    ]).astype(object)
+    return pool[rng.integers(0, len(pool), filas)]
+
+
+def _elegir(rng, prefijo, cantidad, filas):
+    pool = np.array([f"{prefijo} {i}" for i in range(cantidad)], dtype=object)
+    return pool[rng.integers(0, cantidad, filas)]
+
+
+def _ids(prefijo, filas, lineas_por_id=3):
+    pool = np.array([f"{prefijo}-{i}" for i in range(filas // lineas_por_id + 1)], dtype=object)
+    return pool[np.arange(filas) // lineas_por_id]
+
+
+def _competidores(rng, prefijo, cantidad, filas, lineas_por_id=3):
+    """Proveedores por línea con 1, 2 o 3 competidores por negocio (para que el radar encuentre algo)."""
+    negocio, linea = np.divmod(np.arange(filas), lineas_por_id)
+    negocios = filas // lineas_por_id + 1
+    base = rng.integers(0, cantidad, negocios)[negocio]
+    competidores = rng.choice([1, 2, 3], size=negocios, p=[0.3, 0.3, 0.4])[negocio]
+    pool = np.array([f"{prefijo} {i}" for i in range(cantidad)], dtype=object)
+    return pool[(base + linea % competidores) % cantidad]
+
+
+def generar_licitaciones(filas, semilla=0, estado="Estado Licitación"):
+    """Export sintético de Licitaciones (o Compras Ágiles, cambiando la columna de estado)."""
+    rng = np.random.default_rng(semilla)
+    return pd.DataFrame({
+        "CodigoExterno": _ids("1057-LE24", filas),
+        estado: rng.choice(np.array(["Adjudicada", "Cerrada", "Desierta"], dtype=object), filas),
+        "Nombre Proveedor": _competidores(rng, "Proveedor", 2_000, filas),
+        "Nombre Organismo": _elegir(rng, "Servicio de Salud", 300, filas),
+        "Nombre Producto": _elegir(rng, "Producto", 5_000, filas),
+        "Descripcion Producto": _elegir(rng, "Presentación", 200, filas),
+        "Cantidad Adjudicada": _montos_sucios(rng, filas, 1, 5_000),
+        "Monto Unitario": _montos_sucios(rng, filas, 100, 500_000),
+        "Fecha Adjudicación": _fechas_mezcladas(rng, filas),
+    })
+
+
+def generar_compras_agiles(filas, semilla=0):
+    return generar_licitaciones(filas, semilla, estado="Estado Compra Ágil")
+
+
+def generar_oc_sucia(filas, semilla=0):
+    """Como `generar_oc`, pero con montos y fechas mezclados y escalable a millones de filas."""
+    rng = np.random.default_rng(semilla)
+    return pd.DataFrame({
+        "Codigo": _ids("OC", filas),
+        "NombreProvider": _competidores(rng, "Proveedor", 2_000, filas),
+        "NombreUnidad": _elegir(rng, "Hospital", 500, filas),
+        "TotalLinea": _montos_sucios(rng, filas),
+        "FechaAceptacion": _fechas_mezcladas(rng, filas),
+        "Producto": _elegir(rng, "Producto", 5_000, filas),
+        "EspecificacionProveedor": _elegir(rng, "caja x", 50, filas),
+    })
+
+
+def generar_convenio_marco(filas, semilla=0):
+    rng = np.random.default_rng(semilla)
+    return pd.DataFrame({
+        "ID Producto": _ids("CM", filas, lineas_por_id=4),
+        "Empresa": _competidores(rng, "Empresa", 800, filas, lineas_por_id=4),
+        "Región": _elegir(rng, "Región", 16, filas),
+        "Nombre Producto": _elegir(rng, "Producto", 5_000, filas),
+        "Formato": _elegir(rng, "Formato", 30, filas),
+        "Precio Oferta": _montos_sucios(rng, filas, 500, 2_000_000),
+        "Precio sin oferta": _montos_sucios(rng, filas, 500, 2_000_000),
+        "Fecha Lectura": _fechas_mezcladas(rng, filas),
+    })
+
+
+GENERADORES = {
+    "Licitaciones": generar_licitaciones,
+    "Compras Ágiles": generar_compras_agiles,
+    "Órdenes de Compra": generar_oc_sucia,
+    "Convenio Marco": generar_convenio_marco,
+}
+
+
+# ==========================================
+# BASES DE LICITACIÓN SINTÉTICAS (PDF)
+# ==========================================
+_SECCIONES_BASES = [
+    ("1. CRONOGRAMA Y PLAZOS", "Fecha de cierre de preguntas: {d}-03-2025. Cierre de ofertas: {d}-04-2025 15:00. "
+     "Plazo de entrega: 5 días hábiles; en caso de emergencia 24 horas. Duración del contrato: 24 meses."),
+    ("2. GARANTÍAS", "Boleta de garantía de seriedad de la oferta por ${m}.000. Glosa: Para garantizar la seriedad "
+     "de la oferta de la licitación ID {id}. Garantía de fiel cumplimiento del 5% del contrato."),
+    ("3. REQUISITOS ADMINISTRATIVOS Y TÉCNICOS", "Inscripción en el Registro de Proveedores. Oferta técnica con "
+     "ficha de cada producto. Se solicita formato de experiencia: SI."),
+    ("4. CAUSALES DE INADMISIBILIDAD", "Será declarada inadmisible la oferta que no presente el Anexo N°1, "
+     "Anexo N°2 o que oferte productos con vencimiento menor a 12 meses."),
+    ("5. EVALUACIÓN DE OFERTAS", "Criterios: precio 60%, plazo de entrega 20%, experiencia 20%. La comisión "
+     "evaluadora asignará puntaje según la pauta."),
+    ("6. MULTAS Y SANCIONES", "Atraso en la entrega: multa de 1 UF por día. Incumplimiento reiterado: término "
+     "anticipado del contrato."),
+]
+
+
+def _pdf(paginas):
+    """PDF mínimo (Helvetica, WinAnsi) con una lista de líneas por página."""
+    objetos = ["<< /Type /Catalog /Pages 2 0 R >>", None,
+               "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>"]
+    hijos = []
+    for lineas in paginas:
+        texto = "".join(
+            "({}) Tj T*\n".format(l.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")) for l in lineas
+        )
+        flujo = f"BT /F1 9 Tf 11 TL 40 800 Td\n{texto}ET".encode("cp1252", "replace")
+        objetos.append(b"<< /Length %d >>\nstream\n" % len(flujo) + flujo + b"\nendstream")
+        objetos.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objetos)} 0 R >>")
+        hijos.append(f"{len(objetos)} 0 R")
+    objetos[1] = f"<< /Type /Pages /Kids [{' '.join(hijos)}] /Count {len(hijos)} >>"
+
+    salida = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for i, obj in enumerate(objetos, start=1):
+        offsets.append(len(salida))
+        cuerpo = obj if isinstance(obj, bytes) else obj.encode("latin-1")
+        salida += b"%d 0 obj\n" % i + cuerpo + b"\nendobj\n"
+    xref = len(salida)
+    salida += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objetos) + 1)
+    salida += b"".join(b"%010d 00000 n \n" % o for o in offsets)
+    salida += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objetos) + 1, xref)
+    return bytes(salida)
+
+
+def generar_bases_pdf(paginas=120, semilla=0):
+    """Bases sintéticas: portada, 6 secciones con los campos y el resto anexos de relleno."""
+    rng = np.random.default_rng(semilla)
+    id_licitacion = f"{rng.integers(1000, 9999)}-{rng.integers(1, 200)}-LE25"
+    relleno = "Especificación técnica del ítem, presentación comercial, condiciones de despacho y rotulado. " * 4
+    contenido = [["BASES ADMINISTRATIVAS", f"LICITACIÓN PÚBLICA ID {id_licitacion}",
+                  "Adquisición de medicamentos para la red asistencial. Presupuesto disponible: $120.000.000."]]
+    posiciones = sorted(rng.choice(range(2, paginas), size=len(_SECCIONES_BASES), replace=False))
+    for n in range(1, paginas):
+        if n in posiciones:
+            titulo, cuerpo = _SECCIONES_BASES[posiciones.index(n)]
+            cuerpo = cuerpo.format(d=rng.integers(10, 28), m=rng.integers(100, 900), id=id_licitacion)
+            contenido.append([titulo] + [cuerpo[i:i + 100] for i in range(0, len(cuerpo), 100)])
+        else:
+            contenido.append([f"ANEXO TÉCNICO - HOJA {n}"] + [relleno[i:i + 100] for i in range(0, len(relleno), 100)])
+    return _pdf(contenido)
@@ -0,0 +1,166 @@
+import hashlib
+import io
+import threading
+import time
+
+from cortex_gemini import cliente
+
+# ==========================================
+# ARCHIVOS SUBIDOS A GEMINI (UNA SUBIDA POR CONTENIDO)
+# ==========================================
+# Cada re-ejecución, reintento o grupo de la extracción fragmentada necesitaba
+# subir de nuevo el mismo PDF. Aquí cada contenido (sha256) se sube una sola
+# vez, directo desde memoria (sin archivo temporal), y el handle se reutiliza
+# mientras no venza. Gemini borra los archivos a las 48 h; el TTL local es menor.
+#
+# Un handle se borra en Gemini cuando: vence, una llamada muestra que ya no
+# sirve (no existe, sin permiso: así responde Gemini a un archivo vencido),
+# se expulsa por el límite de bytes, su última sesión cierra sesión, o el
+# proceso termina. Otros errores (cuota, timeout, respuesta mal formada) no
+# tocan el handle: puede estar en uso por otras sesiones. Si otra sesión
+# todavía lo usa, invalidarlo solo lo saca del mapa (el próximo pedido sube
+# de nuevo) y el archivo en Gemini se deja a su vencimiento.
+
+TTL_ARCHIVO_S = 40 * 3600
+MAX_BYTES_SUBIDOS = 2 * 1024 * 1024 * 1024
+
+
+def es_subida_invalida(error):
+    """True si el error muestra que el archivo subido ya no sirve (404 o 403 del API).
+
+    Como en cortex_cuota, se reconoce por nombre de clase y código sin importar google.api_core.
+    """
+    clases = {c.__name__ for c in type(error).__mro__}
+    return bool(clases & {"NotFound", "PermissionDenied"}) or getattr(error, "code", None) in (403, 404)
+
+
+class GestorArchivosGemini:
+    """Handles de Gemini por huella de contenido, con TTL, tope de bytes y dueños por sesión."""
+
+    def __init__(self, ttl_s=TTL_ARCHIVO_S, max_bytes=MAX_BYTES_SUBIDOS):
+        self.ttl_s = ttl_s
+        self.max_bytes = max_bytes
+        self.subidas = 0
+        self.reutilizados = 0
+        self._handles = {}   # huella → {"archivo", "bytes", "creado", "usado", "duenos"}
+        # huella → Lock: dos hilos con el mismo PDF suben una sola vez. No se borran al borrar el
+        # handle: un hilo que espera el candado viejo y otro con uno nuevo subirían los dos
+        self._subiendo = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def huella(pdf_bytes):
+        return hashlib.sha256(pdf_bytes).hexdigest()
+
+    def obtener(self, pdf_bytes, dueno=None):
+        """Handle del PDF en Gemini; lo sube solo si no hay uno vigente."""
+        huella = self.huella(pdf_bytes)
+        self.purgar_vencidos()
+        with self._lock:
+            candado = self._subiendo.setdefault(huella, threading.Lock())
+        with candado:
+            with self._lock:
+                entrada = self._handles.get(huella)
+                if entrada is not None:
+                    entrada["usado"] = time.time()
+                    if dueno is not None:
+                        entrada["duenos"].add(dueno)
+                    self.reutilizados += 1
+                    return entrada["archivo"]
+
+            archivo = cliente().upload_file(
+                io.BytesIO(pdf_bytes), mime_type="application/pdf", display_name=f"cortex-{huella[:12]}.pdf"
+            )
+            ahora = time.time()
+            with self._lock:
+                self._handles[huella] = {
+                    "archivo": archivo, "bytes": len(pdf_bytes), "creado": ahora, "usado": ahora,
+                    "duenos": {dueno} if dueno is not None else set(),
+                }
+                self.subidas += 1
+        self._expulsar(conservar=huella)
+        return archivo
+
+    def invalidar(self, pdf_bytes, archivo=None, dueno=None):
+        """Retira el handle tras un error de `es_subida_invalida`: el próximo pedido sube de nuevo.
+
+        Si `archivo` ya no es el handle vigente (otro hilo volvió a subir) no hace nada. El
+        archivo se borra en Gemini solo si ninguna otra sesión lo usa.
+        """
+        huella = self.huella(pdf_bytes)
+        with self._lock:
+            entrada = self._handles.get(huella)
+            if entrada is None or (archivo is not None and entrada["archivo"] is not archivo):
+                return
+            entrada["duenos"].discard(dueno)
+            if entrada["duenos"]:
+                del self._handles[huella]
+                return
+        self._borrar([huella])
+
+    def purgar_vencidos(self):
+        limite = time.time() - self.ttl_s
+        with self._lock:
+            vencidos = [h for h, e in self._handles.items() if e["creado"] < limite]
+        self._borrar(vencidos)
+
+    def liberar_dueno(self, dueno):
+        """Cierre de sesión: borra los handles que solo usaba esa sesión."""
+        with self._lock:
+            huerfanos = []
+            for huella, entrada in self._handles.items():
+                entrada["duenos"].discard(dueno)
+                if not entrada["duenos"]:
+                    huerfanos.append(huella)
+        self._borrar(huerfanos)
+
+    def cerrar(self):
+        with self._lock:
+            todos = list(self._handles)
+        self._borrar(todos)
+
+    def _expulsar(self, conservar):
+        with self._lock:
+            total = sum(e["bytes"] for e in self._handles.values())
+            sobrantes = []
+            for huella, entrada in sorted(self._handles.items(), key=lambda item: item[1]["usado"]):
+                if total <= self.max_bytes:
+                    break
+                if huella != conservar:
+                    sobrantes.append(huella)
+                    total -= entrada["bytes"]
+        self._borrar(sobrantes)
+
+    def _borrar(self, huellas):
+        with self._lock:
+            entradas = [self._handles.pop(h) for h in huellas if h in self._handles]
+        for entrada in entradas:
+            try:
+                entrada["archivo"].delete()
+            except Exception:
+                pass  # ya vencido o borrado en Gemini
+
+    def pendientes(self):
+        """Handles vivos en Gemini: nombre, bytes, edad en segundos y sesiones que los usan."""
+        ahora = time.time()
+        with self._lock:
+            return [
+                {"nombre": e["archivo"].name, "bytes": e["bytes"], "edad_s": ahora - e["creado"], "sesiones": len(e["duenos"])}
+                for e in self._handles.values()
+            ]
+
+    def de_sesion(self, dueno):
+        """Vista del gestor para una sesión de Streamlit (lo que recibe la extracción)."""
+        return ArchivosSesion(self, dueno)
+
+
+class ArchivosSesion:
+    def __init__(self, gestor, dueno):
+        self.gestor = gestor
+        self.dueno = dueno
+
+    def obtener(self, pdf_bytes):
+        return self.gestor.obtener(pdf_bytes, self.dueno)
+
+    def invalidar(self, pdf_bytes, archivo=None):
+        self.gestor.invalidar(pdf_bytes, archivo, self.dueno)
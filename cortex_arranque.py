@@ -0,0 +1,58 @@
+import importlib
+import os
+import sys
+import threading
+import time
+
+from cortex_trazas import trazador
+
+# ==========================================
+# ARRANQUE LIVIANO: IMPORTS PESADOS EN SEGUNDO PLANO Y PERFIL POR RERUN
+# ==========================================
+# pandas, pyarrow, pypdf y el SDK de Gemini suman más de un segundo de import
+# en frío. Las apps ya no los importan antes de dibujar el login o la pantalla
+# de carga: los piden recién cuando hay un archivo. Mientras tanto, `precargar`
+# los importa en un hilo daemon (una vez por proceso), así el primer archivo
+# casi nunca espera. Cada import queda en la etapa "import" de las trazas y
+# cada ejecución del script en la etapa "rerun" (con `frio` en la primera del
+# proceso), para que el panel de latencias muestre cualquier regresión.
+# CORTEX_PRECARGA=0 desactiva la precarga (benchmarks de arranque).
+
+_lock = threading.Lock()
+_precargados = {}   # módulo → hilo que lo importa
+_apps_vistas = set()
+
+
+def _importar(modulos):
+    for nombre in modulos:
+        if nombre in sys.modules:
+            continue
+        try:
+            with trazador().tramo("import", modulo=nombre):
+                importlib.import_module(nombre)
+        except ImportError:
+            # Una dependencia opcional que falta no impide precargar las demás
+            continue
+
+
+def precargar(modulos):
+    """Importa en un hilo daemon los módulos que aún no se pidieron; retorna el hilo (o None)."""
+    if os.environ.get("CORTEX_PRECARGA", "1") == "0":
+        return None
+    with _lock:
+        nuevos = [m for m in modulos if m not in _precargados and m not in sys.modules]
+        if not nuevos:
+            return None
+        hilo = threading.Thread(target=_importar, args=(nuevos,), name="cortex-precarga", daemon=True)
+        for nombre in nuevos:
+            _precargados[nombre] = hilo
+    hilo.start()
+    return hilo
+
+
+def registrar_rerun(app, t0, **atributos):
+    """Tramo "rerun": segundos desde `t0` hasta aquí; la primera ejecución de `app` en el proceso va con frio=True."""
+    with _lock:
+        frio = app not in _apps_vistas
+        _apps_vistas.add(app)
+    trazador().registrar("rerun", time.perf_counter() - t0, {"app": app, "frio": frio, **atributos})
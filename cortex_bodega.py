@@ -0,0 +1,273 @@
+import json
+import os
+import re
+import threading
+import unicodedata
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from pandas.util import hash_pandas_object
+
+from cortex_cubo import construir_cubo
+from cortex_datos import COLUMNAS_VALOR_POR_TIPO, calcular_radar, compactar_tipos
+
+# ==========================================
+# BODEGA HISTÓRICA (PARQUET PARTICIONADO POR TIPO Y MES)
+# ==========================================
+# Cada reporte subido se agrega a una bodega local que sobrevive entre
+# sesiones, para analizar varios meses o años sin volver a subir archivos.
+#
+# Estructura: <directorio>/<tipo>/periodo=AAAA-MM/parte-<huella>.parquet + <tipo>/meta.json
+#
+# - La fila se identifica por ID_COL + línea (n-ésima aparición del ID en el
+#   archivo); re-subir un export o uno que se solapa con otro no duplica filas,
+#   aunque entre un export y otro la fecha de la fila cambie de mes (se busca
+#   en todas las particiones del tipo y queda la primera versión guardada).
+# - Agregar es incremental: solo se escribe un archivo nuevo por período con
+#   las filas que faltaban; lo ya guardado no se reescribe.
+# - Las consultas filtran por período (particiones) y por fecha (estadísticas
+#   de cada row group) dentro de Arrow, y `agregar` agrupa en Arrow: a pandas
+#   solo llega el rango pedido o el resultado ya agregado.
+# - `reporte` sí carga el rango completo en memoria (el chat necesita las
+#   filas): antes cuenta las filas del rango y rechaza los que superan
+#   MAX_FILAS_REPORTE (CORTEX_BODEGA_MAX_FILAS) en vez de arriesgar el servidor.
+
+CLAVE_FILA = "_clave_fila"
+PERIODO = "periodo"
+SIN_FECHA = "sin_fecha"
+CAMPOS_META = ("tipo_reporte", "encabezados", "col_map_final", "MONT_COL", "PROV_COL", "COMP_COL", "ID_COL", "FECHA_COL",
+               "COLS_PROD")
+MAX_FILAS_REPORTE = int(os.environ.get("CORTEX_BODEGA_MAX_FILAS", 5_000_000))
+
+
+class RangoDemasiadoGrande(ValueError):
+    """El rango pedido a `Bodega.reporte` tiene más filas de las que se cargan en memoria."""
+
+    def __init__(self, filas, maximo):
+        super().__init__(f"El rango tiene {filas:,} filas y el máximo para analizar en memoria es {maximo:,}.")
+        self.filas = filas
+        self.maximo = maximo
+
+
+def _slug(tipo_reporte):
+    sin_tildes = unicodedata.normalize('NFKD', tipo_reporte).encode('ascii', 'ignore').decode()
+    return re.sub(r'[^a-z0-9]+', '_', sin_tildes.lower()).strip('_')
+
+
+def _mes(fecha):
+    return pd.Timestamp(fecha).strftime("%Y-%m")
+
+
+def claves_de_fila(df, ID_COL):
+    """Huella de ID + línea por fila; sin ID, la huella es la de la fila completa."""
+    if not ID_COL or ID_COL not in df.columns:
+        return hash_pandas_object(df, index=False).to_numpy()
+    linea = df.groupby(ID_COL, observed=True, sort=False).cumcount()
+    claves = hash_pandas_object(pd.DataFrame({"id": df[ID_COL], "linea": linea}), index=False).to_numpy()
+    sin_id = df[ID_COL].isna().to_numpy()
+    if sin_id.any():
+        claves[sin_id] = hash_pandas_object(df[sin_id], index=False).to_numpy()
+    return claves
+
+
+def _a_arrow(df):
+    """Tabla Arrow sin categorías (Parquet ya codifica por diccionario) ni columnas de tipos mezclados."""
+    columnas = {}
+    for col in df.columns:
+        serie = df[col]
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            serie = serie.astype(serie.cat.categories.dtype)
+        elif pd.api.types.is_object_dtype(serie) and pd.api.types.infer_dtype(serie, skipna=True) not in ("string", "empty"):
+            serie = serie.where(serie.isna(), serie.astype(str))
+        columnas[col] = serie
+    return pa.Table.from_pandas(pd.DataFrame(columnas), preserve_index=False)
+
+
+class Bodega:
+    """Reportes saneados acumulados en Parquet, por tipo de reporte y mes."""
+
+    def __init__(self, directorio):
+        self.directorio = directorio
+        self._lock = threading.Lock()
+        os.makedirs(directorio, exist_ok=True)
+
+    def _ruta(self, tipo_reporte):
+        return os.path.join(self.directorio, _slug(tipo_reporte))
+
+    def meta(self, tipo_reporte):
+        try:
+            with open(os.path.join(self._ruta(tipo_reporte), "meta.json"), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _guardar_meta(self, tipo_reporte, meta):
+        ruta = os.path.join(self._ruta(tipo_reporte), "meta.json")
+        tmp = f"{ruta}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(tmp, ruta)
+
+    def contiene(self, tipo_reporte, huella):
+        meta = self.meta(tipo_reporte)
+        return meta is not None and huella in meta["archivos"]
+
+    def ingerir(self, reporte, huella, nombre=""):
+        """Agrega las filas nuevas del reporte; retorna {"filas_nuevas", "duplicadas", "periodos"}."""
+        tipo_reporte = reporte["tipo_reporte"]
+        with self._lock:
+            meta = self.meta(tipo_reporte) or {"archivos": {}, "periodos": {}, "version": 0}
+            if huella in meta["archivos"]:
+                return {"filas_nuevas": 0, "duplicadas": 0, "periodos": []}
+
+            df = reporte["df"]
+            FECHA_COL = reporte.get("FECHA_COL")
+            if FECHA_COL and FECHA_COL in df.columns:
+                # AAAAMM como entero (strftime por fila es lo más caro de ingerir); -1 = sin fecha
+                fechas = df[FECHA_COL]
+                meses = (fechas.dt.year * 100 + fechas.dt.month).fillna(-1).astype("int64").to_numpy()
+            else:
+                meses = np.full(len(df), -1, dtype=np.int64)
+            claves = claves_de_fila(df, reporte.get("ID_COL"))
+            tabla = _a_arrow(df).append_column(CLAVE_FILA, pa.array(claves, type=pa.uint64()))
+            ya_guardadas = pd.Series(claves).isin(self._claves_guardadas(tipo_reporte, claves)).to_numpy()
+
+            nuevas_total, duplicadas, periodos = 0, 0, []
+            for mes in np.unique(meses):
+                periodo = SIN_FECHA if mes < 0 else f"{mes // 100:04d}-{mes % 100:02d}"
+                periodos.append(periodo)
+                filas = np.flatnonzero(meses == mes)
+                en_periodo = len(filas)
+                filas = filas[~ya_guardadas[filas]]
+                duplicadas += en_periodo - len(filas)
+                if not len(filas):
+                    continue
+                carpeta = os.path.join(self._ruta(tipo_reporte), f"{PERIODO}={periodo}")
+                os.makedirs(carpeta, exist_ok=True)
+                destino = os.path.join(carpeta, f"parte-{huella[:16]}.parquet")
+                pq.write_table(tabla.take(filas), f"{destino}.tmp", row_group_size=128 * 1024)
+                os.replace(f"{destino}.tmp", destino)
+                meta["periodos"][periodo] = meta["periodos"].get(periodo, 0) + len(filas)
+                nuevas_total += len(filas)
+
+            meta.update({campo: reporte.get(campo) for campo in CAMPOS_META})
+            meta["archivos"][huella] = {"nombre": nombre, "filas": len(df), "filas_nuevas": nuevas_total}
+            meta["version"] += 1
+            self._guardar_meta(tipo_reporte, meta)
+        return {"filas_nuevas": nuevas_total, "duplicadas": duplicadas, "periodos": periodos}
+
+    def _claves_guardadas(self, tipo_reporte, claves):
+        """Las `claves` que ya están en alguna partición del tipo (el filtro corre en Arrow)."""
+        if not os.path.isdir(self._ruta(tipo_reporte)):
+            return np.empty(0, dtype=np.uint64)
+        dataset = self._dataset(tipo_reporte)
+        if dataset is None:
+            return np.empty(0, dtype=np.uint64)
+        buscadas = pa.array(pd.unique(claves), type=pa.uint64())
+        tabla = dataset.to_table(columns=[CLAVE_FILA], filter=ds.field(CLAVE_FILA).isin(buscadas))
+        return tabla[CLAVE_FILA].to_numpy()
+
+    def _dataset(self, tipo_reporte):
+        ruta = self._ruta(tipo_reporte)
+        descubierto = ds.dataset(ruta, format="parquet", partitioning="hive", exclude_invalid_files=True)
+        # Archivos de distintos meses pueden diferir en columnas o en ancho numérico: esquema unificado
+        esquemas = [fragmento.physical_schema for fragmento in descubierto.get_fragments()]
+        if not esquemas:
+            return None
+        esquema = pa.unify_schemas(esquemas, promote_options="permissive").append(pa.field(PERIODO, pa.string()))
+        return ds.dataset(ruta, format="parquet", partitioning=ds.partitioning(pa.schema([(PERIODO, pa.string())]), flavor="hive"),
+                          schema=esquema, exclude_invalid_files=True)
+
+    def _filtro(self, meta, desde, hasta):
+        """Filtro Arrow del rango de fechas: poda particiones por mes y filas por FECHA_COL."""
+        filtro = None
+        FECHA_COL = meta.get("FECHA_COL")
+        if desde is not None:
+            filtro = ds.field(PERIODO) >= _mes(desde)
+            if FECHA_COL:
+                filtro &= ds.field(FECHA_COL) >= pa.scalar(pd.Timestamp(desde), type=pa.timestamp("ns"))
+        if hasta is not None:
+            fin = pd.Timestamp(hasta) + pd.Timedelta(days=1)
+            condicion = ds.field(PERIODO) <= _mes(hasta)
+            if FECHA_COL:
+                condicion &= ds.field(FECHA_COL) < pa.scalar(fin, type=pa.timestamp("ns"))
+            filtro = condicion if filtro is None else filtro & condicion
+        return filtro
+
+    def consultar(self, tipo_reporte, desde=None, hasta=None, columnas=None):
+        """Filas del rango [desde, hasta] (fechas inclusive) como DataFrame; `columnas` limita la lectura."""
+        meta = self.meta(tipo_reporte)
+        dataset = self._dataset(tipo_reporte) if meta else None
+        if dataset is None:
+            return None
+        if columnas is None:
+            columnas = [c for c in dataset.schema.names if c not in (CLAVE_FILA, PERIODO)]
+        return dataset.to_table(columns=columnas, filter=self._filtro(meta, desde, hasta)).to_pandas()
+
+    def contar(self, tipo_reporte, desde=None, hasta=None):
+        """Filas del rango, sin cargarlas (solo se lee la columna de fecha de las particiones del rango)."""
+        meta = self.meta(tipo_reporte)
+        dataset = self._dataset(tipo_reporte) if meta else None
+        if dataset is None:
+            return 0
+        return dataset.count_rows(filter=self._filtro(meta, desde, hasta))
+
+    def agregar(self, tipo_reporte, por, desde=None, hasta=None):
+        """Filas y monto total agrupados por `por` (columna o "periodo"), calculados dentro de Arrow."""
+        meta = self.meta(tipo_reporte)
+        dataset = self._dataset(tipo_reporte) if meta else None
+        if dataset is None:
+            return None
+        MONT_COL = meta.get("MONT_COL")
+        columnas = [por] + ([MONT_COL] if MONT_COL else [])
+        tabla = dataset.to_table(columns=columnas, filter=self._filtro(meta, desde, hasta))
+        agregados = [(por, "count")] + ([(MONT_COL, "sum")] if MONT_COL else [])
+        resultado = tabla.group_by(por).aggregate(agregados).to_pandas()
+        resultado = resultado.rename(columns={f"{por}_count": "Registros", f"{MONT_COL}_sum": "Monto_Total"})
+        return resultado.sort_values(por).reset_index(drop=True)
+
+    def rango_fechas(self, tipo_reporte):
+        """(primera, última) fecha guardada, leída solo de la columna de fecha."""
+        meta = self.meta(tipo_reporte)
+        dataset = self._dataset(tipo_reporte) if meta else None
+        if dataset is None or not meta.get("FECHA_COL"):
+            return None
+        extremos = pc.min_max(dataset.to_table(columns=[meta["FECHA_COL"]])[meta["FECHA_COL"]]).as_py()
+        if extremos["min"] is None:
+            return None
+        return pd.Timestamp(extremos["min"]).date(), pd.Timestamp(extremos["max"]).date()
+
+    def clave_rango(self, tipo_reporte, desde=None, hasta=None):
+        """Clave de caché del reporte de un rango; cambia con cada archivo ingerido."""
+        meta = self.meta(tipo_reporte) or {"version": 0}
+        extremos = "-".join(pd.Timestamp(f).strftime("%Y%m%d") if f is not None else "x" for f in (desde, hasta))
+        return f"bodega_{_slug(tipo_reporte)}_v{meta['version']}_{extremos}"
+
+    def reporte(self, tipo_reporte, desde=None, hasta=None, max_filas=None):
+        """Reporte del rango con la misma forma que `cargar_y_sanear` (df, radar, cubo y columnas clave).
+
+        Lanza RangoDemasiadoGrande si el rango supera `max_filas` (por defecto MAX_FILAS_REPORTE).
+        """
+        meta = self.meta(tipo_reporte)
+        maximo = MAX_FILAS_REPORTE if max_filas is None else max_filas
+        filas = self.contar(tipo_reporte, desde, hasta)
+        if filas > maximo:
+            raise RangoDemasiadoGrande(filas, maximo)
+        df = self.consultar(tipo_reporte, desde, hasta)
+        if df is None:
+            return None
+        memoria_antes = int(df.memory_usage(deep=True).sum())
+        protegidas = set(COLUMNAS_VALOR_POR_TIPO.get(tipo_reporte, [])) | {'Monto_Total_Estimado'}
+        df = compactar_tipos(df, protegidas)
+        reporte = {campo: meta.get(campo) for campo in CAMPOS_META}
+        reporte["COLS_PROD"] = [c for c in meta.get("COLS_PROD") or [] if c in df.columns]
+        reporte.update(df=df, unicornios_df=None, baja_comp_df=None, memoria_antes=memoria_antes,
+                       memoria_despues=int(df.memory_usage(deep=True).sum()))
+        if reporte["ID_COL"] and reporte["PROV_COL"]:
+            reporte["unicornios_df"], reporte["baja_comp_df"] = calcular_radar(df, reporte["ID_COL"], reporte["PROV_COL"])
+        reporte["cubo"] = construir_cubo(df, {k: reporte[k] for k in ("MONT_COL", "PROV_COL", "COMP_COL", "ID_COL", "FECHA_COL", "COLS_PROD")})
+        return reporte
@@ -0,0 +1,147 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# ==========================================
+# CACHÉ PERSISTENTE EN DISCO (COMPARTIDA ENTRE SESIONES)
+# ==========================================
+# Un archivo JSON por clave. Las escrituras son atómicas (tmp + os.replace),
+# así que varias sesiones o procesos pueden compartir el mismo directorio.
+# El mtime de cada archivo hace de marca LRU: leer una entrada la "toca".
+
+class CacheDisco:
+    """Caché clave → valor JSON con expulsión por antigüedad y por tamaño total."""
+
+    def __init__(self, directorio, max_bytes=200 * 1024 * 1024, max_edad_s=30 * 24 * 3600):
+        self.directorio = directorio
+        self.max_bytes = max_bytes
+        self.max_edad_s = max_edad_s
+        self.aciertos = 0
+        self.fallos = 0
+        self._lock = threading.Lock()
+        os.makedirs(directorio, exist_ok=True)
+
+    def _ruta(self, clave):
+        return os.path.join(self.directorio, f"{clave}.json")
+
+    def obtener(self, clave):
+        ruta = self._ruta(clave)
+        try:
+            if time.time() - os.stat(ruta).st_mtime > self.max_edad_s:
+                self.invalidar(clave)
+                raise FileNotFoundError(ruta)
+            with open(ruta, "r", encoding="utf-8") as f:
+                valor = json.load(f)
+            os.utime(ruta)
+        except (OSError, ValueError):
+            with self._lock:
+                self.fallos += 1
+            return None
+        with self._lock:
+            self.aciertos += 1
+        return valor
+
+    def guardar(self, clave, valor):
+        ruta = self._ruta(clave)
+        tmp = f"{ruta}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(valor, f, ensure_ascii=False)
+        os.replace(tmp, ruta)
+        self._expulsar()
+
+    def invalidar(self, clave):
+        try:
+            os.remove(self._ruta(clave))
+        except OSError:
+            pass
+
+    def _entradas(self):
+        entradas = []
+        for nombre in os.listdir(self.directorio):
+            if not nombre.endswith(".json"):
+                continue
+            ruta = os.path.join(self.directorio, nombre)
+            try:
+                st = os.stat(ruta)
+            except OSError:
+                continue
+            entradas.append((st.st_mtime, st.st_size, ruta))
+        return entradas
+
+    def _expulsar(self):
+        ahora = time.time()
+        vigentes = []
+        for mtime, size, ruta in self._entradas():
+            if ahora - mtime > self.max_edad_s:
+                try: os.remove(ruta)
+                except OSError: pass
+            else:
+                vigentes.append((mtime, size, ruta))
+
+        total = sum(size for _, size, _ in vigentes)
+        for mtime, size, ruta in sorted(vigentes):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(ruta)
+                total -= size
+            except OSError:
+                pass
+
+    def estadisticas(self):
+        entradas = self._entradas()
+        return {
+            "entradas": len(entradas),
+            "bytes": sum(size for _, size, _ in entradas),
+            "aciertos": self.aciertos,
+            "fallos": self.fallos,
+        }
+
+
+# ==========================================
+# CACHÉ EN MEMORIA ACOTADA POR BYTES (LRU)
+# ==========================================
+# Pensada para vivir en `st.cache_resource`: los objetos se entregan tal
+# cual (sin copiar ni des-serializar), por eso quien los lee no debe mutarlos.
+
+class CacheMemoria:
+    """LRU en proceso cuyo límite es el tamaño medido de los valores, no la cantidad."""
+
+    def __init__(self, max_bytes, medidor):
+        self.max_bytes = max_bytes
+        self.medidor = medidor
+        self.aciertos = 0
+        self.fallos = 0
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obtener(self, clave):
+        with self._lock:
+            if clave not in self._datos:
+                self.fallos += 1
+                return None
+            self._datos.move_to_end(clave)
+            self.aciertos += 1
+            return self._datos[clave][0]
+
+    def guardar(self, clave, valor):
+        tam = self.medidor(valor)
+        with self._lock:
+            self._datos[clave] = (valor, tam)
+            self._datos.move_to_end(clave)
+            total = sum(t for _, t in self._datos.values())
+            # Nunca se expulsa la entrada recién guardada, aunque exceda el límite por sí sola
+            while total > self.max_bytes and len(self._datos) > 1:
+                _, (_, t) = self._datos.popitem(last=False)
+                total -= t
+
+    def estadisticas(self):
+        with self._lock:
+            return {
+                "entradas": len(self._datos),
+                "bytes": sum(t for _, t in self._datos.values()),
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+            }
@@ -0,0 +1,117 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import unicodedata
+
+import pyarrow as pa
+import pyarrow.ipc
+
+# ==========================================
+# ALMACÉN COLUMNAR (ARROW IPC) DE REPORTES SANEADOS
+# ==========================================
+# Parsear xlsx es lo más caro de abrir un reporte. Tras el primer saneamiento
+# el reporte se guarda como Arrow IPC sin compresión, que se reabre con
+# memory-map: un re-upload o un reinicio de la app no vuelven a tocar el Excel.
+#
+# Estructura: <directorio>/<clave>/{datos,unicornios,baja_comp,cubo_*}.arrow + meta.json
+
+MARCOS = {"df": "datos", "unicornios_df": "unicornios", "baja_comp_df": "baja_comp"}
+META = ("tipo_reporte", "encabezados", "col_map_final", "MONT_COL", "PROV_COL", "COMP_COL", "ID_COL", "FECHA_COL", "COLS_PROD",
+        "memoria_antes", "memoria_despues")
+
+
+def clave_columnar(huella, tipo_reporte, columnas_extra=()):
+    """Clave de entrada: hash del archivo + tipo de reporte + columnas extra pedidas."""
+    sin_tildes = unicodedata.normalize('NFKD', tipo_reporte).encode('ascii', 'ignore').decode()
+    tipo = re.sub(r'[^a-z0-9]+', '_', sin_tildes.lower()).strip('_')
+    extra = "|".join(sorted(columnas_extra))
+    sufijo = "_" + hashlib.sha256(extra.encode("utf-8")).hexdigest()[:8] if extra else ""
+    return f"{huella}_{tipo}{sufijo}"
+
+
+def _escribir_arrow(marco, ruta):
+    tabla = pa.Table.from_pandas(marco, preserve_index=True)
+    with pa.OSFile(ruta, "wb") as destino:
+        with pa.ipc.new_file(destino, tabla.schema) as escritor:
+            escritor.write_table(tabla)
+
+
+def _leer_arrow(ruta):
+    if not os.path.exists(ruta):
+        return None
+    # Sin `with`: las columnas numéricas pueden quedar apuntando al mapa en memoria
+    fuente = pa.memory_map(ruta, "r")
+    return pa.ipc.open_file(fuente).read_all().to_pandas()
+
+
+class AlmacenColumnar:
+    """Reportes saneados en Arrow IPC, con expulsión LRU por tamaño total en disco."""
+
+    def __init__(self, directorio, max_bytes=5 * 1024 * 1024 * 1024):
+        self.directorio = directorio
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(directorio, exist_ok=True)
+
+    def ruta_datos(self, clave):
+        """Ruta del Arrow IPC del DataFrame principal (la abren por memory-map los trabajadores)."""
+        return os.path.join(self.directorio, clave, "datos.arrow")
+
+    def obtener(self, clave):
+        ruta = os.path.join(self.directorio, clave)
+        try:
+            with open(os.path.join(ruta, "meta.json"), "r", encoding="utf-8") as f:
+                reporte = json.load(f)
+            for campo, archivo in MARCOS.items():
+                reporte[campo] = _leer_arrow(os.path.join(ruta, f"{archivo}.arrow"))
+            reporte["cubo"] = {
+                nombre: _leer_arrow(os.path.join(ruta, f"cubo_{nombre}.arrow")) for nombre in reporte.pop("cubo_dimensiones", [])
+            }
+            os.utime(ruta)
+        except (OSError, ValueError, pa.ArrowException):
+            return None
+        return reporte
+
+    def guardar(self, clave, reporte):
+        ruta = os.path.join(self.directorio, clave)
+        tmp = f"{ruta}.{os.getpid()}.{threading.get_ident()}.tmp"
+        os.makedirs(tmp, exist_ok=True)
+        try:
+            for campo, archivo in MARCOS.items():
+                if reporte.get(campo) is not None:
+                    _escribir_arrow(reporte[campo], os.path.join(tmp, f"{archivo}.arrow"))
+            cubo = reporte.get("cubo") or {}
+            for nombre, marco in cubo.items():
+                _escribir_arrow(marco, os.path.join(tmp, f"cubo_{nombre}.arrow"))
+            meta = {k: reporte.get(k) for k in META}
+            meta["cubo_dimensiones"] = list(cubo)
+            with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+                json.dump(meta, f, ensure_ascii=False)
+            with self._lock:
+                shutil.rmtree(ruta, ignore_errors=True)
+                os.replace(tmp, ruta)
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+        self._expulsar()
+
+    def _expulsar(self):
+        entradas = []
+        for nombre in os.listdir(self.directorio):
+            ruta = os.path.join(self.directorio, nombre)
+            if nombre.endswith(".tmp") or not os.path.isdir(ruta):
+                continue
+            try:
+                tam = sum(e.stat().st_size for e in os.scandir(ruta))
+                entradas.append((os.stat(ruta).st_mtime, tam, ruta))
+            except OSError:
+                continue
+        total = sum(tam for _, tam, _ in entradas)
+        # La entrada más reciente (la recién escrita) nunca se expulsa
+        for _, tam, ruta in sorted(entradas)[:-1]:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(ruta, ignore_errors=True)
+            total -= tam
@@ -0,0 +1,218 @@
+import re
+import unicodedata
+
+import pandas as pd
+
+# ==========================================
+# CUBO DE AGREGADOS PRE-CALCULADOS
+# ==========================================
+# La mayoría de las preguntas salen del Catálogo de Prompts Comerciales y son
+# agregados por proveedor, comprador, producto o fecha. Esos agregados se
+# calculan una sola vez al cargar el reporte; las preguntas del catálogo que
+# se pueden responder con ellos no pasan por Gemini ni por `exec`.
+# Cada dimensión guarda suma, registros, negocios únicos y min/max/promedio
+# del monto; la dimensión fecha es diaria y se re-agrega por mes al consultar.
+# Si el reporte trae cantidades (Licitaciones, Compras Ágiles) también se suman:
+# la tendencia de precios es monto / cantidad, no el monto promedio por línea.
+# Igual con las preguntas de precio (mínimo, máximo, promedio): salen del
+# precio unitario de cada línea; sin cantidades el monto de la línea no es un
+# precio y esas preguntas quedan para el código que genera el modelo.
+
+CATALOGO_PROMPTS = {
+    "📊 Análisis de Competencia": [
+        "Genera un informe comercial de Market Share por proveedor.",
+        "¿Cuáles son los 5 proveedores que más dinero mueven?",
+        "Muestra el ranking de las empresas con más adjudicaciones.",
+        "Compara el precio máximo y mínimo ofertado por cada empresa.",
+        "¿Qué competidor tiene el precio promedio más bajo ofertado?",
+    ],
+    "🛒 Compradores y Clientes": [
+        "Genera un ranking de los 5 mayores compradores u organismos.",
+        "¿Qué regiones o instituciones concentran el mayor gasto?",
+        "Dime el detalle de compras del organismo que más gasta.",
+        "¿Cuántas compras/licitaciones únicas hay por cada comprador?",
+        "Muestra la tabla de compradores ordenados por monto total.",
+    ],
+    "📦 Productos y Precios": [
+        "¿Cuál es el producto que genera más volumen de dinero?",
+        "Haz un análisis de la tendencia de precios en el tiempo.",
+        "Genera un reporte detallado del producto más demandado.",
+        "¿Cuál es el precio promedio, máximo y mínimo por producto?",
+        "Muestra los 5 productos con mayor cantidad adjudicada.",
+    ],
+    "🎯 Estrategia y Oportunidades": [
+        "¿Cuáles son los negocios más rentables (Top 5 por mayor monto)?",
+        "Resume los montos totales adjudicados agrupados por fecha.",
+        "¿Cuál es el ticket promedio (monto) por negocio?",
+        "Crea un resumen estadístico general de todos los datos.",
+        "Genera un informe detallando las oportunidades de negocio en este archivo.",
+    ],
+}
+
+DIMENSIONES = {"proveedor": "PROV_COL", "comprador": "COMP_COL", "producto": "COLS_PROD", "fecha": "FECHA_COL"}
+COLUMNAS_CANTIDAD = ["Cantidad Adjudicada"]
+
+
+def _agregar(df, claves, MONT_COL, ID_COL, CANT_COL=None, precio=None):
+    agregados = {
+        "Monto_Total": (MONT_COL, "sum"),
+        "Registros": (MONT_COL, "size"),
+        "Monto_Minimo": (MONT_COL, "min"),
+        "Monto_Maximo": (MONT_COL, "max"),
+        "Monto_Promedio": (MONT_COL, "mean"),
+    }
+    if ID_COL:
+        agregados["Negocios_Unicos"] = (ID_COL, "nunique")
+    if CANT_COL:
+        agregados["Cantidad_Total"] = (CANT_COL, "sum")
+    tabla = df.groupby(claves, observed=True).agg(**agregados)
+    if precio is not None:
+        grupos = precio.groupby(df[claves] if isinstance(claves, str) else claves, observed=True)
+        tabla["Precio_Unitario_Minimo"] = grupos.min()
+        tabla["Precio_Unitario_Maximo"] = grupos.max()
+        # Promedio ponderado por unidades, como en la tendencia
+        tabla["Precio_Unitario_Promedio"] = tabla["Monto_Total"] / tabla["Cantidad_Total"].where(tabla["Cantidad_Total"] > 0)
+    return tabla
+
+
+def construir_cubo(df, columnas):
+    """Agregados por dimensión (dict nombre → DataFrame) más la fila 'global'; {} si no hay monto."""
+    MONT_COL, ID_COL = columnas.get("MONT_COL"), columnas.get("ID_COL")
+    if not MONT_COL:
+        return {}
+    CANT_COL = next((c for c in COLUMNAS_CANTIDAD if c in df.columns), None)
+    precio = df[MONT_COL] / df[CANT_COL].where(df[CANT_COL] > 0) if CANT_COL else None
+
+    cubo = {}
+    for nombre, variable in DIMENSIONES.items():
+        col = columnas.get(variable)
+        if variable == "COLS_PROD":
+            col = col[0] if col else None
+        if not col:
+            continue
+        claves = df[col].dt.floor("D").rename(col) if nombre == "fecha" else col
+        cubo[nombre] = _agregar(df, claves, MONT_COL, ID_COL, CANT_COL, precio)
+
+    total = df[MONT_COL]
+    fila_global = {
+        "Monto_Total": total.sum(), "Registros": len(df), "Monto_Minimo": total.min(),
+        "Monto_Maximo": total.max(), "Monto_Promedio": total.mean(),
+    }
+    if ID_COL:
+        fila_global["Negocios_Unicos"] = df[ID_COL].nunique()
+    cubo["global"] = pd.DataFrame([fila_global])
+    return cubo
+
+
+# ==========================================
+# RUTEO DEL CATÁLOGO → CUBO
+# ==========================================
+def normalizar_prompt(texto):
+    """Minúsculas, sin tildes, sin signos y con espacios colapsados."""
+    sin_tildes = unicodedata.normalize("NFKD", texto).encode("ascii", "ignore").decode()
+    return re.sub(r"\s+", " ", re.sub(r"[^a-z0-9/ ]+", " ", sin_tildes.lower())).strip()
+
+
+def _dinero(valor):
+    return f"${valor:,.0f}"
+
+
+def _market_share(cubo):
+    tabla = cubo["proveedor"][["Monto_Total"]].sort_values("Monto_Total", ascending=False)
+    tabla["Market_Share_%"] = (100 * tabla["Monto_Total"] / tabla["Monto_Total"].sum()).round(2)
+    return tabla
+
+
+def _precios(tabla, columnas, orden=None):
+    """Columnas de precio unitario; None sin cantidades (el monto de una línea no es un precio)."""
+    if columnas[0] not in tabla:
+        return None
+    tabla = tabla[columnas]
+    return tabla if orden is None else tabla.sort_values(orden, ascending=False)
+
+
+def _mas_barato(cubo):
+    if "Precio_Unitario_Promedio" not in cubo["proveedor"]:
+        return None
+    promedios = cubo["proveedor"]["Precio_Unitario_Promedio"].dropna()
+    if promedios.empty:
+        return None
+    return f"**{promedios.idxmin()}** tiene el precio unitario promedio más bajo ofertado: {_dinero(promedios.min())}."
+
+
+def _mejor_producto(cubo):
+    montos = cubo["producto"]["Monto_Total"]
+    return f"El producto que genera más volumen de dinero es **{montos.idxmax()}**, con {_dinero(montos.max())}."
+
+
+def _tendencia(cubo):
+    """Precio unitario promedio por mes (monto / cantidad); sin cantidades, la tendencia del gasto."""
+    diario = cubo["fecha"]
+    con_cantidad = "Cantidad_Total" in diario
+    sumas = ["Monto_Total", "Registros"] + (["Cantidad_Total"] if con_cantidad else [])
+    mensual = diario[sumas].groupby(diario.index.to_period("M")).sum()
+    mensual.index = mensual.index.to_timestamp()
+    if con_cantidad:
+        mensual["Precio_Unitario_Promedio"] = mensual["Monto_Total"] / mensual["Cantidad_Total"].where(mensual["Cantidad_Total"] > 0)
+        return mensual[["Precio_Unitario_Promedio", "Cantidad_Total"]]
+    # Sin cantidades (Órdenes de Compra) el monto por línea no es un precio: se muestra como gasto
+    mensual["Gasto_Promedio_por_Registro"] = mensual["Monto_Total"] / mensual["Registros"]
+    return mensual[["Monto_Total", "Gasto_Promedio_por_Registro"]]
+
+
+def _ticket_promedio(cubo):
+    fila = cubo["global"].iloc[0]
+    if "Negocios_Unicos" not in fila or not fila["Negocios_Unicos"]:
+        return None
+    ticket = fila["Monto_Total"] / fila["Negocios_Unicos"]
+    return f"El ticket promedio es **{_dinero(ticket)}** por negocio ({int(fila['Negocios_Unicos']):,} negocios, {_dinero(fila['Monto_Total'])} en total)."
+
+
+# (dimensión requerida, función que arma `resultado` desde el cubo)
+RESPUESTAS_CATALOGO = {
+    "Genera un informe comercial de Market Share por proveedor.":
+        ("proveedor", _market_share),
+    "¿Cuáles son los 5 proveedores que más dinero mueven?":
+        ("proveedor", lambda c: c["proveedor"]["Monto_Total"].nlargest(5)),
+    "Muestra el ranking de las empresas con más adjudicaciones.":
+        ("proveedor", lambda c: c["proveedor"]["Negocios_Unicos" if "Negocios_Unicos" in c["proveedor"] else "Registros"].sort_values(ascending=False)),
+    "Compara el precio máximo y mínimo ofertado por cada empresa.":
+        ("proveedor", lambda c: _precios(c["proveedor"], ["Precio_Unitario_Maximo", "Precio_Unitario_Minimo"], "Precio_Unitario_Maximo")),
+    "¿Qué competidor tiene el precio promedio más bajo ofertado?":
+        ("proveedor", _mas_barato),
+    "Genera un ranking de los 5 mayores compradores u organismos.":
+        ("comprador", lambda c: c["comprador"]["Monto_Total"].nlargest(5)),
+    "¿Qué regiones o instituciones concentran el mayor gasto?":
+        ("comprador", lambda c: c["comprador"]["Monto_Total"].nlargest(10)),
+    "¿Cuántas compras/licitaciones únicas hay por cada comprador?":
+        ("comprador", lambda c: c["comprador"]["Negocios_Unicos"].sort_values(ascending=False) if "Negocios_Unicos" in c["comprador"] else None),
+    "Muestra la tabla de compradores ordenados por monto total.":
+        ("comprador", lambda c: c["comprador"][["Monto_Total", "Registros"]].sort_values("Monto_Total", ascending=False)),
+    "¿Cuál es el producto que genera más volumen de dinero?":
+        ("producto", _mejor_producto),
+    "Haz un análisis de la tendencia de precios en el tiempo.":
+        ("fecha", _tendencia),
+    "Genera un reporte detallado del producto más demandado.":
+        ("producto", lambda c: c["producto"].sort_values("Registros", ascending=False).head(1).T),
+    "¿Cuál es el precio promedio, máximo y mínimo por producto?":
+        ("producto", lambda c: _precios(c["producto"], ["Precio_Unitario_Promedio", "Precio_Unitario_Maximo", "Precio_Unitario_Minimo"])),
+    "Resume los montos totales adjudicados agrupados por fecha.":
+        ("fecha", lambda c: c["fecha"][["Monto_Total"]]),
+    "¿Cuál es el ticket promedio (monto) por negocio?":
+        ("global", _ticket_promedio),
+    "Crea un resumen estadístico general de todos los datos.":
+        ("global", lambda c: c["global"].T.rename(columns={0: "Valor"})),
+}
+
+_RUTAS = {normalizar_prompt(p): r for p, r in RESPUESTAS_CATALOGO.items()}
+
+
+def responder_catalogo(prompt, cubo):
+    """`resultado` para un prompt del catálogo respondible con el cubo; None → usar el LLM."""
+    ruta = _RUTAS.get(normalizar_prompt(prompt))
+    if ruta is None or not cubo:
+        return None
+    dimension, responder = ruta
+    if dimension not in cubo:
+        return None
+    return responder(cubo)
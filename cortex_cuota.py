@@ -0,0 +1,173 @@
+import collections
+import contextlib
+import contextvars
+import os
+import random
+import threading
+import time
+
+# ==========================================
+# PLANIFICADOR DE CUOTA COMPARTIDO (RPM / TPM)
+# ==========================================
+# Todas las llamadas a Gemini del proceso (extracción Matriz 24, grupos en
+# paralelo, chat de analytics) pasan por aquí. Se admiten mientras quepan en
+# el presupuesto por minuto de requests (RPM) y tokens (TPM); si no, esperan
+# en una cola por usuario que se atiende por turnos (round-robin), para que un
+# lote de 40 PDFs no deje sin servicio al resto. Un 429 se reintenta con
+# backoff exponencial con jitter, volviendo a pasar por la cola.
+#
+# El presupuesto es por proceso: dos apps con la misma API key en procesos
+# distintos no se coordinan entre sí, así que conviene repartir RPM/TPM.
+
+VENTANA_S = 60.0
+TOKENS_POR_ARCHIVO = 30_000  # estimación previa para un PDF subido; se corrige con usage_metadata
+
+usuario_actual = contextvars.ContextVar("usuario_actual", default="anonimo")
+
+
+@contextlib.contextmanager
+def como_usuario(usuario):
+    """Atribuye al `usuario` las llamadas hechas dentro del bloque (y en los contextos copiados)."""
+    token = usuario_actual.set(usuario)
+    try:
+        yield
+    finally:
+        usuario_actual.reset(token)
+
+
+def es_limite_de_cuota(error):
+    """True para un 429 del API, reconocido por nombre de clase y código.
+
+    No se importa google.api_core: arrastra gRPC y protobuf al arranque de las apps.
+    Un error envuelto en otra excepción se reconoce solo por la frase exacta del
+    API ("429 Resource has been exhausted"), no por "429" o "quota" sueltos.
+    """
+    clases = {c.__name__ for c in type(error).__mro__}
+    if clases & {"TooManyRequests", "ResourceExhausted"} or getattr(error, "code", None) == 429:
+        return True
+    return "429 resource has been exhausted" in str(error).lower()
+
+
+def estimar_tokens(partes):
+    """Tokens aproximados de una llamada: ~4 caracteres por token; archivos a tanto alzado."""
+    return sum(len(p) // 4 if isinstance(p, str) else TOKENS_POR_ARCHIVO for p in partes)
+
+
+class PlanificadorCuota:
+    """Admisión justa por usuario dentro de un presupuesto RPM/TPM, con reintentos ante 429."""
+
+    def __init__(self, rpm=150, tpm=1_000_000, max_reintentos=5, espera_base_s=2.0, espera_max_s=60.0):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.max_reintentos = max_reintentos
+        self.espera_base_s = espera_base_s
+        self.espera_max_s = espera_max_s
+        self.llamadas = 0
+        self.reintentos_429 = 0
+        self.espera_total_s = 0.0
+        self._ventana = collections.deque()        # [instante, tokens] de lo admitido en el último minuto
+        self._colas = collections.OrderedDict()   # usuario → deque de turnos; el orden es la rotación
+        self._cond = threading.Condition()
+
+    def _depurar(self, ahora):
+        while self._ventana and ahora - self._ventana[0][0] >= VENTANA_S:
+            self._ventana.popleft()
+
+    def _espera_presupuesto(self, tokens, ahora):
+        """0 si la llamada cabe ahora; si no, segundos hasta que se libere lo necesario."""
+        self._depurar(ahora)
+        usados = sum(t for _, t in self._ventana)
+        cabe_tokens = usados + tokens <= self.tpm or not self._ventana
+        if len(self._ventana) < self.rpm and cabe_tokens:
+            return 0.0
+        return max(0.01, self._ventana[0][0] + VENTANA_S - ahora)
+
+    def _admitir(self, usuario, tokens):
+        turno = object()
+        with self._cond:
+            self._colas.setdefault(usuario, collections.deque()).append(turno)
+            t0 = time.monotonic()
+            try:
+                while True:
+                    siguiente = next(iter(self._colas))
+                    espera = None
+                    if siguiente == usuario and self._colas[usuario][0] is turno:
+                        espera = self._espera_presupuesto(tokens, time.monotonic())
+                        if espera == 0.0:
+                            break
+                    self._cond.wait(timeout=espera)
+            except BaseException:
+                # Turno abandonado (p. ej. la sesión se detuvo): que no bloquee a los demás
+                self._colas[usuario].remove(turno)
+                if not self._colas[usuario]:
+                    del self._colas[usuario]
+                self._cond.notify_all()
+                raise
+            cola = self._colas.pop(usuario)
+            cola.popleft()
+            if cola:
+                self._colas[usuario] = cola  # al final de la rotación: turno del siguiente usuario
+            registro = [time.monotonic(), tokens]
+            self._ventana.append(registro)
+            self.llamadas += 1
+            self.espera_total_s += time.monotonic() - t0
+            self._cond.notify_all()
+        return registro
+
+    def llamar(self, funcion, tokens_estimados=0, usuario=None):
+        """Ejecuta `funcion()` cuando hay cupo; reintenta los 429 con backoff y jitter.
+
+        Si el resultado trae `usage_metadata`, el consumo estimado se corrige
+        con los tokens reales.
+        """
+        usuario = usuario or usuario_actual.get()
+        for intento in range(self.max_reintentos + 1):
+            registro = self._admitir(usuario, tokens_estimados)
+            try:
+                resultado = funcion()
+            except Exception as e:
+                if not es_limite_de_cuota(e) or intento == self.max_reintentos:
+                    raise
+                with self._cond:
+                    self.reintentos_429 += 1
+                espera = min(self.espera_max_s, self.espera_base_s * 2 ** intento)
+                time.sleep(espera * random.uniform(0.5, 1.5))
+                continue
+            uso = getattr(resultado, "usage_metadata", None)
+            total = getattr(uso, "total_token_count", None)
+            if total:
+                with self._cond:
+                    registro[1] = total
+                    self._cond.notify_all()
+            return resultado
+
+    def estadisticas(self):
+        with self._cond:
+            self._depurar(time.monotonic())
+            return {
+                "en_cola": sum(len(c) for c in self._colas.values()),
+                "en_cola_por_usuario": {u: len(c) for u, c in self._colas.items()},
+                "rpm_usado": len(self._ventana),
+                "tpm_usado": sum(t for _, t in self._ventana),
+                "rpm": self.rpm,
+                "tpm": self.tpm,
+                "llamadas": self.llamadas,
+                "reintentos_429": self.reintentos_429,
+                "espera_promedio_s": self.espera_total_s / self.llamadas if self.llamadas else 0.0,
+            }
+
+
+_planificador = None
+_lock_planificador = threading.Lock()
+
+
+def planificador():
+    """Planificador único del proceso (CORTEX_RPM / CORTEX_TPM en el entorno)."""
+    global _planificador
+    with _lock_planificador:
+        if _planificador is None:
+            _planificador = PlanificadorCuota(
+                rpm=int(os.environ.get("CORTEX_RPM", 150)),
+                tpm=int(os.environ.get("CORTEX_TPM", 1_000_000)),
+            )
+        return _planificador
@@ -0,0 +1,519 @@
+import pandas as pd
+import numpy as np
+import openpyxl
+import codecs
+import io
+import os
+
+from cortex_cubo import construir_cubo
+from cortex_radar import RadarCompetencia
+from cortex_trazas import trazador
+
+# ==========================================
+# MOTOR DE SANEAMIENTO VECTORIZADO
+# ==========================================
+# Las columnas de los exports repiten muchísimo (mismos montos, mismas fechas),
+# así que se factoriza la serie, se parsean solo los valores únicos y el
+# resultado se re-expande con los códigos. El formato (separador decimal en
+# montos, patrón strftime en fechas) se detecta una vez por columna con una muestra.
+# Al leer por tandas (cortex_ingesta), una `memoria` por columna guarda lo ya
+# parseado para que cada valor distinto se parsee una sola vez en todo el archivo,
+# y el formato numérico elegido en la primera tanda: un "1.500" vale lo mismo en
+# todas las tandas, como en una carga completa.
+
+TAMANO_MUESTRA = 1000
+MAX_MEMORIA_TANDAS = 1_000_000  # valores distintos recordados por columna
+
+FORMATOS_FECHA = [
+    '%d-%m-%Y %H:%M:%S', '%d-%m-%Y %H:%M', '%d-%m-%Y',
+    '%d/%m/%Y %H:%M:%S', '%d/%m/%Y %H:%M', '%d/%m/%Y',
+    '%Y-%m-%d %H:%M:%S', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%d %H:%M', '%Y-%m-%d',
+    '%Y/%m/%d %H:%M:%S', '%Y/%m/%d',
+]
+# Excel guarda las fechas como días desde 1899-12-30; fuera de este rango
+# (años 1954 a 2119) un número no se toma como fecha
+ORIGEN_EXCEL = '1899-12-30'
+RANGO_SERIAL_EXCEL = (20_000, 80_000)
+
+
+class MemoriaColumna(dict):
+    """Valores ya parseados de una columna (valor → resultado) y su formato numérico, entre tandas."""
+    formato = None
+
+
+def _factorizar(serie):
+    """Retorna (codigos, unicos) con los únicos como Series de objetos; NaN queda en código -1."""
+    codigos, unicos = pd.factorize(serie, use_na_sentinel=True)
+    return codigos, pd.Series(np.asarray(unicos, dtype=object), dtype=object)
+
+
+def _reexpandir(codigos, valores_unicos, relleno, serie):
+    """Mapea los únicos parseados de vuelta a cada fila (código -1 → relleno)."""
+    valores = np.append(valores_unicos, np.array([relleno], dtype=valores_unicos.dtype))
+    return pd.Series(valores[codigos], index=serie.index, name=serie.name)
+
+
+def detectar_formato_numerico(textos):
+    """'cl' (1.234.567,89) o 'us' (1,234,567.89) según la mayoría de valores no ambiguos de la muestra."""
+    muestra = textos.head(TAMANO_MUESTRA)
+    n_punto = muestra.str.count(r'\.')
+    n_coma = muestra.str.count(',')
+    ult_punto = muestra.str.rfind('.')
+    ult_coma = muestra.str.rfind(',')
+    largo = muestra.str.len()
+
+    ambos = (n_punto > 0) & (n_coma > 0)
+    votos_cl = (ambos & (ult_coma > ult_punto)) | ((n_coma == 0) & (n_punto > 1)) \
+        | ((n_punto == 0) & (n_coma == 1) & (largo - ult_coma - 1 != 3))
+    votos_us = (ambos & (ult_punto > ult_coma)) | ((n_punto == 0) & (n_coma > 1)) \
+        | ((n_coma == 0) & (n_punto == 1) & (largo - ult_punto - 1 != 3))
+    # Empate o muestra sin señales: los exports de Mercado Público vienen en formato chileno
+    return 'us' if votos_us.sum() > votos_cl.sum() else 'cl'
+
+
+def _solo_cifras(textos):
+    return textos.str.replace(r'[^\d.,-]', '', regex=True)
+
+
+def _parsear_textos_numericos(textos, formato=None):
+    """Parsea montos en texto con separadores mixtos; lo no parseable queda NaN.
+
+    Sin `formato` ('cl' o 'us') se detecta con una muestra de `textos`.
+    """
+    textos = _solo_cifras(textos)
+    formato = formato or detectar_formato_numerico(textos)
+
+    n_punto = textos.str.count(r'\.')
+    n_coma = textos.str.count(',')
+    ult_punto = textos.str.rfind('.')
+    ult_coma = textos.str.rfind(',')
+    largo = textos.str.len()
+
+    # Cada valor decide su separador decimal si es inequívoco; solo los casos
+    # ambiguos ("1.500", "1,500") usan el formato detectado para la columna.
+    ambos = (n_punto > 0) & (n_coma > 0)
+    ambiguo_punto = (n_coma == 0) & (n_punto == 1) & (largo - ult_punto - 1 == 3)
+    ambiguo_coma = (n_punto == 0) & (n_coma == 1) & (largo - ult_coma - 1 == 3)
+    decimal_coma = (ambos & (ult_coma > ult_punto)) \
+        | ((n_punto == 0) & (n_coma == 1) & ~ambiguo_coma) \
+        | (ambiguo_coma & (formato == 'cl')) \
+        | ((n_coma == 0) & (n_punto > 1)) \
+        | (ambiguo_punto & (formato == 'cl'))
+
+    normalizado = textos.where(~decimal_coma, textos.str.replace('.', '', regex=False).str.replace(',', '.', regex=False))
+    normalizado = normalizado.where(decimal_coma, normalizado.str.replace(',', '', regex=False))
+    return pd.to_numeric(normalizado, errors='coerce')
+
+
+def _parsear_con_memoria(unicos, memoria, parsear, dtype):
+    """`parsear(unicos)` como array; con `memoria` (dict que dura entre tandas) solo se parsean los no vistos."""
+    if memoria is None:
+        return parsear(unicos)
+    vistos = np.fromiter((v in memoria for v in unicos), dtype=bool, count=len(unicos))
+    valores = np.empty(len(unicos), dtype=dtype)
+    if vistos.any():
+        valores[vistos] = [memoria[v] for v in unicos[vistos]]
+    if not vistos.all():
+        nuevos = unicos[~vistos].reset_index(drop=True)
+        parseados = parsear(nuevos)
+        valores[~vistos] = parseados
+        if len(memoria) < MAX_MEMORIA_TANDAS:
+            memoria.update(zip(nuevos, parseados))
+    return valores
+
+
+def _valores_numericos(unicos, formato=None):
+    es_texto = unicos.map(lambda v: isinstance(v, str)).astype(bool)
+    valores = pd.Series(np.nan, index=unicos.index, dtype=float)
+    if es_texto.any():
+        valores[es_texto] = _parsear_textos_numericos(unicos[es_texto].astype(str), formato).to_numpy(dtype=float)
+    if (~es_texto).any():
+        valores[~es_texto] = pd.to_numeric(unicos[~es_texto], errors='coerce').to_numpy(dtype=float)
+    return valores.to_numpy(dtype=float)
+
+
+def limpiar_numeros(serie, memoria=None):
+    """Montos como float (lo no parseable queda en 0); `memoria` es una MemoriaColumna que dura entre tandas."""
+    if pd.api.types.is_numeric_dtype(serie):
+        return serie.fillna(0)
+
+    codigos, unicos = _factorizar(serie)
+    formato = None
+    if memoria is not None:
+        if memoria.formato is None:
+            # La primera tanda con montos en texto fija el formato de la columna para el resto del archivo
+            textos = unicos[unicos.map(lambda v: isinstance(v, str)).astype(bool)]
+            if len(textos):
+                memoria.formato = detectar_formato_numerico(_solo_cifras(textos.astype(str)))
+        formato = memoria.formato
+    valores = _parsear_con_memoria(unicos, memoria, lambda nuevos: _valores_numericos(nuevos, formato), float)
+    return _reexpandir(codigos, valores, np.nan, serie).fillna(0)
+
+
+def detectar_formato_fecha(textos):
+    """Formato strftime que parsea más valores de la muestra (None si ninguno sirve)."""
+    muestra = textos.head(TAMANO_MUESTRA)
+    mejor, mejor_ok = None, 0
+    for formato in FORMATOS_FECHA:
+        ok = pd.to_datetime(muestra, format=formato, errors='coerce').notna().sum()
+        if ok > mejor_ok:
+            mejor, mejor_ok = formato, ok
+            if ok == len(muestra):
+                break
+    return mejor
+
+
+def _desde_serial_excel(numeros):
+    """Fechas de los seriales de Excel (la fracción es la hora); fuera de RANGO_SERIAL_EXCEL queda NaT."""
+    numeros = pd.to_numeric(numeros, errors='coerce').astype(float)
+    numeros = numeros.where(numeros.between(*RANGO_SERIAL_EXCEL))
+    return pd.to_datetime(numeros, unit='D', origin=ORIGEN_EXCEL, errors='coerce').dt.round('s')
+
+
+def _valores_fecha(unicos):
+    es_texto = unicos.map(lambda v: isinstance(v, str)).astype(bool)
+    es_numero = unicos.map(lambda v: isinstance(v, (int, float, np.number)) and not isinstance(v, bool)).astype(bool)
+    fechas = pd.Series(pd.NaT, index=unicos.index, dtype='datetime64[ns]')
+
+    if es_texto.any():
+        textos = unicos[es_texto].astype(str).str.strip()
+        formato = detectar_formato_fecha(textos)
+        parseadas = pd.to_datetime(textos, format=formato, errors='coerce') if formato else pd.Series(pd.NaT, index=textos.index)
+        # Solo lo que el formato dominante no entendió pasa por el parser elemento a elemento
+        resto = parseadas.isna() & (textos != '')
+        if resto.any():
+            serial = resto & textos.str.fullmatch(r'\d+(\.\d+)?')
+            if serial.any():
+                parseadas[serial] = _desde_serial_excel(textos[serial])
+            resto &= ~serial
+        if resto.any():
+            parseadas[resto] = pd.to_datetime(textos[resto], format='mixed', dayfirst=True, errors='coerce')
+        fechas[es_texto] = parseadas.astype('datetime64[ns]')
+    if es_numero.any():
+        fechas[es_numero] = _desde_serial_excel(unicos[es_numero]).astype('datetime64[ns]')
+    otros = ~es_texto & ~es_numero
+    if otros.any():
+        fechas[otros] = pd.to_datetime(unicos[otros], errors='coerce').astype('datetime64[ns]')
+    return fechas.to_numpy(dtype='datetime64[ns]')
+
+
+def limpiar_fechas(serie, memoria=None):
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return serie
+
+    codigos, unicos = _factorizar(serie)
+    fechas = _parsear_con_memoria(unicos, memoria, _valores_fecha, 'datetime64[ns]')
+    return _reexpandir(codigos, fechas, np.datetime64('NaT', 'ns'), serie)
+
+# ==========================================
+# MOTOR DE RUTEO INTELIGENTE (EL KRAKEN)
+# ==========================================
+def detectar_tipo_reporte(columnas):
+    cols_str = " ".join(columnas).lower()
+    if "nombreprovider" in cols_str and "totallinea" in cols_str:
+        return "Órdenes de Compra"
+    elif "estado compra ágil" in cols_str or "estado compra agil" in cols_str:
+        return "Compras Ágiles"
+    elif "estado licitación" in cols_str or "estado licitacion" in cols_str:
+        return "Licitaciones"
+    elif "fecha lectura" in cols_str or "precio sin oferta" in cols_str:
+        return "Convenio Marco"
+    else:
+        return "Análisis General"
+
+
+# ==========================================
+# INGESTA PODADA: SOLO LAS COLUMNAS QUE CADA MÓDULO USA
+# ==========================================
+# Los exports traen 60+ columnas y el análisis usa ~10. Primero se lee solo la
+# fila de encabezados, se detecta el tipo de reporte y luego se cargan
+# únicamente las columnas de ese tipo (más las que pida el usuario).
+
+# Columnas de texto: se leen como str explícito (sin inferencia, IDs con ceros a la izquierda intactos)
+COLUMNAS_TEXTO_POR_TIPO = {
+    "Licitaciones": ['CodigoExterno', 'ID Licitación', 'Nombre Proveedor', 'Nombre Organismo', 'Nombre Producto', 'Descripcion Producto'],
+    "Compras Ágiles": ['CodigoExterno', 'ID Licitación', 'Nombre Proveedor', 'Nombre Organismo', 'Nombre Producto', 'Descripcion Producto'],
+    "Órdenes de Compra": ['Codigo', 'NombreProvider', 'NombreUnidad', 'Producto', 'EspecificacionProveedor'],
+    "Convenio Marco": ['ID Producto', 'Empresa', 'Región', 'Nombre Producto', 'Formato'],
+}
+
+# Montos y fechas: quedan con la inferencia del lector y los termina el motor de saneamiento
+COLUMNAS_VALOR_POR_TIPO = {
+    "Licitaciones": ['Cantidad Adjudicada', 'Monto Unitario', 'Fecha Adjudicación'],
+    "Compras Ágiles": ['Cantidad Adjudicada', 'Monto Unitario', 'Fecha Adjudicación'],
+    "Órdenes de Compra": ['TotalLinea', 'FechaAceptacion'],
+    "Convenio Marco": ['Precio Oferta', 'Fecha Lectura'],
+}
+
+
+BYTES_MUESTRA_CODIFICACION = 256 * 1024
+
+
+def detectar_codificacion(archivo, bytes_muestra=BYTES_MUESTRA_CODIFICACION):
+    """'utf-8-sig', 'utf-8' o 'latin1' según muestras del inicio, el medio y el final de un archivo binario.
+
+    Se lee solo la muestra (no el archivo completo) y la posición del archivo queda como estaba.
+    """
+    posicion = archivo.tell()
+    total = archivo.seek(0, os.SEEK_END)
+    try:
+        archivo.seek(0)
+        inicio = archivo.read(bytes_muestra)
+        if inicio.startswith(codecs.BOM_UTF8):
+            return 'utf-8-sig'
+        muestras = [inicio]
+        for desde in sorted({max(0, total // 2 - bytes_muestra // 2), max(0, total - bytes_muestra)} - {0}):
+            archivo.seek(desde)
+            # Una ventana puede empezar a mitad de un carácter: se saltan los bytes de continuación
+            muestras.append(archivo.read(bytes_muestra).lstrip(bytes(range(0x80, 0xC0))))
+    finally:
+        archivo.seek(posicion)
+    for muestra in muestras:
+        try:
+            # Sin `final`, un carácter cortado al final de la ventana no cuenta como error
+            codecs.getincrementaldecoder('utf-8')().decode(muestra, final=False)
+        except UnicodeDecodeError:
+            return 'latin1'
+    return 'utf-8'
+
+
+def _leer_csv(contenido, **kwargs):
+    # La codificación sale de una muestra: ya no se relee el archivo completo al fallar utf-8
+    codificacion = detectar_codificacion(io.BytesIO(contenido))
+    try:
+        return pd.read_csv(io.BytesIO(contenido), encoding=codificacion, **kwargs)
+    except UnicodeDecodeError:
+        # Bytes no utf-8 fuera de las muestras (raro): única relectura posible
+        return pd.read_csv(io.BytesIO(contenido), encoding='latin1', **kwargs)
+
+
+def leer_encabezados(contenido, nombre):
+    """Lee solo la fila de encabezados (sin espacios sobrantes) de un Excel/CSV."""
+    if nombre.endswith('csv'):
+        return [str(c).strip() for c in _leer_csv(contenido, nrows=0).columns]
+
+    wb = openpyxl.load_workbook(io.BytesIO(contenido), read_only=True, data_only=True)
+    try:
+        fila = next(wb.worksheets[0].iter_rows(min_row=1, max_row=1, values_only=True), ())
+    finally:
+        wb.close()
+    return [str(c).strip() for c in fila if c is not None]
+
+
+def columnas_requeridas(tipo_reporte, encabezados, columnas_extra=()):
+    """Columnas a cargar para el tipo de reporte; None significa 'todas' (Análisis General)."""
+    if tipo_reporte not in COLUMNAS_TEXTO_POR_TIPO:
+        return None
+    deseadas = COLUMNAS_TEXTO_POR_TIPO[tipo_reporte] + COLUMNAS_VALOR_POR_TIPO[tipo_reporte] + list(columnas_extra)
+    return [c for c in encabezados if c in deseadas]
+
+
+def _leer_excel_streaming(contenido, columnas):
+    """Recorre la primera hoja en modo read-only de openpyxl guardando solo las columnas pedidas."""
+    wb = openpyxl.load_workbook(io.BytesIO(contenido), read_only=True, data_only=True)
+    try:
+        filas = wb.worksheets[0].iter_rows(values_only=True)
+        encabezados = [str(c).strip() if c is not None else '' for c in next(filas, ())]
+        if columnas is None:
+            columnas = [c for c in encabezados if c]
+        indices = [encabezados.index(c) for c in columnas]
+        # Acotar el rango de columnas evita que openpyxl arme celdas que se descartarían
+        desde, hasta = min(indices, default=0), max(indices, default=0)
+        relativos = [i - desde for i in indices]
+        datos = {c: [] for c in columnas}
+        listas = [datos[c] for c in columnas]
+        for fila in wb.worksheets[0].iter_rows(min_row=2, min_col=desde + 1, max_col=hasta + 1, values_only=True):
+            for lista, i in zip(listas, relativos):
+                lista.append(fila[i] if i < len(fila) else None)
+    finally:
+        wb.close()
+    # El modo read-only entrega también filas vacías con formato; se descartan como hace pandas
+    return pd.DataFrame(datos, columns=columnas).dropna(how='all').reset_index(drop=True)
+
+
+def leer_archivo(contenido, nombre, columnas=None, tipo_reporte=None):
+    """Lee un Excel/CSV desde sus bytes, opcionalmente solo las `columnas` indicadas (nombres sin espacios)."""
+    texto = set(COLUMNAS_TEXTO_POR_TIPO.get(tipo_reporte, []))
+    if nombre.endswith('csv'):
+        if columnas is None:
+            df = _leer_csv(contenido)
+        else:
+            crudos = [c for c in _leer_csv(contenido, nrows=0).columns if str(c).strip() in columnas]
+            dtype = {c: str for c in crudos if str(c).strip() in texto}
+            df = _leer_csv(contenido, usecols=crudos, dtype=dtype)
+        df.columns = [str(c).strip() for c in df.columns]
+    else:
+        df = _leer_excel_streaming(contenido, columnas)
+        for c in texto.intersection(df.columns):
+            df[c] = df[c].where(df[c].isna(), df[c].astype(str))
+
+    return df
+
+
+def sanear_y_mapear(df, tipo_reporte, memorias=None):
+    """Sanea montos/fechas según el tipo de reporte y resuelve el mapeo de columnas clave.
+
+    `memorias` (un dict que se reutiliza entre tandas) evita re-parsear valores ya vistos.
+    Retorna (df, col_map_final, cols_detalle_prod).
+    """
+    def memoria(col):
+        return None if memorias is None else memorias.setdefault(col, MemoriaColumna())
+
+    col_map = {}
+    cols_detalle_prod = []
+
+    if tipo_reporte in ["Licitaciones", "Compras Ágiles"]:
+        if 'Cantidad Adjudicada' in df.columns: df['Cantidad Adjudicada'] = limpiar_numeros(df['Cantidad Adjudicada'], memoria('Cantidad Adjudicada'))
+        if 'Monto Unitario' in df.columns: df['Monto Unitario'] = limpiar_numeros(df['Monto Unitario'], memoria('Monto Unitario'))
+        if 'Cantidad Adjudicada' in df.columns and 'Monto Unitario' in df.columns:
+            df['Monto_Total_Estimado'] = df['Cantidad Adjudicada'] * df['Monto Unitario']
+        if 'Fecha Adjudicación' in df.columns: df['Fecha_Datetime'] = limpiar_fechas(df['Fecha Adjudicación'], memoria('Fecha Adjudicación'))
+
+        col_map = {
+            'MONTO_REAL': 'Monto_Total_Estimado' if 'Monto_Total_Estimado' in df.columns else 'Monto Unitario',
+            'PROVEEDOR_CLAVE': 'Nombre Proveedor',
+            'COMPRADOR_CLAVE': 'Nombre Organismo',
+            'FECHA_CLAVE': 'Fecha_Datetime',
+            'ID_CLAVE': 'CodigoExterno' if 'CodigoExterno' in df.columns else 'ID Licitación'
+        }
+        cols_detalle_prod = ['Nombre Producto', 'Descripcion Producto']
+
+    elif tipo_reporte == "Órdenes de Compra":
+        if 'TotalLinea' in df.columns: df['TotalLinea'] = limpiar_numeros(df['TotalLinea'], memoria('TotalLinea'))
+        if 'FechaAceptacion' in df.columns: df['Fecha_Datetime'] = limpiar_fechas(df['FechaAceptacion'], memoria('FechaAceptacion'))
+
+        col_map = {
+            'MONTO_REAL': 'TotalLinea',
+            'PROVEEDOR_CLAVE': 'NombreProvider',
+            'COMPRADOR_CLAVE': 'NombreUnidad',
+            'FECHA_CLAVE': 'Fecha_Datetime',
+            'ID_CLAVE': 'Codigo'
+        }
+        cols_detalle_prod = ['Producto', 'EspecificacionProveedor']
+
+    elif tipo_reporte == "Convenio Marco":
+        if 'Precio Oferta' in df.columns: df['Precio Oferta'] = limpiar_numeros(df['Precio Oferta'], memoria('Precio Oferta'))
+        if 'Fecha Lectura' in df.columns: df['Fecha_Datetime'] = limpiar_fechas(df['Fecha Lectura'], memoria('Fecha Lectura'))
+
+        col_map = {
+            'MONTO_REAL': 'Precio Oferta',
+            'PROVEEDOR_CLAVE': 'Empresa',
+            'COMPRADOR_CLAVE': 'Región',
+            'FECHA_CLAVE': 'Fecha_Datetime',
+            'ID_CLAVE': 'ID Producto'
+        }
+        cols_detalle_prod = ['Nombre Producto', 'Formato']
+
+    col_map_final = {k: v for k, v in col_map.items() if v in df.columns}
+    return df, col_map_final, cols_detalle_prod
+
+
+# ==========================================
+# COMPACTACIÓN DE TIPOS EN MEMORIA
+# ==========================================
+# Proveedores, compradores, regiones y productos repiten unos pocos miles de
+# textos en cientos de miles de filas: como categoría pesan una fracción.
+# Montos y cantidades quedan en float64 a propósito: el código generado los
+# suma y multiplica, y en float32/int32 esas cuentas pierden precisión o
+# desbordan. El resto de los numéricos se reduce solo si no pierde información.
+
+MAX_RATIO_CATEGORIA = 0.5
+
+
+def compactar_tipos(df, protegidas=()):
+    """Convierte en sitio textos de baja cardinalidad a category y reduce numéricos no protegidos."""
+    for col in df.columns:
+        serie = df[col]
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            continue
+        if pd.api.types.is_object_dtype(serie) or pd.api.types.is_string_dtype(serie):
+            # Columnas con tipos mezclados (ej. Excel con números y textos) quedan como están
+            if len(serie) == 0 or pd.api.types.infer_dtype(serie, skipna=True) != 'string':
+                continue
+            if serie.nunique(dropna=True) <= MAX_RATIO_CATEGORIA * len(serie):
+                df[col] = serie.astype('category')
+        elif col in protegidas:
+            continue
+        elif pd.api.types.is_integer_dtype(serie) and not pd.api.types.is_bool_dtype(serie):
+            df[col] = pd.to_numeric(serie, downcast='integer')
+        elif pd.api.types.is_float_dtype(serie):
+            reducida = serie.astype('float32')
+            if ((reducida.astype('float64') == serie) | serie.isna()).all():
+                df[col] = reducida
+    return df
+
+
+# ==========================================
+# 🎯 RADAR DE UNICORNIOS
+# ==========================================
+def calcular_radar(df, ID_COL, PROV_COL):
+    """Retorna (unicornios_df, baja_comp_df): negocios con 1 y 2 proveedores."""
+    radar = RadarCompetencia(PROV_COL, ID_COL).agregar(df)
+    return radar.con_competidores(1), radar.con_competidores(2)
+
+
+def cargar_y_sanear(contenido, nombre, columnas_extra=()):
+    """Etapa completa de carga: lectura, detección, saneamiento, mapeo y radar.
+
+    El resultado es un dict listo para guardarse en caché y reutilizarse entre
+    reruns y sesiones; quien lo consuma debe tratar los DataFrames como de solo lectura.
+    """
+    trazas = trazador()
+    with trazas.tramo("read", archivo=nombre, bytes=len(contenido)) as tramo:
+        encabezados = leer_encabezados(contenido, nombre)
+        tipo_reporte = detectar_tipo_reporte(encabezados)
+        columnas = columnas_requeridas(tipo_reporte, encabezados, columnas_extra)
+        df = leer_archivo(contenido, nombre, columnas=columnas, tipo_reporte=tipo_reporte)
+        tramo["tipo_reporte"] = tipo_reporte
+        tramo["filas"] = len(df)
+
+    with trazas.tramo("sanitize", tipo_reporte=tipo_reporte, filas=len(df)) as tramo:
+        df, col_map_final, cols_detalle_prod = sanear_y_mapear(df, tipo_reporte)
+
+        memoria_antes = int(df.memory_usage(deep=True).sum())
+        protegidas = set(COLUMNAS_VALOR_POR_TIPO.get(tipo_reporte, [])) | {'Monto_Total_Estimado'}
+        df = compactar_tipos(df, protegidas)
+        memoria_despues = int(df.memory_usage(deep=True).sum())
+        tramo["bytes"] = memoria_despues
+
+    # --- VARIABLES CORTAS Y GLOBALES (ANTI-DISLEXIA IA) ---
+    cols = {
+        "MONT_COL": col_map_final.get('MONTO_REAL'),
+        "PROV_COL": col_map_final.get('PROVEEDOR_CLAVE'),
+        "COMP_COL": col_map_final.get('COMPRADOR_CLAVE'),
+        "ID_COL": col_map_final.get('ID_CLAVE'),
+        "FECHA_COL": col_map_final.get('FECHA_CLAVE'),
+        "COLS_PROD": [c for c in cols_detalle_prod if c in df.columns],
+    }
+
+    unicornios_df, baja_comp_df = None, None
+    if cols["ID_COL"] and cols["PROV_COL"]:
+        with trazas.tramo("radar", tipo_reporte=tipo_reporte) as tramo:
+            unicornios_df, baja_comp_df = calcular_radar(df, cols["ID_COL"], cols["PROV_COL"])
+            tramo["filas"] = len(unicornios_df) + len(baja_comp_df)
+
+    with trazas.tramo("cube", tipo_reporte=tipo_reporte):
+        cubo = construir_cubo(df, cols)
+
+    return {
+        "df": df,
+        "tipo_reporte": tipo_reporte,
+        "encabezados": encabezados,
+        "col_map_final": col_map_final,
+        **cols,
+        "unicornios_df": unicornios_df,
+        "baja_comp_df": baja_comp_df,
+        "cubo": cubo,
+        "memoria_antes": memoria_antes,
+        "memoria_despues": memoria_despues,
+    }
+
+
+def medir_reporte(reporte):
+    """Bytes en memoria de los DataFrames de un reporte cargado (para la caché)."""
+    marcos = [reporte.get(clave) for clave in ("df", "unicornios_df", "baja_comp_df", "totales_proveedor", "totales_comprador")]
+    marcos += list((reporte.get("cubo") or {}).values())
+    if reporte.get("radar") is not None:
+        # Reporte leído por tandas: el radar conserva una fila por negocio
+        marcos.append(reporte["radar"].negocios())
+    return sum(int(m.memory_usage(deep=True).sum()) for m in marcos if m is not None)
@@ -0,0 +1,185 @@
+import io
+import os
+import tempfile
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import xlsxwriter
+
+# ==========================================
+# EXPORTACIÓN POR TANDAS (XLSX / CSV / PARQUET) CON MEMORIA ACOTADA
+# ==========================================
+# `df.to_excel` arma el libro entero en memoria (un objeto por celda) antes de
+# escribirlo: un resultado de 1M de filas multiplica varias veces su tamaño.
+# Aquí se escribe por tandas de FILAS_POR_TANDA filas:
+# - xlsx con xlsxwriter en modo `constant_memory` (cada fila se vuelca a disco
+#   al pasar a la siguiente) y los formatos de encabezado y cuerpo de Cortex;
+# - CSV (UTF-8 con BOM, para que Excel respete las tildes) y Parquet, que son
+#   mucho más rápidos y no tienen el tope de filas de Excel;
+# - el archivo resultante vive en RAM hasta UMBRAL_DISCO_MB y luego pasa a un
+#   temporal en disco (SpooledTemporaryFile).
+# Nada de esto depende de Streamlit: la app pasa a `st.download_button` una
+# función que llama a `exportar_bytes`, y Streamlit la ejecuta en otro hilo al
+# hacer clic (la página no se bloquea mientras se genera el archivo).
+#
+# Límite: lo acotado es la escritura, no la entrega. `exportar_bytes` lee el
+# archivo terminado completo a memoria, porque Streamlit guarda en RAM el
+# contenido de cada descarga; un export pesa en memoria lo que pesa el archivo
+# (bastante menos que el DataFrame en xlsx/Parquet, que comprimen). Para
+# archivos más grandes que eso, usar `exportar` con un `destino` en disco
+# (como la CLI de cortex_ingesta) en vez de la descarga del navegador.
+
+FILAS_POR_TANDA = 50_000
+MAX_FILAS_XLSX = 1_048_575  # la fila 1 es el encabezado
+UMBRAL_DISCO_MB = int(os.environ.get("CORTEX_EXPORT_RAM_MB", 32))
+
+FORMATO_ENCABEZADO = {'bold': True, 'bg_color': '#1e3c72', 'font_color': 'white', 'border': 1, 'align': 'center', 'valign': 'vcenter', 'text_wrap': True}
+FORMATO_CUERPO = {'text_wrap': True, 'border': 1, 'valign': 'top'}
+FORMATO_FECHA = {**FORMATO_CUERPO, 'num_format': 'dd-mm-yyyy'}
+
+FORMATOS = {
+    "xlsx": ("Excel (.xlsx)", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "csv": ("CSV (.csv)", "text/csv"),
+    "parquet": ("Parquet (.parquet)", "application/vnd.apache.parquet"),
+}
+
+
+def _tandas(df, filas=FILAS_POR_TANDA):
+    for inicio in range(0, len(df), filas):
+        yield df.iloc[inicio:inicio + filas]
+
+
+def _como_hojas(datos, hoja):
+    return dict(datos) if isinstance(datos, dict) else {hoja: datos}
+
+
+def _ancho_por_defecto(columna, muestra):
+    """Ancho según el encabezado y los primeros valores, entre 10 y 50 caracteres."""
+    largo = max([len(str(columna))] + [len(str(v)) for v in muestra.head(100).tolist()])
+    return min(50, max(10, largo + 2))
+
+
+def _columna_xlsx(serie, hoja, fmt_fecha):
+    """(valores Python por fila, función de escritura); los nulos quedan como None y se omiten."""
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        serie = serie.astype(serie.cat.categories.dtype)
+    if pd.api.types.is_bool_dtype(serie):
+        escribir = hoja.write_boolean
+    elif pd.api.types.is_numeric_dtype(serie):
+        escribir = hoja.write_number
+    elif pd.api.types.is_datetime64_any_dtype(serie):
+        if serie.dt.tz is not None:
+            serie = serie.dt.tz_localize(None)
+        valores = [None if pd.isna(v) else v for v in serie.dt.to_pydatetime().tolist()]
+        return valores, lambda fila, col, valor: hoja.write_datetime(fila, col, valor, fmt_fecha)
+    else:
+        # write_string: un texto que empieza con "=" no se convierte en fórmula
+        valores = serie.astype(object).where(serie.notna(), None).tolist()
+        return [None if v is None else str(v) for v in valores], hoja.write_string
+    return serie.astype(object).where(serie.notna(), None).tolist(), escribir
+
+
+def escribir_xlsx(datos, destino, hoja="Datos", anchos=None, alto_encabezado=None):
+    """Escribe una o varias hojas ({nombre: df}) en `destino` (ruta o archivo binario) fila a fila.
+
+    `anchos` es una función (columna, muestra) → ancho. Cada hoja se corta en
+    MAX_FILAS_XLSX filas; retorna las filas escritas por hoja.
+    """
+    # ±inf (divisiones del chat) quedan como error de Excel en vez de abortar write_number
+    libro = xlsxwriter.Workbook(destino, {"constant_memory": True, "nan_inf_to_errors": True})
+    fmt_encabezado = libro.add_format(FORMATO_ENCABEZADO)
+    fmt_cuerpo = libro.add_format(FORMATO_CUERPO)
+    fmt_fecha = libro.add_format(FORMATO_FECHA)
+    escritas = {}
+    for nombre, df in _como_hojas(datos, hoja).items():
+        df = df.iloc[:MAX_FILAS_XLSX]
+        ws = libro.add_worksheet(nombre[:31])
+        if alto_encabezado:
+            ws.set_row(0, alto_encabezado)
+        for col, columna in enumerate(df.columns):
+            ws.write_string(0, col, str(columna), fmt_encabezado)
+            # El formato de columna se aplica a las celdas escritas sin formato propio
+            ws.set_column(col, col, (anchos or _ancho_por_defecto)(columna, df.iloc[:, col]), fmt_cuerpo)
+        fila = 1
+        for tanda in _tandas(df):
+            columnas = [_columna_xlsx(tanda.iloc[:, col], ws, fmt_fecha) for col in range(tanda.shape[1])]
+            escritores = [escribir for _, escribir in columnas]
+            for valores in zip(*(v for v, _ in columnas)):
+                for col, valor in enumerate(valores):
+                    if valor is not None:
+                        escritores[col](fila, col, valor)
+                fila += 1
+        escritas[nombre] = fila - 1
+    libro.close()
+    return escritas
+
+
+def _a_arrow(tanda, esquema=None):
+    """Tanda como tabla Arrow: categorías a sus valores y columnas de tipos mezclados a texto."""
+    columnas = {}
+    for col in tanda.columns:
+        serie = tanda[col]
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            serie = serie.astype(serie.cat.categories.dtype)
+        if pd.api.types.is_object_dtype(serie):
+            # "string" y no "str": en pandas 2 `astype("str")` convierte los nulos en el texto "nan"
+            serie = serie.where(serie.isna(), serie.astype(str)).astype("string")
+        columnas[col] = serie
+    return pa.Table.from_pandas(pd.DataFrame(columnas), schema=esquema, preserve_index=False)
+
+
+def escribir_parquet(df, destino):
+    escritor = None
+    for tanda in _tandas(df):
+        tabla = _a_arrow(tanda, escritor.schema if escritor else None)
+        if escritor is None:
+            escritor = pq.ParquetWriter(destino, tabla.schema, compression="zstd")
+        escritor.write_table(tabla)
+    if escritor is None:
+        pq.write_table(_a_arrow(df), destino, compression="zstd")
+    else:
+        escritor.close()
+    return len(df)
+
+
+def escribir_csv(df, destino):
+    texto = io.TextIOWrapper(destino, encoding="utf-8-sig", newline="")
+    for i, tanda in enumerate(_tandas(df)):
+        tanda.to_csv(texto, header=(i == 0), index=False)
+    if df.empty:
+        df.to_csv(texto, index=False)
+    texto.flush()
+    texto.detach()  # el archivo binario sigue abierto para quien lo lea
+    return len(df)
+
+
+def exportar(datos, formato, destino=None, hoja="Datos", **opciones_xlsx):
+    """Escribe `datos` (DataFrame, o {hoja: df} para xlsx) y retorna el archivo binario al inicio.
+
+    Sin `destino`, el archivo queda en memoria hasta UMBRAL_DISCO_MB y luego
+    en un temporal en disco; quien lo recibe debe cerrarlo.
+    """
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato de exportación desconocido: {formato}")
+    hojas = _como_hojas(datos, hoja)
+    if formato != "xlsx" and len(hojas) != 1:
+        raise ValueError("CSV y Parquet admiten una sola tabla por archivo.")
+    archivo = destino if destino is not None else tempfile.SpooledTemporaryFile(max_size=UMBRAL_DISCO_MB * 1024 * 1024)
+    if formato == "xlsx":
+        escribir_xlsx(hojas, archivo, **opciones_xlsx)
+    elif formato == "csv":
+        escribir_csv(next(iter(hojas.values())), archivo)
+    else:
+        escribir_parquet(next(iter(hojas.values())), archivo)
+    archivo.seek(0)
+    return archivo
+
+
+def exportar_bytes(datos, formato, **opciones):
+    """Contenido exportado como bytes (lo que espera `st.download_button`); el temporal se cierra.
+
+    El archivo completo queda en memoria (ver "Límite" arriba).
+    """
+    with exportar(datos, formato, **opciones) as archivo:
+        return archivo.read()
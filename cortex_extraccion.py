@@ -0,0 +1,339 @@
+import json
+import re
+import io
+import ast
+import hashlib
+import time
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from cortex_archivos import es_subida_invalida
+from cortex_cuota import estimar_tokens, planificador
+from cortex_gemini import cliente, modelo as modelo_gemini
+from cortex_json import LectorJsonIncremental, leer_json_completo
+from cortex_paginas import leer_paginas, preparar_payload
+from cortex_trazas import tokens_de, trazador
+
+# ==========================================
+# NÚCLEO DE EXTRACCIÓN MATRIZ 24 (SIN STREAMLIT)
+# ==========================================
+# Todo lo que vive aquí corre dentro de los hilos del modo lote, por eso
+# no puede tocar `st.*`: la interfaz solo recibe resultados ya armados.
+
+MODELO_EXTRACCION = 'gemini-2.5-flash'
+
+# Modos de lectura de las bases
+MODO_COMPLETO = "completo"    # se sube el PDF entero a Gemini
+MODO_SECCIONES = "secciones"  # solo el texto de las páginas relevantes (ver cortex_paginas)
+
+# Si el recorte deja más campos "NO INDICA" que esto, se repite con el documento completo
+MAX_NO_INDICA_SECCIONES = 8
+
+PROMPT_MATRIZ = """
+            ACTÚA COMO UN AUDITOR EXPERTO EN LICITACIONES PÚBLICAS.
+            Tu tarea es extraer INFORMACIÓN EXACTA para llenar una matriz de 24 columnas.
+            Si un dato no aparece, responde explícitamente "NO INDICA".
+
+            Genera un JSON con las siguientes claves (c01 a c24):
+            1. "c01": ID Licitación.
+            2. "c02": Fecha preguntas y cierre.
+            3. "c03": Plazos licitación.
+            4. "c04": Productos ofertados (Principios activos).
+            5. "c05": Presupuesto institución.
+            6. "c06": Boletas Garantía (Monto/Glosa).
+            7. "c07": Duración contrato.
+            8. "c08": Vigencia mínima propuesta.
+            9. "c09": Reajuste (SI/NO).
+            10. "c10": Suscripción contrato (SI/NO).
+            11. "c11": Anexos admisibilidad.
+            12. "c12": Pauta evaluativa.
+            13. "c13": Requisitos administrativos.
+            14. "c14": Requisitos técnicos.
+            15. "c15": Requisitos económicos.
+            16. "c16": Plazo entrega (inc. emergencia).
+            17. "c17": Monto mínimo.
+            18. "c18": Faltante Cenabast (SI/NO).
+            19. "c19": Glosa Textual Garantía.
+            20. "c20": Vencimiento mínimo ofertar.
+            21. "c21": Canje y condiciones.
+            22. "c22": Causales inadmisibilidad.
+            23. "c23": Formato experiencia (SI/NO).
+            24. "c24": Multas asociadas.
+            """
+
+# Cualquier cambio al texto del prompt invalida la caché de extracciones
+VERSION_PROMPT = hashlib.sha256(PROMPT_MATRIZ.encode("utf-8")).hexdigest()[:12]
+
+# Modo fragmentado: los 24 campos se piden en grupos, en paralelo
+GRUPOS_CAMPOS = {
+    "fechas_plazos": ("c01", "c02", "c03", "c07", "c08", "c16", "c20"),
+    "garantias_multas": ("c06", "c19", "c24"),
+    "requisitos": ("c11", "c12", "c13", "c14", "c15", "c22", "c23"),
+    "productos_presupuesto": ("c04", "c05", "c09", "c10", "c17", "c18", "c21"),
+}
+REINTENTOS_FRAGMENTO = 2  # reintentos de un grupo fallido (los demás no se repiten)
+
+ENCABEZADO_FRAGMENTO = """
+            ACTÚA COMO UN AUDITOR EXPERTO EN LICITACIONES PÚBLICAS.
+            Tu tarea es extraer INFORMACIÓN EXACTA para llenar parte de una matriz de 24 columnas.
+            Si un dato no aparece, responde explícitamente "NO INDICA".
+
+            Genera un JSON SOLO con las siguientes claves:
+"""
+
+_DESCRIPCIONES = dict(re.findall(r'"(c\d\d)": (.+)', PROMPT_MATRIZ))
+
+
+def prompt_fragmento(claves):
+    """Prompt de un grupo: mismo encabezado y mismas descripciones del prompt completo."""
+    return ENCABEZADO_FRAGMENTO + "".join(f'            "{c}": {_DESCRIPCIONES[c]}\n' for c in claves)
+
+
+# Se arman una vez por proceso; cada extracción fragmentada solo los reutiliza
+PROMPTS_FRAGMENTO = {grupo: prompt_fragmento(claves) for grupo, claves in GRUPOS_CAMPOS.items()}
+
+VERSION_FRAGMENTOS = hashlib.sha256("".join(PROMPTS_FRAGMENTO.values()).encode("utf-8")).hexdigest()[:12]
+
+# MAPA DE 24 COLUMNAS
+MAPA_COLUMNAS = {
+    "c01": "1. ID", "c02": "2. Fecha preguntas, fechas de cierre", "c03": "3. Plazos de la licitación",
+    "c04": "4. Productos ofertados", "c05": "5. Presupuesto institución", "c06": "6. Boleta de garantía",
+    "c07": "7. Duración de la licitación", "c08": "8. Vigencia mínima de la propuesta", "c09": "9. Si tiene reajuste la licitación",
+    "c10": "10. Hay suscripción de contrato", "c11": "11. Anexos de admisibilidad", "c12": "12. Pauta evaluativa",
+    "c13": "13. Requisitos administrativos", "c14": "14. Requisitos técnicos", "c15": "15. Requisitos económicos",
+    "c16": "16. Plazo de entrega (inc. emergencia)", "c17": "17. Monto mínimo", "c18": "18. Si es faltante Cenabast",
+    "c19": "19. Detección de glosa a ofertar", "c20": "20. Vencimiento mínimo a ofertar", "c21": "21. Canje y sus condiciones",
+    "c22": "22. Causales de inadmisibilidad", "c23": "23. Solicita formato de experiencia", "c24": "24. Multas asociadas"
+}
+
+
+def limpiar_y_reparar_json(texto):
+    try:
+        texto = re.sub(r'```json', '', texto)
+        texto = re.sub(r'```', '', texto)
+        inicio = texto.find('{')
+        fin = texto.rfind('}') + 1
+        if inicio == -1 or fin == 0: return {}
+        json_str = texto[inicio:fin]
+        return json.loads(json_str, strict=False)
+    except:
+        try: return ast.literal_eval(json_str)
+        except: return {}
+
+
+def _tramo_generate(modelo, partes, streaming):
+    """Tramo "generate": bytes de texto enviados (el PDF subido va por handle y no cuenta)."""
+    enviados = sum(len(p.encode("utf-8")) for p in partes if isinstance(p, str))
+    return trazador().tramo("generate", modelo=modelo, streaming=streaming, bytes=enviados)
+
+
+def _generar_json(prompt, contenido, modelo, al_campo=None):
+    """Llama al modelo (vía el planificador de cuota) y retorna el JSON de la respuesta.
+
+    Con `al_campo` la respuesta se pide en streaming y cada campo se entrega a
+    `al_campo(clave, valor)` apenas se cierra (desde el hilo que extrae).
+    """
+    model = modelo_gemini(modelo)
+    partes = [prompt, contenido]
+    if al_campo is None:
+        with _tramo_generate(modelo, partes, streaming=False) as tramo:
+            response = planificador().llamar(lambda: model.generate_content(partes), estimar_tokens(partes))
+            tramo["tokens_entrada"], tramo["tokens_salida"] = tokens_de(response)
+        return leer_json_completo(response.text) or limpiar_y_reparar_json(response.text)
+
+    lectura = {}
+
+    def consumir_stream():
+        # Un 429 a mitad del stream reintenta desde cero: los campos se vuelven a entregar
+        lector, recibido = LectorJsonIncremental(), []
+        lectura.update(lector=lector, recibido=recibido)
+        response = model.generate_content(partes, stream=True)
+        for pedazo in response:
+            try:
+                texto = pedazo.text
+            except ValueError:
+                continue  # pedazo sin partes de texto (p. ej. solo metadatos de cierre)
+            recibido.append(texto)
+            for clave, valor in lector.alimentar(texto):
+                al_campo(clave, valor)
+        for clave, valor in lector.cerrar():
+            al_campo(clave, valor)
+        return response
+
+    with _tramo_generate(modelo, partes, streaming=True) as tramo:
+        response = planificador().llamar(consumir_stream, estimar_tokens(partes))
+        tramo["tokens_entrada"], tramo["tokens_salida"] = tokens_de(response)
+    return lectura["lector"].campos or limpiar_y_reparar_json("".join(lectura["recibido"]))
+
+
+def _extraer_grupo(grupo, contenido, modelo, al_campo=None):
+    """Un grupo de campos, con reintentos propios; retorna (parcial, segundos)."""
+    claves = GRUPOS_CAMPOS[grupo]
+    t0 = time.perf_counter()
+    error = None
+    for _ in range(1 + REINTENTOS_FRAGMENTO):
+        try:
+            parcial = _generar_json(PROMPTS_FRAGMENTO[grupo], contenido, modelo, al_campo)
+            if any(c in parcial for c in claves):
+                return {c: parcial[c] for c in claves if c in parcial}, time.perf_counter() - t0
+            error = ValueError("respuesta sin las claves pedidas")
+        except Exception as e:
+            error = e
+    raise RuntimeError(f"Grupo '{grupo}' falló tras {1 + REINTENTOS_FRAGMENTO} intentos: {error}")
+
+
+def _extraer(contenido, modelo, fragmentado, al_campo=None):
+    """(datos_raw, segundos por llamada) desde un archivo subido o un texto."""
+    if not fragmentado:
+        t0 = time.perf_counter()
+        datos_raw = _generar_json(PROMPT_MATRIZ, contenido, modelo, al_campo)
+        return datos_raw, {"matriz": time.perf_counter() - t0}
+
+    datos_raw, tiempos = {}, {}
+    with ThreadPoolExecutor(max_workers=len(GRUPOS_CAMPOS)) as pool:
+        # Cada grupo hereda el usuario del hilo que extrae (cuota justa por usuario)
+        futuros = {
+            pool.submit(contextvars.copy_context().run, _extraer_grupo, grupo, contenido, modelo, al_campo): grupo
+            for grupo in GRUPOS_CAMPOS
+        }
+        for futuro in as_completed(futuros):
+            parcial, tiempos[futuros[futuro]] = futuro.result()
+            datos_raw.update(parcial)
+    return datos_raw, tiempos
+
+
+def _extraer_documento_completo(pdf_bytes, modelo, fragmentado, al_campo=None, archivos=None):
+    """Extracción sobre el PDF subido a Gemini (desde memoria, sin archivo temporal).
+
+    Con `archivos` (ver cortex_archivos) el handle se reutiliza entre reintentos
+    y re-ejecuciones; sin él, se sube y se borra en cada llamada.
+    """
+    if archivos is None:
+        archivo_gemini = cliente().upload_file(io.BytesIO(pdf_bytes), mime_type="application/pdf")
+        try:
+            return _extraer(archivo_gemini, modelo, fragmentado, al_campo)
+        finally:
+            # === AUTO-LIMPIEZA ===
+            archivo_gemini.delete()
+
+    archivo_gemini = archivos.obtener(pdf_bytes)
+    try:
+        return _extraer(archivo_gemini, modelo, fragmentado, al_campo)
+    except Exception as error:
+        # Un handle vencido o borrado no se vuelve a usar; otros errores no lo tocan
+        if es_subida_invalida(error):
+            archivos.invalidar(pdf_bytes, archivo_gemini)
+        raise
+
+
+def _extraer_texto(texto, modelo, fragmentado, al_campo=None):
+    return _extraer("TEXTO DE LAS BASES (páginas relevantes):\n\n" + texto, modelo, fragmentado, al_campo)
+
+
+def contar_no_indica(datos_raw):
+    """Campos c01..c24 ausentes o respondidos como "NO INDICA"."""
+    return sum(
+        1 for clave in MAPA_COLUMNAS
+        if not str(datos_raw.get(clave, "")).strip() or "no indica" in str(datos_raw.get(clave, "")).lower()
+    )
+
+
+def extraer_matriz_detallada(pdf_bytes, modelo=MODELO_EXTRACCION, modo=MODO_COMPLETO, fragmentado=False, al_campo=None,
+                             archivos=None):
+    """Como `extraer_matriz`, pero retorna (datos_raw, detalle).
+
+    `detalle` trae el modo efectivo, el payload enviado, los segundos de cada
+    llamada al modelo (una por grupo en modo fragmentado) y el total; en modo
+    secciones, también el texto de cada página (`texto_paginas`).
+    Con `al_campo(clave, valor)` los campos se entregan en streaming; con
+    `archivos` el PDF subido se reutiliza (ver `_extraer_documento_completo`).
+    """
+    t0 = time.perf_counter()
+    extra = {}
+    if modo == MODO_SECCIONES:
+        with trazador().tramo("prompt", modo=MODO_SECCIONES, bytes=len(pdf_bytes)) as tramo:
+            paginas = leer_paginas(pdf_bytes) or []
+            payload = preparar_payload(pdf_bytes, paginas)
+            if payload is not None:
+                tramo.update(bytes=payload["bytes_payload"], paginas=len(payload["paginas_enviadas"]),
+                             paginas_totales=payload["paginas_totales"])
+        # El texto ya extraído viaja en el detalle para que el índice de búsqueda no lo extraiga de nuevo
+        extra["texto_paginas"] = paginas
+        if payload is not None:
+            datos_raw, tiempos = _extraer_texto(payload["texto"], modelo, fragmentado, al_campo)
+            detalle = {k: v for k, v in payload.items() if k != "texto"}
+            if datos_raw and contar_no_indica(datos_raw) <= MAX_NO_INDICA_SECCIONES:
+                return datos_raw, dict(detalle, **extra, modo=MODO_SECCIONES, tiempos=tiempos, segundos=time.perf_counter() - t0)
+            # Recorte insuficiente: se cae al documento completo
+    datos_raw, tiempos = _extraer_documento_completo(pdf_bytes, modelo, fragmentado, al_campo, archivos)
+    return datos_raw, {**extra, "modo": MODO_COMPLETO, "bytes_payload": len(pdf_bytes), "tiempos": tiempos,
+                       "segundos": time.perf_counter() - t0}
+
+
+def extraer_matriz(pdf_bytes, modelo=MODELO_EXTRACCION, modo=MODO_COMPLETO, fragmentado=False):
+    """Retorna el JSON crudo c01..c24 (datos_raw) de unas bases en PDF.
+
+    En modo secciones se envía solo el texto de las páginas relevantes; si el PDF
+    no tiene texto, el recorte no ahorra o deja demasiados campos sin respuesta,
+    se usa el documento completo. Con `fragmentado=True` los campos se piden por
+    grupos (GRUPOS_CAMPOS) en paralelo y se fusionan.
+    """
+    return extraer_matriz_detallada(pdf_bytes, modelo, modo, fragmentado)[0]
+
+
+def clave_extraccion(pdf_bytes, modelo=MODELO_EXTRACCION, modo=MODO_COMPLETO, fragmentado=False):
+    """Huella de contenido: bytes del PDF + versión del prompt + modelo (+ modo y fragmentos, si aplican)."""
+    h = hashlib.sha256(pdf_bytes)
+    h.update(VERSION_PROMPT.encode("utf-8"))
+    h.update(modelo.encode("utf-8"))
+    if modo != MODO_COMPLETO:
+        h.update(modo.encode("utf-8"))
+    if fragmentado:
+        h.update(f"fragmentado:{VERSION_FRAGMENTOS}".encode("utf-8"))
+    return h.hexdigest()
+
+
+def extraer_matriz_cacheada(pdf_bytes, cache, forzar=False, modelo=MODELO_EXTRACCION, modo=MODO_COMPLETO, fragmentado=False,
+                            al_campo=None, archivos=None):
+    """Como `extraer_matriz_detallada`, pero consulta primero la caché en disco.
+
+    Retorna (datos_raw, desde_cache, detalle); `detalle` es None si vino de la
+    caché. Con `forzar=True` se re-extrae y se sobrescribe la entrada. Un JSON
+    vacío (respuesta irreparable) no se guarda.
+    """
+    clave = clave_extraccion(pdf_bytes, modelo, modo, fragmentado)
+    if not forzar:
+        guardado = cache.obtener(clave)
+        if guardado is not None:
+            return guardado["datos_raw"], True, None
+
+    datos_raw, detalle = extraer_matriz_detallada(pdf_bytes, modelo, modo, fragmentado, al_campo, archivos)
+    if datos_raw:
+        cache.guardar(clave, {"datos_raw": datos_raw, "modelo": modelo, "modo": modo, "fragmentado": fragmentado,
+                              "version_prompt": VERSION_PROMPT, "creado": time.time()})
+    return datos_raw, False, detalle
+
+
+def mapear_fila(datos_raw):
+    """Traduce las claves cXX a los títulos de la matriz Excel."""
+    datos_finales = {}
+    for clave_json, titulo_excel in MAPA_COLUMNAS.items():
+        datos_finales[titulo_excel] = datos_raw.get(clave_json, "No detectado")
+    return datos_finales
+
+
+def _ancho_matriz(columna, muestra):
+    return 40 if "inadmisibilidad" in str(columna).lower() else 25
+
+
+def construir_excel_matriz(filas):
+    """Arma la hoja 'Matriz_Cortex' con una fila por licitación."""
+    # pandas y xlsxwriter recién al exportar: la app no los carga para mostrar el login
+    import pandas as pd
+
+    from cortex_export import exportar
+
+    df = pd.DataFrame(filas)
+    columnas_ordenadas = list(MAPA_COLUMNAS.values())
+    df = df.reindex(columns=columnas_ordenadas)
+    return exportar(df, "xlsx", destino=io.BytesIO(), hoja='Matriz_Cortex', anchos=_ancho_matriz, alto_encabezado=50)
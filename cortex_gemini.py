@@ -0,0 +1,51 @@
+import threading
+
+# ==========================================
+# CLIENTE DE GEMINI ÚNICO POR PROCESO
+# ==========================================
+# `import google.generativeai` tarda cerca de un segundo (gRPC, protobuf) y las
+# apps lo pagaban en cada arranque en frío, antes de mostrar el login; además
+# `genai.configure` y `GenerativeModel` se repetían en cada rerun o extracción.
+# Aquí el módulo se importa recién al primer uso, la API key se aplica una
+# sola vez (y de nuevo solo si cambia) y cada modelo se crea una vez y lo
+# comparten todas las sesiones e hilos (el cliente gRPC es thread-safe).
+
+MODELO_POR_DEFECTO = "gemini-2.5-flash"
+
+_lock = threading.Lock()
+_clave = None       # la última pedida con configurar()
+_aplicada = None    # la que tiene genai.configure
+_modelos = {}
+
+
+def configurar(api_key):
+    """Registra la API key; se aplica con `genai.configure` al primer uso (no importa nada aquí)."""
+    global _clave
+    with _lock:
+        _clave = api_key
+
+
+def cliente():
+    """El módulo `google.generativeai`, importado y configurado con la última API key registrada.
+
+    Sin key registrada se deja la configuración que ya tenga el módulo (CLI y benchmarks).
+    """
+    global _aplicada
+    import google.generativeai as genai
+
+    with _lock:
+        if _clave is not None and _clave != _aplicada:
+            genai.configure(api_key=_clave)
+            _aplicada = _clave
+            # Los modelos guardan su cliente gRPC al primer uso: con otra key se crean de nuevo
+            _modelos.clear()
+    return genai
+
+
+def modelo(nombre=MODELO_POR_DEFECTO):
+    """`GenerativeModel` compartido por nombre."""
+    genai = cliente()
+    with _lock:
+        if nombre not in _modelos:
+            _modelos[nombre] = genai.GenerativeModel(nombre)
+        return _modelos[nombre]
@@ -0,0 +1,276 @@
+import argparse
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from cortex_paginas import leer_paginas
+from cortex_trazas import trazador
+
+# ==========================================
+# ÍNDICE DE TEXTO COMPLETO DE LICITACIONES AUDITADAS (SQLITE FTS5)
+# ==========================================
+# Cada extracción queda en un índice local: los 24 campos de la matriz y el
+# texto de cada página de las bases. Así se puede preguntar "qué bases hablan
+# de canje" sin volver a auditar PDFs.
+#
+# - Una sola tabla FTS5 `fragmentos` (id, origen, texto): origen es "c01".."c24"
+#   para un campo o "p<N>" para la página N, de modo que el ranking BM25 y los
+#   snippets salen de una consulta y se sabe de dónde viene cada acierto.
+# - El tokenizador ignora tildes y mayúsculas ("garantia" encuentra "Garantía").
+# - La licitación se identifica por su ID (c01); si el modelo no lo encontró,
+#   por la huella del PDF. Re-indexar el mismo PDF o el mismo ID reemplaza la
+#   entrada anterior (el texto sin campos de un backfill se completa después).
+
+ORIGEN_PAGINAS = "paginas"
+TOKENIZADOR = "unicode61 remove_diacritics 2"
+ACIERTOS_POR_LICITACION = 3
+_SIN_ID = re.compile(r"^\s*$|no indica|no detectado", re.IGNORECASE)
+_OPERADORES = re.compile(r'["*:(){}^]|\b(?:AND|OR|NOT|NEAR)\b')
+_PALABRA = re.compile(r"\w+", re.UNICODE)
+
+_log = logging.getLogger("cortex.indice")
+
+
+def ruta_indice():
+    """Archivo del índice: CORTEX_INDICE_DB o <CORTEX_CACHE_DIR>/indice.sqlite3."""
+    return os.environ.get("CORTEX_INDICE_DB", os.path.join(os.environ.get("CORTEX_CACHE_DIR", ".cortex_cache"), "indice.sqlite3"))
+
+
+def huella_pdf(pdf_bytes):
+    return hashlib.sha256(pdf_bytes).hexdigest()
+
+
+def id_licitacion(datos_raw, huella):
+    """ID de la licitación (c01) o, si el modelo no lo encontró, uno derivado de la huella del PDF."""
+    valor = str(datos_raw.get("c01", "")) if datos_raw else ""
+    return f"sin-id-{huella[:12]}" if _SIN_ID.search(valor) else valor.strip()
+
+
+def consulta_fts(texto):
+    """Texto del usuario como consulta FTS5: cada palabra como prefijo y todas obligatorias.
+
+    Si el texto ya trae sintaxis FTS5 (comillas, AND/OR/NOT, NEAR, *) se usa tal cual.
+    """
+    if _OPERADORES.search(texto):
+        return texto
+    return " ".join(f'"{p}"*' for p in _PALABRA.findall(texto))
+
+
+def _como_texto(valor):
+    return valor if isinstance(valor, str) else json.dumps(valor, ensure_ascii=False)
+
+
+class IndiceLicitaciones:
+    """Índice FTS5 de campos y páginas por licitación, compartido entre sesiones y procesos."""
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self._lock = threading.Lock()
+        if os.path.dirname(ruta):
+            os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        with self._conexion() as con:
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute(
+                "CREATE TABLE IF NOT EXISTS licitaciones (id TEXT PRIMARY KEY, huella TEXT UNIQUE, nombre TEXT, "
+                "campos INTEGER, paginas INTEGER, indexado REAL, datos TEXT, rowid_desde INTEGER, rowid_hasta INTEGER)"
+            )
+            con.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS fragmentos USING fts5(id UNINDEXED, origen UNINDEXED, texto, "
+                        f"tokenize='{TOKENIZADOR}')")
+
+    @contextlib.contextmanager
+    def _conexion(self):
+        con = sqlite3.connect(self.ruta, timeout=30)
+        try:
+            with con:  # commit al salir, rollback si hay excepción
+                yield con
+        finally:
+            con.close()
+
+    def contiene(self, huella, con_campos=False):
+        """¿Ya está este PDF? Con `con_campos`, solo cuenta si además tiene la matriz indexada."""
+        with self._conexion() as con:
+            fila = con.execute("SELECT campos FROM licitaciones WHERE huella = ?", (huella,)).fetchone()
+        return fila is not None and (not con_campos or fila[0] > 0)
+
+    def indexar(self, datos_raw, paginas, huella, nombre=None):
+        """Guarda (o reemplaza) una licitación: campos c01..c24 de `datos_raw` y el texto de cada página."""
+        datos_raw = datos_raw or {}
+        id_ = id_licitacion(datos_raw, huella)
+        filas = [(id_, clave, _como_texto(valor)) for clave, valor in sorted(datos_raw.items()) if _como_texto(valor).strip()]
+        filas += [(id_, f"p{n}", texto) for n, texto in enumerate(paginas or [], start=1) if texto.strip()]
+        with self._lock, self._conexion() as con:
+            # Escritura exclusiva desde el inicio: otro proceso no puede tomar el mismo MAX(rowid) entre la lectura y el insert
+            con.execute("BEGIN IMMEDIATE")
+            # Los fragmentos de una licitación ocupan un rango contiguo de rowids: borrarlos no recorre el índice
+            anteriores = con.execute(
+                "SELECT id, rowid_desde, rowid_hasta FROM licitaciones WHERE huella = ? OR id = ?", (huella, id_)
+            ).fetchall()
+            for anterior, desde, hasta in anteriores:
+                con.execute("DELETE FROM fragmentos WHERE rowid BETWEEN ? AND ?", (desde, hasta))
+                con.execute("DELETE FROM licitaciones WHERE id = ?", (anterior,))
+            desde = con.execute("SELECT COALESCE(MAX(rowid), 0) + 1 FROM fragmentos").fetchone()[0]
+            con.execute(
+                "INSERT INTO licitaciones VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (id_, huella, nombre, len(datos_raw), len(paginas or []), time.time(),
+                 json.dumps(datos_raw, ensure_ascii=False), desde, desde + len(filas) - 1),
+            )
+            con.executemany("INSERT INTO fragmentos (rowid, id, origen, texto) VALUES (?, ?, ?, ?)",
+                            [(desde + i, *fila) for i, fila in enumerate(filas)])
+        return id_
+
+    def indexar_pdf(self, pdf_bytes, datos_raw, nombre=None, forzar=False, paginas=None):
+        """Indexa unas bases ya auditadas; si ya estaban, no hace nada.
+
+        `paginas` es el texto por página si ya se extrajo (modo secciones); si no, se extrae aquí.
+        """
+        huella = huella_pdf(pdf_bytes)
+        if not forzar and self.contiene(huella, con_campos=bool(datos_raw)):
+            return None
+        with trazador().tramo("index", bytes=len(pdf_bytes)) as tramo:
+            if paginas is None:
+                # PDF que pypdf no lee (el error queda en el log): se indexan solo los campos
+                paginas = leer_paginas(pdf_bytes) or []
+            tramo["paginas"] = len(paginas)
+            if not datos_raw and not any(p.strip() for p in paginas):
+                raise ValueError("el PDF no tiene texto ni matriz extraída que indexar")
+            return self.indexar(datos_raw, paginas, huella, nombre)
+
+    def buscar(self, texto, limite=20, origenes=None):
+        """Licitaciones que calzan con `texto`, de la más a la menos relevante (BM25).
+
+        `origenes` restringe la búsqueda a campos ("c22", "c24"...) y/o a
+        ORIGEN_PAGINAS. Cada resultado trae id, nombre, puntaje (más alto =
+        más relevante) y hasta ACIERTOS_POR_LICITACION aciertos (origen, fragmento).
+        """
+        consulta = consulta_fts(texto)
+        if not consulta:
+            return []
+        filtro, parametros = "", []
+        if origenes:
+            campos = [o for o in origenes if o != ORIGEN_PAGINAS]
+            filtros = [f"origen IN ({', '.join('?' * len(campos))})"] if campos else []
+            if ORIGEN_PAGINAS in origenes:
+                filtros.append("origen LIKE 'p%'")
+            filtro, parametros = f" AND ({' OR '.join(filtros)})", campos
+        # ORDER BY rank lo resuelve FTS5: el snippet se arma solo para las filas que se devuelven
+        sql = ("SELECT id, origen, snippet(fragmentos, 2, '**', '**', '…', 16), rank FROM fragmentos "
+               f"WHERE fragmentos MATCH ?{filtro} ORDER BY rank LIMIT ?")
+        candidatos = limite * ACIERTOS_POR_LICITACION * 4
+        with self._conexion() as con:
+            try:
+                filas = con.execute(sql, [consulta, *parametros, candidatos]).fetchall()
+            except sqlite3.OperationalError:
+                # Sintaxis FTS5 inválida escrita a mano: se busca como palabras sueltas
+                consulta = " ".join(f'"{p}"*' for p in _PALABRA.findall(texto) if p not in ("AND", "OR", "NOT", "NEAR"))
+                filas = con.execute(sql, [consulta, *parametros, candidatos]).fetchall() if consulta else []
+
+            resultados = {}
+            for id_, origen, fragmento, puntaje in filas:
+                if id_ not in resultados:
+                    if len(resultados) == limite:
+                        continue
+                    resultados[id_] = {"id": id_, "nombre": None, "puntaje": -puntaje, "aciertos": []}
+                if len(resultados[id_]["aciertos"]) < ACIERTOS_POR_LICITACION:
+                    resultados[id_]["aciertos"].append((origen, fragmento))
+            if resultados:
+                marcadores = ", ".join("?" * len(resultados))
+                for id_, nombre in con.execute(f"SELECT id, nombre FROM licitaciones WHERE id IN ({marcadores})", list(resultados)):
+                    resultados[id_]["nombre"] = nombre
+        return list(resultados.values())
+
+    def obtener(self, id_):
+        """datos_raw (c01..c24) guardados para una licitación, o None."""
+        with self._conexion() as con:
+            fila = con.execute("SELECT datos FROM licitaciones WHERE id = ?", (id_,)).fetchone()
+        return json.loads(fila[0]) if fila else None
+
+    def estadisticas(self):
+        with self._conexion() as con:
+            licitaciones, con_campos, paginas = con.execute(
+                "SELECT COUNT(*), COALESCE(SUM(campos > 0), 0), COALESCE(SUM(paginas), 0) FROM licitaciones"
+            ).fetchone()
+        return {"licitaciones": licitaciones, "con_campos": con_campos, "paginas": paginas}
+
+
+def indexar_carpeta(indice, carpeta, extraer=None, paralelo=4, forzar=False, al_avanzar=None):
+    """Backfill: indexa cada PDF de `carpeta` (y subcarpetas).
+
+    `extraer(pdf_bytes)` retorna datos_raw (p. ej. la extracción con caché);
+    sin él se indexa solo el texto de las páginas, sin llamar al modelo.
+    `al_avanzar(ruta, id_o_None, error_o_None)` se llama al terminar cada PDF.
+    Retorna {"indexados", "omitidos", "errores": {ruta: mensaje}}.
+    """
+    rutas = sorted(
+        os.path.join(raiz, nombre)
+        for raiz, _, nombres in os.walk(carpeta) for nombre in nombres if nombre.lower().endswith(".pdf")
+    )
+
+    def procesar(ruta):
+        with open(ruta, "rb") as f:
+            pdf_bytes = f.read()
+        if not forzar and indice.contiene(huella_pdf(pdf_bytes), con_campos=extraer is not None):
+            return None
+        datos_raw = extraer(pdf_bytes) if extraer is not None else {}
+        return indice.indexar_pdf(pdf_bytes, datos_raw, os.path.relpath(ruta, carpeta), forzar=True)
+
+    resumen = {"indexados": 0, "omitidos": 0, "errores": {}}
+    with ThreadPoolExecutor(max_workers=max(1, paralelo)) as pool:
+        futuros = {pool.submit(procesar, ruta): ruta for ruta in rutas}
+        for futuro in as_completed(futuros):
+            ruta = futuros[futuro]
+            try:
+                id_, error = futuro.result(), None
+                resumen["indexados" if id_ else "omitidos"] += 1
+            except Exception as e:
+                id_, error = None, e
+                resumen["errores"][ruta] = f"{type(e).__name__}: {e}"
+            if al_avanzar is not None:
+                al_avanzar(ruta, id_, error)
+    return resumen
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Indexa una carpeta de bases en PDF en el índice de búsqueda de Cortex.")
+    parser.add_argument("carpeta")
+    parser.add_argument("--solo-texto", action="store_true", help="indexa el texto de las páginas sin extraer la matriz")
+    parser.add_argument("--modo", choices=["completo", "secciones"], default="secciones")
+    parser.add_argument("--paralelo", type=int, default=4)
+    parser.add_argument("--forzar", action="store_true", help="re-indexa también los PDF que ya están")
+    args = parser.parse_args()
+
+    extraer = None
+    if not args.solo_texto:
+        from cortex_cache import CacheDisco
+        from cortex_extraccion import extraer_matriz_cacheada
+        from cortex_gemini import configurar
+
+        if "GOOGLE_API_KEY" not in os.environ:
+            parser.error("falta GOOGLE_API_KEY en el entorno (o usa --solo-texto)")
+        configurar(os.environ["GOOGLE_API_KEY"])
+        # La misma caché que la app: las bases ya auditadas no vuelven a pasar por el modelo
+        cache = CacheDisco(os.path.join(os.environ.get("CORTEX_CACHE_DIR", ".cortex_cache"), "extracciones"),
+                           max_bytes=200 * 1024 * 1024, max_edad_s=30 * 24 * 3600)
+        extraer = lambda pdf_bytes: extraer_matriz_cacheada(pdf_bytes, cache, modo=args.modo)[0]
+
+    indice = IndiceLicitaciones(ruta_indice())
+
+    def al_avanzar(ruta, id_, error):
+        estado = f"error: {error}" if error else (id_ or "ya indexado")
+        print(f"{ruta}: {estado}", file=sys.stderr)
+
+    t0 = time.perf_counter()
+    resumen = indexar_carpeta(indice, args.carpeta, extraer, args.paralelo, args.forzar, al_avanzar)
+    print(f"{resumen['indexados']} indexados, {resumen['omitidos']} omitidos, {len(resumen['errores'])} con error "
+          f"en {time.perf_counter() - t0:.1f} s · {indice.estadisticas()}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+import argparse
+import codecs
+import contextvars
+import os
+import sys
+
+import pandas as pd
+
+from cortex_datos import (COLUMNAS_TEXTO_POR_TIPO, columnas_requeridas, detectar_codificacion, detectar_tipo_reporte,
+                          sanear_y_mapear)
+from cortex_radar import RadarCompetencia
+from cortex_trazas import trazador
+
+# ==========================================
+# INGESTA POR TANDAS DE CSV MÁS GRANDES QUE LA MEMORIA
+# ==========================================
+# Un export anual de Órdenes de Compra pesa varios GB: como DataFrame no cabe
+# en RAM. Aquí el CSV se recorre por tandas de FILAS_POR_TANDA filas:
+# - la codificación se detecta una vez con muestras (cortex_datos), sin el
+#   reintento en latin1 que volvía a leer todo el archivo; un byte inválido
+#   fuera de las muestras se reemplaza por "�" y se cuenta (`bytes_invalidos`
+#   del reporte), para que la app avise en vez de alterar el texto en silencio;
+# - cada tanda se sanea con el mismo motor (limpiar_numeros / limpiar_fechas)
+#   y se descarta: en memoria solo quedan agregados parciales y los valores
+#   distintos de montos y fechas ya parseados (cada uno se parsea una vez);
+# - el radar (RadarCompetencia) y los totales por proveedor y por comprador
+#   (TotalesPorClave) se acumulan con `agregar` y se combinan con `fusionar`,
+#   así que varios archivos o trozos procesados por separado se suman sin
+#   recalcular nada;
+# - el avance se informa en bytes leídos del archivo, no en filas (el total
+#   de filas no se conoce hasta el final).
+# El reporte resultante no tiene `df`: el chat y la bodega necesitan las
+# filas completas, así que la app muestra solo radar y totales.
+
+FILAS_POR_TANDA = int(os.environ.get("CORTEX_FILAS_POR_TANDA", 200_000))
+UMBRAL_TANDAS_MB = int(os.environ.get("CORTEX_CSV_TANDAS_MB", 100))
+ERRORES_CODIFICACION = "cortex_reemplazar_y_contar"
+
+# Contador de la lectura en curso: cada hilo (sesión) tiene su propio contexto
+_invalidos = contextvars.ContextVar("bytes_invalidos", default=None)
+
+
+def _reemplazar_y_contar(error):
+    contador = _invalidos.get()
+    if contador is not None:
+        contador[0] += error.end - error.start
+    return "\ufffd", error.end
+
+
+codecs.register_error(ERRORES_CODIFICACION, _reemplazar_y_contar)
+
+
+class TotalesPorClave:
+    """Monto y registros por valor de una columna (proveedor, comprador), acumulables por tandas."""
+
+    def __init__(self, columna, MONT_COL=None):
+        self.columna = columna
+        self.MONT_COL = MONT_COL
+        self._registros = pd.Series(dtype="float64")
+        self._monto = pd.Series(dtype="float64")
+
+    def agregar(self, df):
+        """Suma una tanda; las claves nulas se ignoran, como en un groupby."""
+        grupos = df.groupby(self.columna, observed=True, sort=False)
+        self._registros = self._registros.add(grupos.size(), fill_value=0)
+        if self.MONT_COL:
+            self._monto = self._monto.add(grupos[self.MONT_COL].sum(), fill_value=0)
+        return self
+
+    def fusionar(self, otro):
+        """Combina los totales de otro acumulador de la misma columna."""
+        self._registros = self._registros.add(otro._registros, fill_value=0)
+        self._monto = self._monto.add(otro._monto, fill_value=0)
+        return self
+
+    def tabla(self, limite=None):
+        """Una fila por clave con Monto y Registros, de mayor a menor monto (o registros, sin monto)."""
+        tabla = pd.DataFrame({"Registros": self._registros.astype("int64")})
+        orden = "Registros"
+        if self.MONT_COL:
+            tabla.insert(0, "Monto", self._monto.reindex(tabla.index, fill_value=0))
+            orden = "Monto"
+        tabla = tabla.rename_axis(self.columna).sort_values(orden, ascending=False, kind="stable").reset_index()
+        return tabla if limite is None else tabla.head(limite)
+
+
+def es_csv_grande(nombre, tamano_bytes, umbral_mb=UMBRAL_TANDAS_MB):
+    """True si el archivo es un CSV que conviene ingerir por tandas."""
+    return nombre.lower().endswith("csv") and tamano_bytes > umbral_mb * 1024 * 1024
+
+
+def leer_csv_por_tandas(archivo, columnas=None, tipo_reporte=None, filas_por_tanda=FILAS_POR_TANDA, al_avanzar=None,
+                        invalidos=None):
+    """Genera las tandas (columnas sin espacios sobrantes) de un CSV binario y seekable.
+
+    `al_avanzar(bytes_leidos, bytes_totales)` se llama tras cada tanda. Los bytes
+    que no son de la codificación detectada se reemplazan por "�" y se suman en
+    `invalidos[0]` (una lista de un elemento).
+    """
+    total = archivo.seek(0, os.SEEK_END)
+    archivo.seek(0)
+    codificacion = detectar_codificacion(archivo)
+    # Un byte suelto fuera de las muestras no aborta una lectura de varios GB, pero queda contado
+    opciones = {"encoding": codificacion, "chunksize": filas_por_tanda, "encoding_errors": ERRORES_CODIFICACION}
+    if columnas is not None:
+        crudos = [c for c in pd.read_csv(archivo, encoding=codificacion, nrows=0).columns if str(c).strip() in columnas]
+        texto = set(COLUMNAS_TEXTO_POR_TIPO.get(tipo_reporte, []))
+        opciones.update(usecols=crudos, dtype={c: str for c in crudos if str(c).strip() in texto})
+        archivo.seek(0)
+    contador = invalidos if invalidos is not None else [0]
+    with pd.read_csv(archivo, **opciones) as lector:
+        while True:
+            # El contador se activa solo mientras pandas decodifica (el generador se pausa entre tandas)
+            token = _invalidos.set(contador)
+            try:
+                tanda = next(lector, None)
+            finally:
+                _invalidos.reset(token)
+            if tanda is None:
+                break
+            tanda.columns = [str(c).strip() for c in tanda.columns]
+            if al_avanzar is not None:
+                # El lector va un bloque por delante: la posición del archivo es lo ya consumido
+                al_avanzar(min(archivo.tell(), total), total)
+            yield tanda
+    if al_avanzar is not None:
+        al_avanzar(total, total)
+
+
+def ingerir_csv_por_tandas(archivo, nombre, columnas_extra=(), filas_por_tanda=FILAS_POR_TANDA, al_avanzar=None):
+    """Radar y totales de un CSV recorrido por tandas; retorna un reporte sin `df` (ver arriba)."""
+    trazas = trazador()
+    archivo.seek(0)
+    encabezados = [str(c).strip() for c in pd.read_csv(archivo, encoding=detectar_codificacion(archivo), nrows=0).columns]
+    archivo.seek(0)
+    tipo_reporte = detectar_tipo_reporte(encabezados)
+    columnas = columnas_requeridas(tipo_reporte, encabezados, columnas_extra)
+
+    radar = proveedores = compradores = None
+    col_map_final, cols, filas, tandas = {}, {}, 0, 0
+    memorias = {}  # montos y fechas ya parseados (y el formato numérico), por columna
+    invalidos = [0]
+    with trazas.tramo("read", archivo=nombre, modo="tandas", tipo_reporte=tipo_reporte) as tramo:
+        for tanda in leer_csv_por_tandas(archivo, columnas, tipo_reporte, filas_por_tanda, al_avanzar, invalidos):
+            tanda, col_map_final, cols_detalle_prod = sanear_y_mapear(tanda, tipo_reporte, memorias)
+            if tandas == 0:
+                cols = {
+                    "MONT_COL": col_map_final.get('MONTO_REAL'),
+                    "PROV_COL": col_map_final.get('PROVEEDOR_CLAVE'),
+                    "COMP_COL": col_map_final.get('COMPRADOR_CLAVE'),
+                    "ID_COL": col_map_final.get('ID_CLAVE'),
+                    "FECHA_COL": col_map_final.get('FECHA_CLAVE'),
+                    "COLS_PROD": [c for c in cols_detalle_prod if c in tanda.columns],
+                }
+                # El radar guarda una fila por negocio: solo con las columnas que muestra la app
+                visibles = [c for c in [cols["ID_COL"], cols["COMP_COL"], *cols["COLS_PROD"][:2], cols["PROV_COL"], cols["MONT_COL"]] if c]
+                if cols["ID_COL"] and cols["PROV_COL"]:
+                    radar = RadarCompetencia(cols["PROV_COL"], cols["ID_COL"])
+                proveedores = TotalesPorClave(cols["PROV_COL"], cols["MONT_COL"]) if cols["PROV_COL"] else None
+                compradores = TotalesPorClave(cols["COMP_COL"], cols["MONT_COL"]) if cols["COMP_COL"] else None
+            if radar is not None:
+                radar.agregar(tanda[visibles])
+            for totales in (proveedores, compradores):
+                if totales is not None:
+                    totales.agregar(tanda)
+            filas += len(tanda)
+            tandas += 1
+        tramo.update(filas=filas, bytes=archivo.tell(), tandas=tandas, bytes_invalidos=invalidos[0])
+
+    return {
+        "df": None,
+        "tipo_reporte": tipo_reporte,
+        "encabezados": encabezados,
+        "col_map_final": col_map_final,
+        **cols,
+        "radar": radar,
+        "unicornios_df": radar.con_competidores(1) if radar is not None else None,
+        "baja_comp_df": radar.con_competidores(2) if radar is not None else None,
+        "totales_proveedor": proveedores.tabla() if proveedores is not None else None,
+        "totales_comprador": compradores.tabla() if compradores is not None else None,
+        "filas": filas,
+        "tandas": tandas,
+        "bytes_invalidos": invalidos[0],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Radar y totales de un export CSV de Mercado Público, leído por tandas.")
+    parser.add_argument("archivo")
+    parser.add_argument("--filas-por-tanda", type=int, default=FILAS_POR_TANDA)
+    parser.add_argument("--top", type=int, default=10, help="proveedores y compradores a mostrar")
+    parser.add_argument("--salida", help="directorio donde dejar radar y totales en Parquet")
+    args = parser.parse_args()
+
+    def al_avanzar(leidos, total):
+        print(f"\r{leidos / 1e6:,.0f} / {total / 1e6:,.0f} MB ({leidos / max(total, 1):.0%})", end="", file=sys.stderr)
+
+    with open(args.archivo, "rb") as archivo:
+        reporte = ingerir_csv_por_tandas(archivo, os.path.basename(args.archivo), filas_por_tanda=args.filas_por_tanda,
+                                         al_avanzar=al_avanzar)
+    print(file=sys.stderr)
+    print(f"{reporte['tipo_reporte']}: {reporte['filas']:,} filas en {reporte['tandas']} tandas")
+    if reporte["bytes_invalidos"]:
+        print(f"⚠️ {reporte['bytes_invalidos']:,} bytes no eran texto válido y se reemplazaron por '�'", file=sys.stderr)
+    if reporte["unicornios_df"] is not None:
+        print(f"Negocios con 1 proveedor: {len(reporte['unicornios_df']):,} · con 2: {len(reporte['baja_comp_df']):,}")
+    for titulo, clave in (("Proveedores", "totales_proveedor"), ("Compradores", "totales_comprador")):
+        if reporte[clave] is not None:
+            print(f"\n{titulo} ({len(reporte[clave]):,}):")
+            print(reporte[clave].head(args.top).to_string(index=False))
+
+    if args.salida:
+        from cortex_export import exportar
+
+        os.makedirs(args.salida, exist_ok=True)
+        for clave in ("unicornios_df", "baja_comp_df", "totales_proveedor", "totales_comprador"):
+            if reporte[clave] is not None:
+                with open(os.path.join(args.salida, f"{clave}.parquet"), "wb") as destino:
+                    exportar(reporte[clave], "parquet", destino=destino)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+import ast
+import json
+import re
+
+# ==========================================
+# LECTOR JSON INCREMENTAL (RESPUESTAS EN STREAMING)
+# ==========================================
+# La matriz llega como un objeto JSON plano {"c01": "...", ...} generado de a
+# pedazos. Este lector recibe los pedazos a medida que llegan y entrega cada
+# par clave/valor apenas su valor se cierra, sin esperar el final del texto.
+# Es tolerante a lo que Gemini suele devolver: cercos ```json, texto antes
+# del objeto, comillas simples, saltos de línea sin escapar dentro de los
+# valores, comas finales y respuestas cortadas a mitad de un valor.
+# El objeto empieza en la primera "{" seguida de una clave: una llave suelta
+# en el texto previo ("Nota {importante}: ...", "{}") no cuenta.
+# Con la respuesta completa, `leer_json_completo` prueba json.loads y luego
+# un barrido de pares con una sola regex (objeto plano); el lector de a
+# pedazos queda para lo anidado o cortado.
+
+_CADENA = {
+    '"': re.compile(r'"([^"\\]*(?:\\.[^"\\]*)*)"', re.S),
+    "'": re.compile(r"'([^'\\]*(?:\\.[^'\\]*)*)'", re.S),
+}
+_INICIO = re.compile(r"""\{(?=\s*(?:["']|[A-Za-z_]\w*\s*:))""")
+# Una "{" al final del texto recibido que todavía puede resultar ser el inicio
+_INICIO_PENDIENTE = re.compile(r"\{\s*(?:[A-Za-z_]\w*\s*)?")
+_CLAVE_VALOR = re.compile(
+    r"""[\s,]*(?:"([^"\\]*(?:\\.[^"\\]*)*)"|'([^'\\]*(?:\\.[^'\\]*)*)'|([A-Za-z_]\w*))\s*:\s*"""
+    r"""(?:"([^"\\]*(?:\\.[^"\\]*)*)"|'([^'\\]*(?:\\.[^'\\]*)*)'|([^,}\s"'\[{][^,}\n]*))""",
+    re.S,
+)
+_CIERRE = re.compile(r"[\s,]*\}")
+_ESCALAR = re.compile(r"[^,}\n]*")
+_ESPACIOS = re.compile(r"\s*")
+_ESPACIOS_Y_COMAS = re.compile(r"[\s,]*")
+_DECODIFICADOR = json.JSONDecoder(strict=False)
+
+
+def _decodificar_cadena(crudo, comilla):
+    if "\\" not in crudo:
+        return crudo  # sin escapes el contenido ya es el valor
+    if comilla == "'":
+        crudo = crudo.replace("\\'", "'").replace('"', '\\"')
+    try:
+        return json.decoder.scanstring(f'"{crudo}"', 1, False)[0]
+    except ValueError:
+        return crudo
+
+
+def _decodificar_anidado(crudo):
+    try:
+        return _DECODIFICADOR.decode(crudo)
+    except ValueError:
+        try:
+            return ast.literal_eval(crudo)
+        except (ValueError, SyntaxError):
+            return crudo
+
+
+def _decodificar_escalar(crudo):
+    crudo = crudo.strip()
+    try:
+        return json.loads(crudo)
+    except ValueError:
+        return crudo
+
+
+def _inicio_objeto(texto, desde=0):
+    """Posición de la primera "{" que abre un objeto (seguida de una clave), o -1."""
+    m = _INICIO.search(texto, desde)
+    return m.start() if m else -1
+
+
+def _leer_plano(texto, pos):
+    """Pares planos desde `pos` (tras la "{"); retorna (campos, posición donde paró, si el objeto cerró)."""
+    campos = {}
+    while True:
+        m = _CLAVE_VALOR.match(texto, pos)
+        if m is None:
+            return campos, pos, _CIERRE.match(texto, pos) is not None
+        clave_doble, clave_simple, clave_libre, doble, simple, escalar = m.groups()
+        if clave_doble is not None:
+            clave = _decodificar_cadena(clave_doble, '"')
+        else:
+            clave = _decodificar_cadena(clave_simple, "'") if clave_simple is not None else clave_libre
+        if doble is not None:
+            campos[clave] = _decodificar_cadena(doble, '"')
+        elif simple is not None:
+            campos[clave] = _decodificar_cadena(simple, "'")
+        else:
+            campos[clave] = _decodificar_escalar(escalar)
+        pos = m.end()
+
+
+def _fin_anidado(texto, i):
+    """Índice siguiente al cierre del [..] o {..} que abre en `i`, o None si aún no cierra."""
+    profundidad, comilla = 0, None
+    while i < len(texto):
+        c = texto[i]
+        if comilla:
+            if c == "\\":
+                i += 1
+            elif c == comilla:
+                comilla = None
+        elif c in "\"'":
+            comilla = c
+        elif c in "[{":
+            profundidad += 1
+        elif c in "]}":
+            profundidad -= 1
+            if profundidad == 0:
+                return i + 1
+        i += 1
+    return None
+
+
+class LectorJsonIncremental:
+    """Parser incremental de un objeto JSON plano; `campos` acumula lo ya cerrado."""
+
+    def __init__(self):
+        self.campos = {}
+        self._texto = ""
+        self._pos = 0
+        self._estado = "inicio"
+        self._clave = None
+
+    def alimentar(self, pedazo):
+        """Agrega texto recibido; retorna la lista de (clave, valor) que se cerraron con él."""
+        self._texto += pedazo
+        nuevos = []
+        while self._avanzar(nuevos, final=False):
+            pass
+        return nuevos
+
+    def cerrar(self):
+        """Fin del stream: entrega el último valor aunque haya quedado cortado."""
+        nuevos = []
+        while self._avanzar(nuevos, final=True):
+            pass
+        if self._estado == "valor" and self._clave is not None:
+            resto = self._texto[self._pos:].strip()
+            if resto[:1] in _CADENA:
+                resto = resto[1:].rstrip(resto[0])
+            if resto:
+                self._emitir(nuevos, resto)
+        self._estado = "fin"
+        return nuevos
+
+    def _emitir(self, nuevos, valor):
+        self.campos[self._clave] = valor
+        nuevos.append((self._clave, valor))
+        self._clave = None
+
+    def _saltar_espacios(self, patron=_ESPACIOS):
+        self._pos = patron.match(self._texto, self._pos).end()
+        return self._texto[self._pos] if self._pos < len(self._texto) else None
+
+    def _leer_cadena(self, comilla):
+        """Valor de la cadena que abre en la posición actual, o None si aún no cierra."""
+        if comilla == '"':
+            try:
+                valor, self._pos = json.decoder.scanstring(self._texto, self._pos + 1, False)
+                return valor
+            except ValueError:
+                pass  # sin cerrar todavía, o con un escape inválido: camino tolerante
+        m = _CADENA[comilla].match(self._texto, self._pos)
+        if not m:
+            return None
+        self._pos = m.end()
+        return _decodificar_cadena(m.group(1), comilla)
+
+    def _avanzar(self, nuevos, final):
+        """Consume un token; False si hace falta más texto (o terminó)."""
+        if self._estado == "inicio":
+            inicio = _inicio_objeto(self._texto, self._pos)
+            if inicio == -1:
+                ultima = self._texto.rfind("{", self._pos)
+                pendiente = ultima != -1 and not final and _INICIO_PENDIENTE.fullmatch(self._texto, ultima)
+                self._pos = ultima if pendiente else len(self._texto)
+                return False
+            self._pos = inicio + 1
+            self._estado = "clave"
+            return True
+
+        if self._estado == "clave":
+            c = self._saltar_espacios(_ESPACIOS_Y_COMAS)
+            if c is None:
+                return False
+            if c == "}":
+                self._estado = "fin"
+                return False
+            if c in _CADENA:
+                clave = self._leer_cadena(c)
+                if clave is None:
+                    return False
+                self._clave = clave
+            else:
+                # Clave sin comillas (estilo JS): hasta los dos puntos
+                fin = self._texto.find(":", self._pos)
+                if fin == -1:
+                    return False
+                self._clave = self._texto[self._pos:fin].strip()
+                self._pos = fin
+            self._estado = "dos_puntos"
+            return True
+
+        if self._estado == "dos_puntos":
+            c = self._saltar_espacios()
+            if c is None:
+                return False
+            if c == ":":
+                self._pos += 1
+            self._estado = "valor"
+            return True
+
+        if self._estado == "valor":
+            c = self._saltar_espacios()
+            if c is None:
+                return False
+            if c in _CADENA:
+                valor = self._leer_cadena(c)
+                if valor is None:
+                    return False
+                self._emitir(nuevos, valor)
+            elif c in "[{":
+                fin = _fin_anidado(self._texto, self._pos)
+                if fin is None:
+                    return False
+                self._emitir(nuevos, _decodificar_anidado(self._texto[self._pos:fin]))
+                self._pos = fin
+            else:
+                m = _ESCALAR.match(self._texto, self._pos)
+                if m.end() == len(self._texto) and not final:
+                    return False  # el número o literal puede seguir en el próximo pedazo
+                self._emitir(nuevos, _decodificar_escalar(m.group(0)))
+                self._pos = m.end()
+            self._estado = "clave"
+            return True
+
+        return False
+
+
+def leer_json_completo(texto):
+    """Atajo no incremental: todos los campos de una respuesta ya completa."""
+    inicio = _inicio_objeto(texto)
+    if inicio == -1:
+        return {}
+    try:
+        # Camino rápido: JSON válido (con o sin cerco ``` alrededor)
+        valor = _DECODIFICADOR.raw_decode(texto, inicio)[0]
+        if isinstance(valor, dict):
+            return valor
+    except ValueError:
+        pass
+    # Objeto plano malformado (comillas simples, claves sin comillas, comas finales): un barrido de regex
+    campos, pos, cerrado = _leer_plano(texto, inicio + 1)
+    if cerrado:
+        return campos
+    # Un valor anidado o cortado: el lector sigue desde ahí con lo ya leído
+    lector = LectorJsonIncremental()
+    lector.campos, lector._pos, lector._estado = campos, pos, "clave"
+    lector.alimentar(texto)
+    lector.cerrar()
+    return lector.campos
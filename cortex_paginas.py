@@ -0,0 +1,167 @@
+import io
+import logging
+import re
+import unicodedata
+
+from pypdf import PdfReader
+
+# ==========================================
+# PRE-PROCESAMIENTO DE BASES POR SECCIONES
+# ==========================================
+# Las bases suelen traer 80–200 páginas de anexos que no contienen ninguno de
+# los 24 campos. Aquí se extrae el texto página por página, se indexan las
+# páginas por encabezados y palabras clave, y se arma un payload recortado
+# (solo texto de las páginas relevantes) para la extracción.
+# Si el PDF no tiene texto (escaneado) o casi todo el documento resulta
+# relevante, se devuelve None y la extracción usa el documento completo.
+
+# Sección → (palabras clave sin tildes, campos cXX que suelen vivir ahí)
+SECCIONES = {
+    "plazos": (
+        ("plazo", "cronograma", "calendario", "fecha de cierre", "cierre de ofertas", "preguntas",
+         "duracion", "vigencia", "entrega", "vencimiento", "emergencia"),
+        ("c02", "c03", "c07", "c08", "c16", "c20"),
+    ),
+    "garantias": (
+        ("garantia", "boleta", "poliza", "vale vista", "fiel cumplimiento", "seriedad de la oferta", "glosa"),
+        ("c06", "c19"),
+    ),
+    "multas": (
+        ("multa", "sancion", "penalidad", "incumplimiento", "termino anticipado"),
+        ("c24",),
+    ),
+    "inadmisibilidad": (
+        ("inadmisib", "admisibilidad", "fuera de bases", "se declarara inadmisible", "anexo n"),
+        ("c11", "c22"),
+    ),
+    "evaluacion": (
+        ("evaluacion", "criterio", "puntaje", "ponderacion", "pauta", "comision evaluadora"),
+        ("c12",),
+    ),
+    "requisitos": (
+        ("requisito", "antecedentes administrativos", "oferta tecnica", "oferta economica",
+         "experiencia", "registro de proveedores"),
+        ("c13", "c14", "c15", "c23"),
+    ),
+    "productos": (
+        ("producto", "principio activo", "presupuesto", "monto", "reajuste", "suscripcion",
+         "contrato", "canje", "cenabast", "faltante"),
+        ("c04", "c05", "c09", "c10", "c17", "c18", "c21"),
+    ),
+}
+
+PAGINAS_INICIALES = 3        # portada, ID y cronograma casi siempre están al inicio
+MAX_PAGINAS_POR_SECCION = 6  # evita que un término genérico arrastre todos los anexos
+FRACCION_MAXIMA = 0.6        # sobre esto el recorte no ahorra lo suficiente: documento completo
+MIN_CARACTERES_POR_PAGINA = 200  # bajo esto el PDF es escaneado / sin capa de texto
+
+PESO_ENCABEZADO = 3
+PESO_CUERPO = 1
+
+_log = logging.getLogger("cortex.paginas")
+
+_ENCABEZADO = re.compile(r"^\s*(?:(?:[ivxlc]+|\d+(?:\.\d+)*|[a-z])[.)-]\s+|(?:titulo|capitulo|articulo|seccion|anexo)\b)")
+
+
+def normalizar_texto(texto):
+    """Minúsculas y sin tildes, para comparar contra las palabras clave."""
+    return unicodedata.normalize("NFKD", texto).encode("ascii", "ignore").decode().lower()
+
+
+def extraer_paginas(pdf_bytes):
+    """Texto de cada página (lista, una entrada por página; '' si no tiene texto)."""
+    lector = PdfReader(io.BytesIO(pdf_bytes))
+    paginas = []
+    for pagina in lector.pages:
+        try:
+            paginas.append(pagina.extract_text() or "")
+        except Exception:
+            paginas.append("")
+    return paginas
+
+
+def _es_encabezado(linea_original, linea):
+    if not linea or len(linea) > 90:
+        return False
+    letras = [c for c in linea_original if c.isalpha()]
+    return bool(_ENCABEZADO.match(linea)) or (len(letras) >= 4 and all(c.isupper() for c in letras))
+
+
+def indexar_paginas(paginas):
+    """Puntaje por sección y página: {seccion: {n_pagina: puntaje}}.
+
+    Una palabra clave en un encabezado (línea corta numerada o en mayúsculas)
+    pesa más que una mención en el cuerpo del texto.
+    """
+    indice = {seccion: {} for seccion in SECCIONES}
+    for n, texto in enumerate(paginas):
+        for linea_original in texto.splitlines():
+            linea = normalizar_texto(linea_original).strip()
+            if not linea:
+                continue
+            peso = PESO_ENCABEZADO if _es_encabezado(linea_original.strip(), linea) else PESO_CUERPO
+            for seccion, (palabras, _) in SECCIONES.items():
+                if any(p in linea for p in palabras):
+                    indice[seccion][n] = indice[seccion].get(n, 0) + peso
+    return indice
+
+
+def seleccionar_paginas(paginas, indice):
+    """Páginas a enviar: las iniciales + las mejor puntuadas de cada sección.
+
+    Si el mejor puntaje de una sección vino de un encabezado, se agrega también
+    la página siguiente, donde suele continuar el contenido.
+    """
+    seleccion = set(range(min(PAGINAS_INICIALES, len(paginas))))
+    for puntajes in indice.values():
+        mejores = sorted(puntajes, key=lambda n: (-puntajes[n], n))[:MAX_PAGINAS_POR_SECCION]
+        for n in mejores:
+            seleccion.add(n)
+            if puntajes[n] >= PESO_ENCABEZADO and n + 1 < len(paginas):
+                seleccion.add(n + 1)
+    return sorted(seleccion)
+
+
+def construir_payload(paginas, seleccion):
+    """Texto recortado, con el número de página original de cada bloque."""
+    return "\n\n".join(f"[Página {n + 1}]\n{paginas[n].strip()}" for n in seleccion)
+
+
+def leer_paginas(pdf_bytes):
+    """Como `extraer_paginas`, pero None (y el error en el log) si pypdf no puede leer el PDF.
+
+    pypdf no solo lanza PyPdfError con un PDF dañado (KeyError, ValueError, RecursionError...).
+    """
+    try:
+        return extraer_paginas(pdf_bytes)
+    except Exception:
+        _log.warning("No se pudo extraer el texto del PDF", exc_info=True)
+        return None
+
+
+def preparar_payload(pdf_bytes, paginas=None):
+    """Payload recortado de las bases, o None si conviene enviar el documento completo.
+
+    `paginas` evita volver a extraer el texto si ya se tiene. Retorna dict con
+    texto, paginas_totales, paginas_enviadas y bytes_payload.
+    """
+    if paginas is None:
+        paginas = leer_paginas(pdf_bytes)
+    if not paginas:
+        # Sin texto o PDF que pypdf no entiende: que lo lea Gemini completo
+        return None
+    caracteres = sum(len(p.strip()) for p in paginas)
+    if caracteres / len(paginas) < MIN_CARACTERES_POR_PAGINA:
+        return None
+
+    seleccion = seleccionar_paginas(paginas, indexar_paginas(paginas))
+    if len(seleccion) > FRACCION_MAXIMA * len(paginas):
+        return None
+
+    texto = construir_payload(paginas, seleccion)
+    return {
+        "texto": texto,
+        "paginas_totales": len(paginas),
+        "paginas_enviadas": [n + 1 for n in seleccion],
+        "bytes_payload": len(texto.encode("utf-8")),
+    }
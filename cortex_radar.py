@@ -0,0 +1,138 @@
+import numpy as np
+import pandas as pd
+from pandas.util import hash_pandas_object
+
+# ==========================================
+# RADAR DE COMPETENCIA EN UNA PASADA (INCREMENTAL)
+# ==========================================
+# El radar cuenta proveedores distintos por negocio y muestra una fila
+# representativa (la primera) de cada uno. Antes eran tres pasadas completas
+# (groupby-nunique, drop_duplicates y merge); aquí se factoriza la clave y el
+# proveedor una vez (con columnas categóricas es casi gratis), se deduplican
+# los pares (clave, proveedor) con una tabla hash y se cuentan con bincount.
+#
+# Para acumular por tandas, cada clave y cada par se identifica por una
+# huella de 64 bits de su valor (solo se calculan sobre los valores únicos).
+# El estado se alimenta con `agregar` o se combina con `fusionar`, así que
+# sumar un archivo o un trozo de CSV no obliga a recalcular lo anterior.
+# La clave es configurable: por negocio (ID), por comprador o por producto.
+
+COLUMNA_CONTEO = "Num_Competidores"
+_MEZCLA = np.uint64(0x9E3779B97F4A7C15)  # constante de Fibonacci para combinar huellas
+
+
+def _hash_valores(valores):
+    """Huella de valores ya únicos (sin la factorización previa que hace hash_pandas_object)."""
+    return hash_pandas_object(pd.Series(valores), index=False, categorize=False).to_numpy()
+
+
+def _factorizar(df, columnas):
+    """(código por fila, huella de cada valor único); los únicos quedan en orden de aparición."""
+    if len(columnas) == 1:
+        codigos, unicos = pd.factorize(df[columnas[0]])
+        if isinstance(unicos.dtype, pd.CategoricalDtype):
+            # Se hashea cada categoría una vez; en una tanda chica, solo las presentes
+            if len(unicos) * 4 < len(unicos.categories):
+                unicos = unicos.categories.take(unicos.codes)
+            else:
+                return codigos, _hash_valores(unicos.categories)[unicos.codes]
+        return codigos, _hash_valores(unicos)
+    return pd.factorize(hash_pandas_object(df[columnas], index=False).to_numpy())
+
+
+def _primeras_apariciones(codigos):
+    """Fila donde aparece por primera vez cada código (los códigos de factorize crecen en ese orden)."""
+    maximo_previo = np.maximum.accumulate(np.concatenate([[-1], codigos[:-1]]))
+    return np.flatnonzero(codigos > maximo_previo)
+
+
+class RadarCompetencia:
+    """Competidores distintos por clave (negocio, comprador o producto), acumulables por tandas."""
+
+    def __init__(self, PROV_COL, claves):
+        self.PROV_COL = PROV_COL
+        self.claves = [claves] if isinstance(claves, str) else list(claves)
+        self.filas = 0
+        self._indice = pd.Index([], dtype="uint64")       # huella de clave → posición (orden de aparición)
+        self._conteos = np.empty(0, dtype=np.int64)       # proveedores distintos por posición
+        self._pares = pd.Index([], dtype="uint64")        # huellas (clave, proveedor) ya contadas
+        self._claves_pares = np.empty(0, dtype=np.int64)  # posición de la clave de cada par
+        self._representantes = []                         # marcos con la primera fila de cada clave nueva
+        self._negocios = None
+
+    def agregar(self, df):
+        """Suma una tanda de filas; las claves nulas se ignoran, como en un groupby."""
+        validas = df[self.claves].notna().all(axis=1).to_numpy()
+        if not validas.all():
+            df = df[validas]
+        self.filas += len(df)
+        if df.empty:
+            return self
+
+        codigos, h_claves = _factorizar(df, self.claves)
+        globales = self._registrar_claves(h_claves, lambda nuevas: df.iloc[_primeras_apariciones(codigos)[nuevas]])
+
+        # Proveedor nulo: la clave existe pero no suma competidores (como nunique)
+        cod_prov, h_prov = _factorizar(df, [self.PROV_COL])
+        con_proveedor = cod_prov >= 0
+        codigos, cod_prov = codigos[con_proveedor], cod_prov[con_proveedor]
+        pares = pd.Series(codigos * len(h_prov) + cod_prov)
+        primeros = np.flatnonzero(~pares.duplicated().to_numpy())
+        codigos, cod_prov = codigos[primeros], cod_prov[primeros]
+        self._sumar_pares((h_claves[codigos] * _MEZCLA) ^ h_prov[cod_prov], globales[codigos])
+        return self
+
+    def fusionar(self, otro):
+        """Combina el estado de otro radar con las mismas claves (p. ej. de otro trozo o archivo)."""
+        self.filas += otro.filas
+        globales = self._registrar_claves(
+            otro._indice.to_numpy(), lambda nuevas: otro._filas_representantes().iloc[np.flatnonzero(nuevas)]
+        )
+        self._sumar_pares(otro._pares.to_numpy(), globales[otro._claves_pares])
+        return self
+
+    def _registrar_claves(self, huellas, filas_de_nuevas):
+        """Posición global de cada huella; las nuevas se agregan con su fila representativa."""
+        globales = self._indice.get_indexer(huellas)
+        nuevas = globales < 0
+        if nuevas.any():
+            n = int(nuevas.sum())
+            globales[nuevas] = np.arange(len(self._indice), len(self._indice) + n)
+            self._indice = self._indice.append(pd.Index(huellas[nuevas]))
+            self._conteos = np.concatenate([self._conteos, np.zeros(n, dtype=np.int64)])
+            self._representantes.append(filas_de_nuevas(nuevas))
+            self._negocios = None
+        return globales
+
+    def _sumar_pares(self, pares, posiciones):
+        if len(self._pares):
+            nuevos = ~pd.Index(pares).isin(self._pares)
+            pares, posiciones = pares[nuevos], posiciones[nuevos]
+        if not len(pares):
+            return
+        self._pares = self._pares.append(pd.Index(pares))
+        self._claves_pares = np.concatenate([self._claves_pares, posiciones])
+        self._conteos += np.bincount(posiciones, minlength=len(self._conteos))
+        self._negocios = None
+
+    def _filas_representantes(self):
+        marcos = self._representantes
+        return marcos[0].reset_index(drop=True) if len(marcos) == 1 else pd.concat(marcos, ignore_index=True)
+
+    def negocios(self):
+        """Una fila representativa por clave (la primera vista) con su columna Num_Competidores."""
+        if not self._representantes:
+            return pd.DataFrame(columns=[*self.claves, COLUMNA_CONTEO])
+        if self._negocios is None:
+            self._negocios = self._filas_representantes().assign(**{COLUMNA_CONTEO: self._conteos})
+        return self._negocios
+
+    def con_competidores(self, minimo, maximo=None):
+        """Claves con entre `minimo` y `maximo` proveedores distintos (por defecto, exactamente `minimo`)."""
+        negocios = self.negocios()
+        conteo = negocios[COLUMNA_CONTEO]
+        return negocios[(conteo >= minimo) & (conteo <= (minimo if maximo is None else maximo))]
+
+    def distribucion(self):
+        """Cantidad de claves por número de competidores."""
+        return pd.Series(self._conteos).value_counts().sort_index()
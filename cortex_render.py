@@ -0,0 +1,146 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+# ==========================================
+# CAPA DE RENDER: GRÁFICOS REDUCIDOS Y TABLAS PAGINADAS
+# ==========================================
+# Lo que sale del chat o del radar puede tener cientos de miles de filas, y
+# todo lo que se entrega a `st.dataframe` o a un gráfico viaja completo por
+# el websocket (y un Styler de pandas, además, se arma celda por celda).
+# Aquí se decide qué llega al navegador:
+# - los gráficos reciben a lo más MAX_PUNTOS_GRAFICO puntos; una serie se
+#   reduce con LTTB (conserva la forma visual) y varias con mín/máx por tramo;
+# - las tablas se ordenan y filtran en el servidor y se envía una página;
+# - el formato de moneda se aplica solo a las filas de esa página.
+
+MAX_PUNTOS_GRAFICO = 1_500
+FILAS_POR_PAGINA = 50
+
+
+def _eje_numerico(eje):
+    """Eje x como float64 (fechas en nanosegundos); None si no es ordenable numéricamente."""
+    if isinstance(eje, pd.DatetimeIndex) or pd.api.types.is_datetime64_any_dtype(eje):
+        return np.asarray(eje, dtype="datetime64[ns]").astype(np.int64).astype(np.float64)
+    if pd.api.types.is_numeric_dtype(eje):
+        return np.asarray(eje, dtype=np.float64)
+    return None
+
+
+def lttb(x, y, n):
+    """Índices de los `n` puntos elegidos por Largest-Triangle-Three-Buckets (incluye extremos)."""
+    largo = len(x)
+    if n >= largo or n < 3:
+        return np.arange(largo)
+    elegidos = np.empty(n, dtype=np.int64)
+    elegidos[0], elegidos[-1] = 0, largo - 1
+    # Tramos interiores de igual cantidad de puntos; el primero y el último van solos
+    bordes = np.linspace(1, largo - 1, n - 1).astype(np.int64)
+    anterior = 0
+    for i in range(n - 2):
+        ini, fin = bordes[i], bordes[i + 1]
+        sig_ini, sig_fin = fin, bordes[i + 2] if i + 2 < n - 1 else largo
+        x_prom, y_prom = x[sig_ini:sig_fin].mean(), y[sig_ini:sig_fin].mean()
+        xa, ya = x[anterior], y[anterior]
+        areas = np.abs((xa - x_prom) * (y[ini:fin] - ya) - (xa - x[ini:fin]) * (y_prom - ya))
+        anterior = ini + int(np.argmax(areas))
+        elegidos[i + 1] = anterior
+    return elegidos
+
+
+def _min_max_por_tramo(valores, n):
+    """Índices del mínimo y máximo de cada columna en ~n/2 tramos consecutivos."""
+    largo = len(valores)
+    tramos = max(1, n // (2 * valores.shape[1]))
+    bordes = np.linspace(0, largo, tramos + 1).astype(np.int64)
+    elegidos = [0, largo - 1]
+    for ini, fin in zip(bordes[:-1], bordes[1:]):
+        if fin <= ini:
+            continue
+        bloque = valores[ini:fin]
+        # Una serie que empieza después (o se corta antes) no tiene datos en todos los tramos
+        bloque = bloque[:, ~np.isnan(bloque).all(axis=0)]
+        if bloque.shape[1] == 0:
+            continue
+        elegidos.extend(ini + np.nanargmin(bloque, axis=0))
+        elegidos.extend(ini + np.nanargmax(bloque, axis=0))
+    return np.unique(elegidos)
+
+
+def reducir_para_grafico(datos, FECHA_COL=None, max_puntos=MAX_PUNTOS_GRAFICO):
+    """Serie o DataFrame listo para graficar, con a lo más ~max_puntos filas y la forma visual intacta.
+
+    El eje x es FECHA_COL si está entre las columnas, si no el índice. Si el
+    eje no es numérico ni de fechas (p. ej. un ranking por nombre) se deja igual;
+    al reducir, solo quedan las columnas numéricas (las que se grafican).
+    """
+    marco = datos.to_frame() if isinstance(datos, pd.Series) else datos
+    if FECHA_COL and FECHA_COL in marco.columns:
+        marco = marco.set_index(FECHA_COL)
+    if len(marco) <= max_puntos:
+        return marco
+    x = _eje_numerico(marco.index)
+    numericas = marco.select_dtypes("number")
+    if x is None or numericas.shape[1] == 0:
+        return marco
+    orden = np.argsort(x, kind="stable")
+    if not (orden[1:] > orden[:-1]).all():
+        marco, numericas, x = marco.iloc[orden], numericas.iloc[orden], x[orden]
+    valores = numericas.to_numpy(dtype=np.float64, na_value=np.nan)
+    validas = ~np.isnan(valores).all(axis=1)
+    if numericas.shape[1] == 1 and validas.all():
+        indices = lttb(x, valores[:, 0], max_puntos)
+    else:
+        indices = np.flatnonzero(validas)[_min_max_por_tramo(valores[validas], max_puntos)]
+    return numericas.iloc[indices]
+
+
+def filtrar_y_ordenar(df, texto=None, orden=None, ascendente=True):
+    """Filas que contienen `texto` en alguna columna de texto, ordenadas por `orden`."""
+    if texto:
+        coincide = np.zeros(len(df), dtype=bool)
+        for col in df.columns:
+            serie = df[col]
+            if isinstance(serie.dtype, pd.CategoricalDtype):
+                # Se busca en las categorías (pocas) y se expande con los códigos
+                en_categorias = serie.cat.categories.astype(str).str.contains(texto, case=False, regex=False)
+                coincide |= np.append(np.asarray(en_categorias), False)[serie.cat.codes.to_numpy()]
+            elif pd.api.types.is_object_dtype(serie) or pd.api.types.is_string_dtype(serie):
+                coincide |= serie.astype(str).str.contains(texto, case=False, regex=False).fillna(False).to_numpy(dtype=bool)
+        df = df[coincide]
+    if orden is not None and orden in df.columns:
+        df = df.sort_values(orden, ascending=ascendente, kind="stable", na_position="last")
+    return df
+
+
+def pagina(df, numero, filas_por_pagina=FILAS_POR_PAGINA):
+    """(filas de la página `numero` (desde 1), total de páginas); el número se acota al rango válido."""
+    paginas = max(1, -(-len(df) // filas_por_pagina))
+    numero = min(max(1, numero), paginas)
+    inicio = (numero - 1) * filas_por_pagina
+    return df.iloc[inicio:inicio + filas_por_pagina], paginas
+
+
+def formatear_moneda(df, columnas):
+    """Copia de la página con las columnas de monto como texto "$1,234,567" (solo estas filas)."""
+    columnas = [c for c in columnas if c in df.columns]
+    if not columnas:
+        return df
+    formateado = df.copy()
+    for col in columnas:
+        valores = pd.to_numeric(formateado[col], errors="coerce")
+        formateado[col] = [f"${v:,.0f}" if pd.notna(v) else "" for v in valores]
+    return formateado
+
+
+def medir_payload(datos):
+    """Bytes en Arrow IPC de lo que se enviaría al navegador (Serie o DataFrame)."""
+    marco = datos.to_frame() if isinstance(datos, pd.Series) else datos
+    try:
+        tabla = pa.Table.from_pandas(marco)
+    except (pa.ArrowException, TypeError, ValueError):
+        tabla = pa.Table.from_pandas(marco.astype(str))
+    sumidero = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sumidero, tabla.schema) as escritor:
+        escritor.write_table(tabla)
+    return sumidero.getvalue().size
@@ -0,0 +1,249 @@
+import multiprocessing as mp
+import os
+import queue
+import signal
+import sys
+import threading
+import types
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc
+
+try:
+    import resource
+except ImportError:  # Windows: sin límites por proceso, solo el tiempo de pared
+    resource = None
+
+# ==========================================
+# SANDBOX DE EJECUCIÓN DEL CÓDIGO GENERADO
+# ==========================================
+# El DataFrame cacheado se comparte entre todas las sesiones. En vez de una
+# copia profunda por consulta, el código generado recibe una vista
+# copy-on-write: comparte los datos y solo copia (en privado) las columnas
+# que intente modificar. Los arrays de `.values`/`.to_numpy()` salen de solo
+# lectura, así que escribir sobre ellos da un error claro en vez de
+# corromper el reporte de todos.
+
+def activar_copy_on_write():
+    """Copy-on-Write es el comportamiento por defecto desde pandas 3; en 2.x hay que pedirlo."""
+    if int(pd.__version__.split('.')[0]) < 3:
+        pd.set_option('mode.copy_on_write', True)
+
+
+def vista_sandbox(df):
+    """Vista copy-on-write del reporte: costo O(columnas), no O(filas)."""
+    return df.copy(deep=False)
+
+
+def preparar_scope(df, columnas):
+    """Entorno global para `exec`: la vista del reporte, pandas y las variables cortas (MONT_COL, ...)."""
+    return {"df": vista_sandbox(df), "pd": pd, **columnas}
+
+
+def ejecutar_codigo(codigo, scope):
+    """Ejecuta el código generado y retorna la variable global `resultado`."""
+    exec(codigo, scope)
+    if "resultado" not in scope:
+        raise ValueError("No se generó la variable 'resultado'.")
+    return scope["resultado"]
+
+
+# ==========================================
+# POOL DE PROCESOS PARA EL CÓDIGO GENERADO
+# ==========================================
+# `exec` en el hilo de Streamlit congela la sesión con un groupby pesado y un
+# bucle infinito o un merge explosivo pueden botar el servidor completo.
+# Cada consulta corre en un proceso trabajador con límite de CPU y de memoria.
+# Los trabajadores no reciben el DataFrame por pickle: abren por memory-map el
+# Arrow IPC del almacén columnar y lo conservan entre consultas del mismo reporte.
+# Si un trabajador excede el tiempo de pared se mata y se reemplaza.
+
+class ErrorSandbox(Exception):
+    """El código generado falló dentro del trabajador."""
+
+
+class ConsultaCancelada(ErrorSandbox):
+    """La consulta superó un límite (CPU, memoria o tiempo) y fue cancelada."""
+
+
+class _LimiteCpu(Exception):
+    pass
+
+
+MAX_MARCOS_POR_TRABAJADOR = 2
+_marcos_trabajador = OrderedDict()
+
+
+def _marco_compartido(ruta):
+    """DataFrame del Arrow IPC en `ruta`, reutilizado entre consultas del mismo trabajador."""
+    clave = (ruta, os.stat(ruta).st_mtime_ns)
+    if clave not in _marcos_trabajador:
+        fuente = pa.memory_map(ruta, "r")
+        _marcos_trabajador[clave] = pa.ipc.open_file(fuente).read_all().to_pandas()
+        while len(_marcos_trabajador) > MAX_MARCOS_POR_TRABAJADOR:
+            _marcos_trabajador.popitem(last=False)
+    _marcos_trabajador.move_to_end(clave)
+    return _marcos_trabajador[clave]
+
+
+def _memoria_virtual():
+    """Tamaño virtual del proceso en bytes; None sin /proc (macOS), donde no hay cómo medirlo."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[0]) * resource.getpagesize()
+    except OSError:
+        return None
+
+
+def _senal_cpu(signum, frame):
+    raise _LimiteCpu()
+
+
+@contextmanager
+def _limites(cpu_s, memoria_mb):
+    """Límite de CPU (RLIMIT_CPU → SIGXCPU) y de memoria (RLIMIT_AS) solo para la consulta en curso.
+
+    Sin /proc (macOS) el tamaño virtual no se puede medir y RLIMIT_AS no se aplica:
+    un límite relativo a una medida falsa mataría al trabajador en la primera asignación.
+    """
+    if resource is None:
+        yield
+        return
+    uso = resource.getrusage(resource.RUSAGE_SELF)
+    cpu_previo = resource.getrlimit(resource.RLIMIT_CPU)
+    as_previo = resource.getrlimit(resource.RLIMIT_AS)
+    resource.setrlimit(resource.RLIMIT_CPU, (int(uso.ru_utime + uso.ru_stime + cpu_s) + 1, cpu_previo[1]))
+    virtual = _memoria_virtual()
+    if virtual is not None:
+        resource.setrlimit(resource.RLIMIT_AS, (virtual + memoria_mb * 1024 * 1024, as_previo[1]))
+    try:
+        yield
+    finally:
+        resource.setrlimit(resource.RLIMIT_CPU, cpu_previo)
+        if virtual is not None:
+            resource.setrlimit(resource.RLIMIT_AS, as_previo)
+
+
+def _bucle_trabajador(conn, limite_cpu_s, limite_memoria_mb):
+    activar_copy_on_write()
+    if resource is not None:
+        signal.signal(signal.SIGXCPU, _senal_cpu)
+
+    while True:
+        try:
+            tarea = conn.recv()
+        except EOFError:
+            break
+        if tarea is None:
+            break
+        ruta_datos, codigo, columnas = tarea
+        try:
+            df = _marco_compartido(ruta_datos)
+            with _limites(limite_cpu_s, limite_memoria_mb):
+                resultado = ejecutar_codigo(codigo, preparar_scope(df, columnas))
+            respuesta = ("ok", resultado)
+        except _LimiteCpu:
+            respuesta = ("cancelada", f"superó el límite de {limite_cpu_s} s de CPU")
+        except MemoryError:
+            respuesta = ("cancelada", f"superó el límite de {limite_memoria_mb} MB de memoria")
+        except Exception as e:
+            respuesta = ("error", f"{type(e).__name__}: {e}")
+        try:
+            conn.send(respuesta)
+        except Exception as e:
+            conn.send(("error", f"El resultado no se pudo devolver ({type(e).__name__}): {e}"))
+
+
+@contextmanager
+def _sin_modulo_principal():
+    """Oculta `__main__` mientras se lanza un trabajador.
+
+    Streamlit registra el script de la app como `__main__`; con el método spawn
+    el hijo lo re-ejecutaría completo (secrets, UI, ...) antes de servir consultas.
+    """
+    principal = sys.modules["__main__"]
+    sys.modules["__main__"] = types.ModuleType("__main__")
+    try:
+        yield
+    finally:
+        sys.modules["__main__"] = principal
+
+
+class PoolEjecucion:
+    """Pool de procesos trabajadores; cada sesión de Streamlit toma uno libre y corre en paralelo."""
+
+    def __init__(self, procesos, limite_cpu_s=30, limite_memoria_mb=2048):
+        self.procesos = procesos
+        self.limite_cpu_s = limite_cpu_s
+        self.limite_memoria_mb = limite_memoria_mb
+        # Margen sobre el límite de CPU para consultas bloqueadas sin consumir CPU
+        self.limite_pared_s = 2 * limite_cpu_s + 5
+        self.en_cola = 0
+        self._ctx = mp.get_context("spawn")
+        self._libres = queue.Queue()
+        self._lock = threading.Lock()
+        for _ in range(procesos):
+            self._libres.put(self._lanzar())
+
+    def _lanzar(self):
+        padre, hijo = self._ctx.Pipe()
+        proceso = self._ctx.Process(
+            target=_bucle_trabajador, args=(hijo, self.limite_cpu_s, self.limite_memoria_mb), daemon=True
+        )
+        with self._lock, _sin_modulo_principal():
+            proceso.start()
+        hijo.close()
+        return proceso, padre
+
+    def _descartar(self, trabajador):
+        proceso, conn = trabajador
+        proceso.kill()
+        proceso.join(timeout=5)
+        conn.close()
+
+    def ejecutar(self, ruta_datos, codigo, columnas):
+        """Ejecuta `codigo` sobre el reporte en `ruta_datos` y retorna `resultado`."""
+        with self._lock:
+            self.en_cola += 1
+        try:
+            trabajador = self._libres.get()
+        finally:
+            with self._lock:
+                self.en_cola -= 1
+
+        proceso, conn = trabajador
+        sano = False
+        try:
+            conn.send((ruta_datos, codigo, columnas))
+            if not conn.poll(self.limite_pared_s):
+                raise ConsultaCancelada(f"La consulta superó {self.limite_pared_s} s y fue cancelada.")
+            estado, valor = conn.recv()
+            sano = True
+        except (EOFError, OSError):
+            raise ConsultaCancelada("El proceso de análisis terminó inesperadamente (posible exceso de memoria).")
+        finally:
+            if sano:
+                self._libres.put(trabajador)
+            else:
+                self._descartar(trabajador)
+                self._libres.put(self._lanzar())
+
+        if estado == "cancelada":
+            raise ConsultaCancelada(f"La consulta {valor} y fue cancelada.")
+        if estado == "error":
+            raise ErrorSandbox(valor)
+        return valor
+
+    def cerrar(self):
+        while not self._libres.empty():
+            proceso, conn = self._libres.get_nowait()
+            try:
+                conn.send(None)
+            except OSError:
+                pass
+            proceso.join(timeout=5)
+            if proceso.is_alive():
+                proceso.kill()
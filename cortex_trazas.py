@@ -0,0 +1,150 @@
+import bisect
+import collections
+import contextlib
+import json
+import logging
+import logging.handlers
+import os
+import threading
+import time
+
+# ==========================================
+# TRAZAS POR ETAPA (LATENCIAS, FILAS, BYTES, TOKENS)
+# ==========================================
+# Cada etapa del flujo (read, sanitize, radar, prompt, generate, exec, render,
+# export) y del arranque (import, rerun) se envuelve en un tramo que mide su
+# duración y anota filas, bytes de payload y tokens. Los tramos alimentan
+# histogramas acumulados (formato de texto de Prometheus) y, si hay
+# directorio, un JSONL con rotación por tamaño. Los percentiles del panel
+# salen de las últimas N duraciones.
+
+ETAPAS = ("import", "rerun", "read", "sanitize", "radar", "prompt", "generate", "exec", "render", "export")
+LIMITES_S = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+CONTADORES = ("filas", "bytes", "tokens_entrada", "tokens_salida")
+MUESTRAS_POR_ETAPA = 1_000
+
+
+def _percentil(valores, p):
+    if not valores:
+        return None
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(p / 100 * len(ordenados)))]
+
+
+class Trazador:
+    """Histogramas por etapa en memoria, más un JSONL rotativo opcional con cada tramo."""
+
+    def __init__(self, directorio=None, max_bytes=10 * 1024 * 1024, respaldos=3):
+        self._lock = threading.Lock()
+        self._cubetas = collections.defaultdict(lambda: [0] * (len(LIMITES_S) + 1))
+        self._suma = collections.defaultdict(float)
+        self._cuenta = collections.defaultdict(int)
+        self._errores = collections.defaultdict(int)
+        self._totales = collections.defaultdict(lambda: dict.fromkeys(CONTADORES, 0))
+        self._recientes = collections.defaultdict(lambda: collections.deque(maxlen=MUESTRAS_POR_ETAPA))
+        self._log = None
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+            self._log = logging.getLogger(f"cortex.trazas.{os.path.abspath(directorio)}")
+            self._log.propagate = False
+            self._log.setLevel(logging.INFO)
+            if not self._log.handlers:
+                manejador = logging.handlers.RotatingFileHandler(
+                    os.path.join(directorio, "trazas.jsonl"), maxBytes=max_bytes, backupCount=respaldos, encoding="utf-8"
+                )
+                manejador.setFormatter(logging.Formatter("%(message)s"))
+                self._log.addHandler(manejador)
+
+    @contextlib.contextmanager
+    def tramo(self, etapa, **atributos):
+        """Mide el bloque; el dict entregado acepta filas, bytes, tokens_entrada, tokens_salida y otros datos."""
+        registro = dict(atributos)
+        t0 = time.perf_counter()
+        try:
+            yield registro
+        except BaseException as e:
+            registro["error"] = type(e).__name__
+            raise
+        finally:
+            self.registrar(etapa, time.perf_counter() - t0, registro)
+
+    def registrar(self, etapa, segundos, registro):
+        with self._lock:
+            self._cubetas[etapa][bisect.bisect_left(LIMITES_S, segundos)] += 1
+            self._suma[etapa] += segundos
+            self._cuenta[etapa] += 1
+            self._recientes[etapa].append(segundos)
+            if "error" in registro:
+                self._errores[etapa] += 1
+            for contador in CONTADORES:
+                valor = registro.get(contador)
+                if isinstance(valor, (int, float)):
+                    self._totales[etapa][contador] += valor
+        if self._log is not None:
+            linea = {"ts": round(time.time(), 3), "etapa": etapa, "segundos": round(segundos, 6), **registro}
+            self._log.info(json.dumps(linea, ensure_ascii=False, default=str))
+
+    def resumen(self):
+        """Una fila por etapa: cantidad, p50/p95/máx de las últimas muestras, errores y totales."""
+        with self._lock:
+            etapas = [e for e in ETAPAS if e in self._cuenta] + sorted(set(self._cuenta) - set(ETAPAS))
+            return [
+                {
+                    "etapa": e, "tramos": self._cuenta[e], "errores": self._errores[e],
+                    "p50_s": _percentil(self._recientes[e], 50), "p95_s": _percentil(self._recientes[e], 95),
+                    "max_s": max(self._recientes[e]), "promedio_s": self._suma[e] / self._cuenta[e],
+                    **self._totales[e],
+                }
+                for e in etapas
+            ]
+
+    def prometheus(self):
+        """Histogramas y contadores en el formato de texto de exposición de Prometheus."""
+        lineas = [
+            "# HELP cortex_etapa_segundos Duración de cada etapa del flujo.",
+            "# TYPE cortex_etapa_segundos histogram",
+        ]
+        with self._lock:
+            for etapa in sorted(self._cuenta):
+                acumulado = 0
+                for limite, n in zip(LIMITES_S + (float("inf"),), self._cubetas[etapa]):
+                    acumulado += n
+                    le = "+Inf" if limite == float("inf") else repr(limite)
+                    lineas.append(f'cortex_etapa_segundos_bucket{{etapa="{etapa}",le="{le}"}} {acumulado}')
+                lineas.append(f'cortex_etapa_segundos_sum{{etapa="{etapa}"}} {self._suma[etapa]:.6f}')
+                lineas.append(f'cortex_etapa_segundos_count{{etapa="{etapa}"}} {self._cuenta[etapa]}')
+            lineas += ["# HELP cortex_etapa_errores_total Tramos que terminaron en excepción.",
+                       "# TYPE cortex_etapa_errores_total counter"]
+            lineas += [f'cortex_etapa_errores_total{{etapa="{e}"}} {self._errores[e]}' for e in sorted(self._cuenta)]
+            for contador in CONTADORES:
+                lineas += [f"# TYPE cortex_etapa_{contador}_total counter"]
+                lineas += [f'cortex_etapa_{contador}_total{{etapa="{e}"}} {self._totales[e][contador]}' for e in sorted(self._cuenta)]
+        return "\n".join(lineas) + "\n"
+
+
+_trazador = None
+_lock_trazador = threading.Lock()
+
+
+def trazador():
+    """Trazador único del proceso; JSONL en CORTEX_TRAZAS_DIR (por defecto .cortex_cache/trazas)."""
+    global _trazador
+    with _lock_trazador:
+        if _trazador is None:
+            directorio = os.environ.get(
+                "CORTEX_TRAZAS_DIR", os.path.join(os.environ.get("CORTEX_CACHE_DIR", ".cortex_cache"), "trazas")
+            )
+            _trazador = Trazador(directorio or None)
+        return _trazador
+
+
+def filas_de(valor):
+    """Filas de un DataFrame/Series (o de cualquier objeto con `shape`), o None."""
+    forma = getattr(valor, "shape", None)
+    return forma[0] if forma else None
+
+
+def tokens_de(respuesta):
+    """(tokens de entrada, tokens de salida) de una respuesta de Gemini, o (None, None)."""
+    uso = getattr(respuesta, "usage_metadata", None)
+    return getattr(uso, "prompt_token_count", None), getattr(uso, "candidates_token_count", None)
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# Los módulos cortex_* viven en la raíz del repo (sin paquete)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Las pruebas no dejan trazas en .cortex_cache
+os.environ.setdefault("CORTEX_TRAZAS_DIR", "")
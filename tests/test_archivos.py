@@ -0,0 +1,82 @@
+import threading
+import time
+
+import pytest
+
+import cortex_archivos
+from cortex_archivos import GestorArchivosGemini, es_subida_invalida
+
+
+class _Archivo:
+    def __init__(self, nombre):
+        self.name = nombre
+        self.borrado = False
+
+    def delete(self):
+        self.borrado = True
+
+
+class _Cliente:
+    def __init__(self, espera_s=0.0):
+        self.subidos = []
+        self.espera_s = espera_s
+
+    def upload_file(self, contenido, **opciones):
+        time.sleep(self.espera_s)
+        archivo = _Archivo(f"files/{len(self.subidos)}")
+        self.subidos.append(archivo)
+        return archivo
+
+
+@pytest.fixture
+def gemini(monkeypatch):
+    falso = _Cliente()
+    monkeypatch.setattr(cortex_archivos, "cliente", lambda: falso)
+    return falso
+
+
+class NotFound(Exception):
+    code = 404
+
+
+def test_errores_que_invalidan():
+    assert es_subida_invalida(NotFound("files/abc"))
+    assert es_subida_invalida(type("PermissionDenied", (Exception,), {})("sin permiso"))
+    assert not es_subida_invalida(type("TooManyRequests", (Exception,), {"code": 429})("429"))
+    assert not es_subida_invalida(ValueError("respuesta sin texto"))
+
+
+def test_invalidar_con_otra_sesion_no_borra_el_archivo(gemini):
+    gestor = GestorArchivosGemini()
+    archivo = gestor.obtener(b"pdf", "a")
+    assert gestor.obtener(b"pdf", "b") is archivo and gestor.reutilizados == 1
+    gestor.de_sesion("a").invalidar(b"pdf", archivo)
+    assert not archivo.borrado  # "b" puede tenerlo en vuelo
+    nuevo = gestor.obtener(b"pdf", "a")
+    assert nuevo is not archivo and gestor.subidas == 2
+    # Un aviso tardío sobre el handle viejo no retira el nuevo
+    gestor.de_sesion("b").invalidar(b"pdf", archivo)
+    assert gestor.obtener(b"pdf", "b") is nuevo
+
+
+def test_invalidar_sin_otras_sesiones_borra(gemini):
+    gestor = GestorArchivosGemini()
+    archivo = gestor.obtener(b"pdf", "a")
+    gestor.de_sesion("a").invalidar(b"pdf", archivo)
+    assert archivo.borrado and gestor.pendientes() == []
+
+
+def test_una_sola_subida_aunque_se_invalide_durante_la_subida(monkeypatch):
+    falso = _Cliente(espera_s=0.1)
+    monkeypatch.setattr(cortex_archivos, "cliente", lambda: falso)
+    gestor = GestorArchivosGemini()
+    primeros = [threading.Thread(target=gestor.obtener, args=(b"pdf", f"s{i}")) for i in range(2)]
+    for hilo in primeros:
+        hilo.start()
+    time.sleep(0.02)
+    gestor.invalidar(b"pdf")  # mientras uno sube y otro espera el candado de la huella
+    tardio = threading.Thread(target=gestor.obtener, args=(b"pdf", "s2"))
+    tardio.start()
+    for hilo in primeros + [tardio]:
+        hilo.join()
+    assert len(falso.subidos) == 1 and gestor.reutilizados == 2
@@ -0,0 +1,61 @@
+import io
+
+import pytest
+
+from benchmarks.sintetico import generar_oc
+from cortex_bodega import Bodega, RangoDemasiadoGrande
+from cortex_datos import cargar_y_sanear
+
+
+def _reporte(df):
+    contenido = io.BytesIO()
+    df.to_csv(contenido, index=False)
+    return cargar_y_sanear(contenido.getvalue(), "ordenes.csv")
+
+
+@pytest.fixture
+def bodega(tmp_path):
+    bodega = Bodega(str(tmp_path))
+    # 3.000 filas, una por minuto desde el 01-01-2024 (hasta el 03-01)
+    df = generar_oc(3000)
+    bodega.ingerir(_reporte(df), "huella-a", "a.csv")
+    return bodega
+
+
+def test_resubir_no_duplica_filas(bodega):
+    tipo = "Órdenes de Compra"
+    assert bodega.ingerir(_reporte(generar_oc(3000)), "huella-b")["filas_nuevas"] == 0
+    assert bodega.contar(tipo) == 3000
+
+
+def test_fila_que_cambia_de_mes_no_se_duplica(bodega):
+    tipo = "Órdenes de Compra"
+    df = generar_oc(3000)
+    # Re-export con la fecha de las primeras filas corrida a otro mes
+    df.loc[:99, "FechaAceptacion"] = "15-03-2024 10:00"
+    ingesta = bodega.ingerir(_reporte(df), "huella-b")
+    assert ingesta["filas_nuevas"] == 0 and ingesta["duplicadas"] == 3000
+    assert bodega.contar(tipo) == 3000
+    assert bodega.contar(tipo, "2024-03-01", "2024-03-31") == 0
+
+
+def test_contar_y_reporte_por_rango(bodega):
+    tipo = "Órdenes de Compra"
+    desde, hasta = "2024-01-01", "2024-01-02"
+    filas = bodega.contar(tipo, desde, hasta)
+    assert 0 < filas < 3000
+    reporte = bodega.reporte(tipo, desde, hasta)
+    assert len(reporte["df"]) == filas
+    assert reporte["cubo"] and reporte["unicornios_df"] is not None
+
+
+def test_rango_sobre_el_maximo_se_rechaza(bodega):
+    with pytest.raises(RangoDemasiadoGrande) as error:
+        bodega.reporte("Órdenes de Compra", max_filas=1000)
+    assert (error.value.filas, error.value.maximo) == (3000, 1000)
+    assert len(bodega.reporte("Órdenes de Compra", max_filas=3000)["df"]) == 3000
+
+
+def test_tipo_sin_datos(bodega):
+    assert bodega.contar("Licitaciones") == 0
+    assert bodega.reporte("Licitaciones") is None
@@ -0,0 +1,71 @@
+import os
+import time
+
+from cortex_cache import CacheDisco, CacheMemoria
+from cortex_columnar import clave_columnar
+from cortex_extraccion import MODO_COMPLETO, MODO_SECCIONES, clave_extraccion
+
+
+# ==========================================
+# 💾 CACHÉ EN DISCO
+# ==========================================
+def test_guardar_obtener_e_invalidar(tmp_path):
+    cache = CacheDisco(str(tmp_path))
+    assert cache.obtener("a") is None
+    cache.guardar("a", {"codigo": "resultado = 1", "prompt": "¿cuánto?"})
+    assert cache.obtener("a") == {"codigo": "resultado = 1", "prompt": "¿cuánto?"}
+    cache.invalidar("a")
+    cache.invalidar("a")  # borrar dos veces no falla
+    assert cache.obtener("a") is None
+    assert cache.estadisticas() == {"entradas": 0, "bytes": 0, "aciertos": 1, "fallos": 2}
+
+
+def test_entradas_vencidas_no_se_entregan(tmp_path):
+    cache = CacheDisco(str(tmp_path), max_edad_s=60)
+    cache.guardar("a", 1)
+    viejo = time.time() - 120
+    os.utime(cache._ruta("a"), (viejo, viejo))
+    assert cache.obtener("a") is None
+    assert not os.path.exists(cache._ruta("a"))
+
+
+def test_expulsa_las_menos_usadas_al_pasar_el_limite(tmp_path):
+    cache = CacheDisco(str(tmp_path), max_bytes=250)
+    ahora = time.time()
+    for i, clave in enumerate("abc"):
+        cache.guardar(clave, "x" * 100)
+        os.utime(cache._ruta(clave), (ahora - 10 + i, ahora - 10 + i))
+    cache.guardar("d", "x" * 100)
+    assert [cache.obtener(c) is not None for c in "abcd"] == [False, False, True, True]
+
+
+# ==========================================
+# 🧠 CACHÉ EN MEMORIA
+# ==========================================
+def test_memoria_lru_por_bytes():
+    cache = CacheMemoria(max_bytes=10, medidor=len)
+    cache.guardar("a", "12345")
+    cache.guardar("b", "12345")
+    cache.obtener("a")  # "a" pasa a ser la más reciente
+    cache.guardar("c", "123")
+    assert cache.obtener("b") is None and cache.obtener("a") == "12345" and cache.obtener("c") == "123"
+    cache.guardar("enorme", "x" * 50)  # la recién guardada se conserva aunque exceda el límite
+    assert cache.obtener("enorme") and cache.estadisticas()["entradas"] == 1
+
+
+# ==========================================
+# 🔑 CLAVES
+# ==========================================
+def test_clave_extraccion_depende_del_contenido_modelo_y_modo():
+    pdf = b"%PDF-1.4 bases"
+    base = clave_extraccion(pdf)
+    assert base == clave_extraccion(pdf, modo=MODO_COMPLETO)
+    distintas = {base, clave_extraccion(pdf + b" "), clave_extraccion(pdf, modelo="otro"),
+                 clave_extraccion(pdf, modo=MODO_SECCIONES), clave_extraccion(pdf, fragmentado=True)}
+    assert len(distintas) == 5
+
+
+def test_clave_columnar():
+    assert clave_columnar("abc", "Órdenes de Compra") == "abc_ordenes_de_compra"
+    assert clave_columnar("abc", "Licitaciones", ["B", "A"]) == clave_columnar("abc", "Licitaciones", ["A", "B"])
+    assert clave_columnar("abc", "Licitaciones", ["A"]) != clave_columnar("abc", "Licitaciones")
@@ -0,0 +1,62 @@
+import pandas as pd
+
+from cortex_cubo import construir_cubo, responder_catalogo
+
+TENDENCIA = "Haz un análisis de la tendencia de precios en el tiempo."
+
+
+def _licitaciones():
+    df = pd.DataFrame({
+        "ID Licitación": ["L1", "L1", "L2", "L3"],
+        "Nombre Proveedor": ["A", "B", "A", "C"],
+        "Cantidad Adjudicada": [10.0, 1.0, 100.0, 5.0],
+        "Monto Unitario": [1000.0, 3000.0, 500.0, 800.0],
+        "Fecha_Datetime": pd.to_datetime(["2024-01-05", "2024-01-20", "2024-02-03", "2024-02-10"]),
+    })
+    df["Monto_Total_Estimado"] = df["Cantidad Adjudicada"] * df["Monto Unitario"]
+    columnas = {"MONT_COL": "Monto_Total_Estimado", "PROV_COL": "Nombre Proveedor", "ID_COL": "ID Licitación",
+                "FECHA_COL": "Fecha_Datetime"}
+    return df, columnas
+
+
+def test_tendencia_de_precios_es_monto_por_unidad():
+    df, columnas = _licitaciones()
+    tendencia = responder_catalogo(TENDENCIA, construir_cubo(df, columnas))
+    # Enero: (10×1000 + 1×3000) / 11 unidades; febrero: (100×500 + 5×800) / 105
+    assert tendencia["Precio_Unitario_Promedio"].round(2).tolist() == [round(13000 / 11, 2), round(54000 / 105, 2)]
+    assert tendencia["Cantidad_Total"].tolist() == [11, 105]
+
+
+def test_tendencia_sin_cantidades_es_de_gasto():
+    df, columnas = _licitaciones()
+    df = df.drop(columns="Cantidad Adjudicada")
+    tendencia = responder_catalogo(TENDENCIA, construir_cubo(df, columnas))
+    assert "Precio_Unitario_Promedio" not in tendencia
+    assert tendencia["Monto_Total"].tolist() == [13000, 54000]
+    assert tendencia["Gasto_Promedio_por_Registro"].tolist() == [6500, 27000]
+
+
+def test_market_share_y_prompts_fuera_del_catalogo():
+    df, columnas = _licitaciones()
+    cubo = construir_cubo(df, columnas)
+    share = responder_catalogo("genera un informe comercial de market share por proveedor", cubo)
+    assert share.index[0] == "A" and share["Market_Share_%"].sum().round() == 100
+    assert responder_catalogo("¿Quién ganó más en marzo?", cubo) is None
+
+
+def test_preguntas_de_precio_usan_el_precio_unitario():
+    df, columnas = _licitaciones()
+    cubo = construir_cubo(df, columnas)
+    extremos = responder_catalogo("Compara el precio máximo y mínimo ofertado por cada empresa.", cubo)
+    # "A" compró 10 a 1.000 y 100 a 500: su línea de mayor monto (50.000) no es su precio más alto
+    assert extremos.loc["A"].tolist() == [1000, 500]
+    assert extremos.index[0] == "B"
+    barato = responder_catalogo("¿Qué competidor tiene el precio promedio más bajo ofertado?", cubo)
+    assert barato.startswith("**A**") and "$545" in barato  # (10.000 + 50.000) / 110 unidades
+
+
+def test_preguntas_de_precio_sin_cantidades_van_al_modelo():
+    df, columnas = _licitaciones()
+    cubo = construir_cubo(df.drop(columns="Cantidad Adjudicada"), columnas)
+    assert responder_catalogo("Compara el precio máximo y mínimo ofertado por cada empresa.", cubo) is None
+    assert responder_catalogo("¿Qué competidor tiene el precio promedio más bajo ofertado?", cubo) is None
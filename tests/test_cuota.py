@@ -0,0 +1,81 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import cortex_cuota
+from cortex_cuota import PlanificadorCuota, es_limite_de_cuota
+
+
+class TooManyRequests(Exception):
+    """Mismo nombre que la de google.api_core, sin importarla."""
+
+
+class ErrorConCodigo(Exception):
+    code = 429
+
+
+@pytest.mark.parametrize("error, esperado", [
+    (TooManyRequests("lento"), True),
+    (ErrorConCodigo("x"), True),
+    (RuntimeError("429 Resource has been exhausted (e.g. check quota)."), True),
+    (RuntimeError("500 Internal error"), False),
+    (RuntimeError("No existe el archivo files/ab1429cd"), False),
+    (RuntimeError("403 Set a quota project on your credentials"), False),
+    (ValueError("JSON inválido"), False),
+])
+def test_es_limite_de_cuota(error, esperado):
+    assert es_limite_de_cuota(error) is esperado
+
+
+def test_reintenta_los_429_y_corrige_los_tokens():
+    planificador = PlanificadorCuota(espera_base_s=0)
+    intentos = []
+
+    def llamada():
+        intentos.append(1)
+        if len(intentos) < 3:
+            raise TooManyRequests("429")
+        return SimpleNamespace(usage_metadata=SimpleNamespace(total_token_count=1234))
+
+    planificador.llamar(llamada, tokens_estimados=10, usuario="a")
+    stats = planificador.estadisticas()
+    assert (stats["llamadas"], stats["reintentos_429"]) == (3, 2)
+    assert stats["tpm_usado"] == 10 + 10 + 1234
+
+
+def test_otros_errores_no_se_reintentan():
+    planificador = PlanificadorCuota(espera_base_s=0)
+    with pytest.raises(ValueError):
+        planificador.llamar(lambda: (_ for _ in ()).throw(ValueError("x")))
+    assert planificador.estadisticas()["llamadas"] == 1
+
+
+def test_presupuesto_por_minuto():
+    planificador = PlanificadorCuota(rpm=2, tpm=100)
+    ahora = time.monotonic()
+    assert planificador._espera_presupuesto(500, ahora) == 0.0  # ventana vacía: una llamada grande igual pasa
+    planificador.llamar(lambda: None, tokens_estimados=60)
+    assert planificador._espera_presupuesto(60, time.monotonic()) > 0  # excede TPM
+    planificador.llamar(lambda: None, tokens_estimados=30)
+    assert planificador._espera_presupuesto(1, time.monotonic()) > 0  # excede RPM
+
+
+def test_turnos_rotan_entre_usuarios(monkeypatch):
+    monkeypatch.setattr(cortex_cuota, "VENTANA_S", 0.3)
+    planificador = PlanificadorCuota(rpm=1)
+    planificador.llamar(lambda: None, usuario="lote")  # llena la ventana: los siguientes esperan en cola
+    orden = []
+
+    def pedir(usuario, etiqueta):
+        planificador.llamar(lambda: orden.append(etiqueta), usuario=usuario)
+
+    hilos = []
+    for usuario, etiqueta in (("lote", "lote-1"), ("lote", "lote-2"), ("lote", "lote-3"), ("chat", "chat-1")):
+        hilos.append(threading.Thread(target=pedir, args=(usuario, etiqueta)))
+        hilos[-1].start()
+        time.sleep(0.02)
+    for hilo in hilos:
+        hilo.join(timeout=10)
+    assert orden == ["lote-1", "chat-1", "lote-2", "lote-3"]
@@ -0,0 +1,58 @@
+import io
+
+import numpy as np
+import openpyxl
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+import cortex_export
+from cortex_export import exportar, exportar_bytes
+
+
+def _marco():
+    return pd.DataFrame({
+        "Proveedor": pd.Categorical(["Acme", None, "Beta", "Acme"]),
+        "Mixta": ["x", None, np.nan, 3],
+        "Monto": [1.5, np.nan, 3.0, 4.0],
+        "Fecha": pd.to_datetime(["2024-01-15", None, "2024-03-01", "2024-04-30"]),
+    })
+
+
+def test_parquet_conserva_los_nulos(monkeypatch):
+    monkeypatch.setattr(cortex_export, "FILAS_POR_TANDA", 2)  # varias tandas con un solo esquema
+    tabla = pq.read_table(exportar(_marco(), "parquet")).to_pydict()
+    assert tabla["Proveedor"] == ["Acme", None, "Beta", "Acme"]
+    assert tabla["Mixta"] == ["x", None, None, "3"]
+    assert tabla["Monto"][1] is None
+
+
+def test_csv_con_bom_y_nulos_vacios():
+    contenido = exportar_bytes(_marco(), "csv")
+    assert contenido.startswith(b"\xef\xbb\xbf")
+    leido = pd.read_csv(io.BytesIO(contenido), encoding="utf-8-sig")
+    assert leido["Proveedor"].isna().tolist() == [False, True, False, False]
+    assert leido["Mixta"].tolist()[0] == "x"
+
+
+def test_xlsx_por_hojas():
+    contenido = exportar_bytes({"Uno": _marco(), "Dos": _marco().head(1)}, "xlsx")
+    libro = openpyxl.load_workbook(io.BytesIO(contenido))
+    assert libro.sheetnames == ["Uno", "Dos"]
+    filas = list(libro["Uno"].values)
+    assert filas[0] == ("Proveedor", "Mixta", "Monto", "Fecha")
+    assert filas[2] == (None, None, None, None)
+    assert filas[3][0] == "Beta" and filas[3][3].date() == pd.Timestamp("2024-03-01").date()
+
+
+def test_xlsx_con_infinitos():
+    contenido = exportar_bytes(pd.DataFrame({"a": [1.0, np.inf, -np.inf, np.nan]}), "xlsx")
+    hoja = openpyxl.load_workbook(io.BytesIO(contenido), data_only=True)["Datos"]
+    assert [fila[0] for fila in hoja.values] == ["a", 1, "#DIV/0!", "#DIV/0!"]  # el NaN queda en blanco
+
+
+def test_formatos_invalidos():
+    with pytest.raises(ValueError):
+        exportar(_marco(), "json")
+    with pytest.raises(ValueError):
+        exportar({"a": _marco(), "b": _marco()}, "csv")
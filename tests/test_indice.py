@@ -0,0 +1,80 @@
+import multiprocessing as mp
+import sqlite3
+
+import pytest
+
+import cortex_indice
+from benchmarks.sintetico import generar_bases_pdf
+from cortex_indice import IndiceLicitaciones, consulta_fts, id_licitacion
+
+
+def _datos(id_, **campos):
+    return {"c01": id_, "c22": "Sin inadmisibilidad", **campos}
+
+
+def test_busca_sin_tildes_y_por_prefijo(tmp_path):
+    indice = IndiceLicitaciones(str(tmp_path / "indice.sqlite3"))
+    indice.indexar(_datos("1234-5-LE24", c19="Garantía de fiel cumplimiento 5%"), ["Bases de canje de equipos"], "h1", "a.pdf")
+    indice.indexar(_datos("9999-1-LP24"), ["Suministro de papel"], "h2", "b.pdf")
+    (resultado,) = indice.buscar("garantia fiel")
+    assert resultado["id"] == "1234-5-LE24" and resultado["nombre"] == "a.pdf"
+    assert resultado["aciertos"][0][0] == "c19" and "**" in resultado["aciertos"][0][1]
+    assert [r["id"] for r in indice.buscar("canj", origenes=["paginas"])] == ["1234-5-LE24"]
+    assert indice.buscar("canje", origenes=["c22"]) == []
+    assert indice.buscar('"papel" AND (') != []  # sintaxis inválida: se busca por palabras
+
+
+def test_reindexar_reemplaza_y_conserva_rangos(tmp_path):
+    indice = IndiceLicitaciones(str(tmp_path / "indice.sqlite3"))
+    indice.indexar(_datos("A"), ["vieja"], "h1")
+    indice.indexar(_datos("B"), ["otra"], "h2")
+    indice.indexar(_datos("A", c02="nuevo"), ["nueva"], "h1")
+    assert indice.buscar("vieja") == [] and indice.buscar("nueva")[0]["id"] == "A"
+    assert indice.obtener("A")["c02"] == "nuevo"
+    assert indice.estadisticas() == {"licitaciones": 2, "con_campos": 2, "paginas": 2}
+
+
+def test_id_y_consulta():
+    assert id_licitacion({"c01": "No indica"}, "abcdef0123456789") == "sin-id-abcdef012345"
+    assert id_licitacion({"c01": " 1234-5-LE24 "}, "x") == "1234-5-LE24"
+    assert consulta_fts("boleta garantía") == '"boleta"* "garantía"*'
+    assert consulta_fts('"fiel cumplimiento" NEAR boleta') == '"fiel cumplimiento" NEAR boleta'
+
+
+def test_indexar_pdf_usa_las_paginas_recibidas(tmp_path, monkeypatch):
+    indice = IndiceLicitaciones(str(tmp_path / "indice.sqlite3"))
+    monkeypatch.setattr(cortex_indice, "leer_paginas", lambda pdf: pytest.fail("no debía extraer el texto de nuevo"))
+    indice.indexar_pdf(b"%PDF bases", _datos("A"), paginas=["texto ya extraido"])
+    assert indice.buscar("extraido")[0]["id"] == "A"
+
+
+def test_indexar_pdf_extrae_si_no_hay_paginas(tmp_path):
+    indice = IndiceLicitaciones(str(tmp_path / "indice.sqlite3"))
+    pdf = generar_bases_pdf(paginas=12)
+    id_ = indice.indexar_pdf(pdf, {})
+    assert id_.startswith("sin-id-") and indice.estadisticas()["paginas"] == 12
+    assert indice.indexar_pdf(pdf, {}) is None  # ya estaba
+    with pytest.raises(ValueError):
+        indice.indexar_pdf(b"no es un pdf", {})
+
+
+def _indexar_lote(ruta, proceso):
+    indice = IndiceLicitaciones(ruta)
+    for i in range(15):
+        indice.indexar(_datos(f"{proceso}-{i}"), [f"pagina {proceso} {i}", "anexo"], f"h{proceso}-{i}")
+
+
+def test_procesos_concurrentes_no_pisan_rowids(tmp_path):
+    ruta = str(tmp_path / "indice.sqlite3")
+    IndiceLicitaciones(ruta)
+    procesos = [mp.get_context("spawn").Process(target=_indexar_lote, args=(ruta, p)) for p in range(4)]
+    for proceso in procesos:
+        proceso.start()
+    for proceso in procesos:
+        proceso.join(timeout=120)
+        assert proceso.exitcode == 0
+    con = sqlite3.connect(ruta)
+    rangos = sorted(con.execute("SELECT rowid_desde, rowid_hasta FROM licitaciones").fetchall())
+    assert len(rangos) == 60 and all(hasta >= desde for desde, hasta in rangos)
+    assert all(a[1] < b[0] for a, b in zip(rangos, rangos[1:]))  # rangos disjuntos
+    assert con.execute("SELECT COUNT(*) FROM fragmentos").fetchone()[0] == 60 * 4
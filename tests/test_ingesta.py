@@ -0,0 +1,55 @@
+import io
+
+import pandas as pd
+
+from benchmarks.sintetico import generar_oc, generar_oc_sucia
+from cortex_datos import cargar_y_sanear
+from cortex_ingesta import TotalesPorClave, ingerir_csv_por_tandas
+
+
+def _csv(df):
+    contenido = io.BytesIO()
+    df.to_csv(contenido, index=False)
+    return contenido.getvalue()
+
+
+def test_tandas_dan_lo_mismo_que_la_carga_completa():
+    contenido = _csv(generar_oc_sucia(6_000))
+    completo = cargar_y_sanear(contenido, "oc.csv")
+    tandas = ingerir_csv_por_tandas(io.BytesIO(contenido), "oc.csv", filas_por_tanda=700)
+    assert tandas["tandas"] == 9 and tandas["filas"] == 6_000 and tandas["bytes_invalidos"] == 0
+    assert len(tandas["unicornios_df"]) == len(completo["unicornios_df"])
+    assert len(tandas["baja_comp_df"]) == len(completo["baja_comp_df"])
+    MONT_COL, PROV_COL = completo["MONT_COL"], completo["PROV_COL"]
+    esperado = completo["df"].groupby(PROV_COL, observed=True)[MONT_COL].sum().to_dict()
+    obtenido = tandas["totales_proveedor"].set_index(PROV_COL)["Monto"].to_dict()
+    assert obtenido.keys() == esperado.keys()
+    assert all(abs(obtenido[p] - esperado[p]) < 1e-6 for p in esperado)
+
+
+def test_formato_numerico_se_fija_en_la_primera_tanda():
+    # Primera tanda inequívocamente chilena; la segunda sola parecería estadounidense
+    df = generar_oc(4)
+    df["TotalLinea"] = ["1.234,5", "7.000,25", "1,234.5", "1.500"]
+    tandas = ingerir_csv_por_tandas(io.BytesIO(_csv(df)), "oc.csv", filas_por_tanda=2)
+    assert tandas["totales_proveedor"]["Monto"].sum() == 1234.5 + 7000.25 + 1234.5 + 1500
+
+
+def test_bytes_invalidos_fuera_de_las_muestras_se_cuentan():
+    df = generar_oc(30_000)
+    contenido = _csv(df)
+    # Un "é" en latin1 a ~600 KB: fuera de las muestras del inicio, el medio y el final
+    posicion = contenido.index(b"\nOC-", 600_000) + 1
+    contenido = contenido[:posicion] + b"\xe9" + contenido[posicion:]
+    tandas = ingerir_csv_por_tandas(io.BytesIO(contenido), "oc.csv", filas_por_tanda=5_000)
+    assert tandas["bytes_invalidos"] == 1
+    assert tandas["filas"] == 30_000
+
+
+def test_totales_por_clave_se_fusionan():
+    a = pd.DataFrame({"Proveedor": ["x", "y", None], "Monto": [1.0, 2.0, 9.0]})
+    b = pd.DataFrame({"Proveedor": ["y", "z"], "Monto": [3.0, 4.0]})
+    juntos = TotalesPorClave("Proveedor", "Monto").agregar(a).fusionar(TotalesPorClave("Proveedor", "Monto").agregar(b))
+    tabla = juntos.tabla()
+    assert tabla.to_dict("list") == {"Proveedor": ["y", "z", "x"], "Monto": [5.0, 4.0, 1.0], "Registros": [2, 1, 1]}
+    assert len(juntos.tabla(limite=1)) == 1
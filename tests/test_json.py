@@ -0,0 +1,59 @@
+import json
+
+import pytest
+
+from cortex_json import LectorJsonIncremental, leer_json_completo
+
+
+def _por_pedazos(texto, tamano):
+    lector = LectorJsonIncremental()
+    entregados = []
+    for i in range(0, len(texto), tamano):
+        entregados += lector.alimentar(texto[i:i + tamano])
+    entregados += lector.cerrar()
+    return lector.campos, entregados
+
+
+CASOS = {
+    "cerco": ('```json\n{"c01": "a", "c02": "b"}\n```', {"c01": "a", "c02": "b"}),
+    "comillas simples": ("{'c01': 'l\\'oferta', 'c02': 'dice \"sí\"'}", {"c01": "l'oferta", "c02": 'dice "sí"'}),
+    "claves sin comillas": ('{c01: "a", c02: 3,}', {"c01": "a", "c02": 3}),
+    "anidado": ('{"c01": {"plazo": [1, 2], "nota": "x}"}, "c02": "b"}', {"c01": {"plazo": [1, 2], "nota": "x}"}, "c02": "b"}),
+    "texto antes": ('Nota {importante}: {"c01": "x"}', {"c01": "x"}),
+    "llave sin clave antes": ('Ver {} y { 1 }. {"c01": "x"}', {"c01": "x"}),
+    "salto sin escapar": ('{"c01": "línea 1\nlínea 2"}', {"c01": "línea 1\nlínea 2"}),
+    "cortada": ('{"c01": "a", "c02": "texto cort', {"c01": "a", "c02": "texto cort"}),
+}
+
+
+@pytest.mark.parametrize("nombre", CASOS)
+def test_respuesta_completa(nombre):
+    texto, esperado = CASOS[nombre]
+    assert leer_json_completo(texto) == esperado
+
+
+@pytest.mark.parametrize("nombre", CASOS)
+@pytest.mark.parametrize("tamano", [1, 3, 7])
+def test_por_pedazos_da_lo_mismo(nombre, tamano):
+    texto, esperado = CASOS[nombre]
+    campos, entregados = _por_pedazos(texto, tamano)
+    assert campos == esperado
+    assert dict(entregados) == esperado and len(entregados) == len(esperado)
+
+
+def test_campo_se_entrega_apenas_cierra():
+    lector = LectorJsonIncremental()
+    assert lector.alimentar('{"c01": "a", "c02": "b') == [("c01", "a")]
+    assert lector.alimentar('c", "c03": 12') == [("c02", "bc")]
+    # El número podría seguir: se entrega con la coma o al cerrar
+    assert lector.alimentar("}") == [("c03", 12)]
+
+
+def test_sin_objeto():
+    assert leer_json_completo("no hay datos") == {}
+    assert _por_pedazos("Nota {importante} sin objeto", 4)[0] == {}
+
+
+def test_json_valido_pasa_por_el_camino_rapido():
+    campos = {f"c{i:02d}": f"valor {i}" for i in range(24)}
+    assert leer_json_completo(json.dumps(campos)) == campos
@@ -0,0 +1,26 @@
+import pytest
+
+import cortex_paginas
+from benchmarks.sintetico import generar_bases_pdf
+from cortex_paginas import preparar_payload
+
+
+def test_recorta_las_bases_a_las_paginas_relevantes():
+    payload = preparar_payload(generar_bases_pdf(paginas=60))
+    assert payload["paginas_totales"] == 60
+    assert 3 < len(payload["paginas_enviadas"]) <= 0.6 * 60
+    assert payload["paginas_enviadas"][:3] == [1, 2, 3]
+    assert payload["texto"].startswith("[Página 1]")
+
+
+@pytest.mark.parametrize("error", [KeyError("/Root"), ValueError("xref"), RecursionError()])
+def test_pdf_ilegible_va_completo(monkeypatch, error):
+    def falla(pdf_bytes):
+        raise error
+
+    monkeypatch.setattr(cortex_paginas, "extraer_paginas", falla)
+    assert preparar_payload(b"%PDF-1.4") is None
+
+
+def test_bytes_que_no_son_pdf_van_completos():
+    assert preparar_payload(b"esto no es un pdf") is None
@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from cortex_datos import calcular_radar
+from cortex_radar import COLUMNA_CONTEO, RadarCompetencia
+
+ID, PROV = "ID Licitación", "Nombre Proveedor"
+
+
+def _ofertas(filas=3_000, semilla=0):
+    rng = np.random.default_rng(semilla)
+    df = pd.DataFrame({
+        # Filas de un mismo negocio repartidas por todo el archivo: cruzan los bordes de las tandas
+        ID: rng.integers(0, 400, filas).astype(str),
+        PROV: rng.choice([f"Proveedor {i}" for i in range(6)], filas),
+        "Monto": rng.integers(1, 1_000, filas).astype(float),
+    })
+    df.loc[rng.random(filas) < 0.05, ID] = None
+    df.loc[rng.random(filas) < 0.05, PROV] = None
+    return df
+
+
+def _radar_original(df):
+    """El radar de tres pasadas que reemplazó RadarCompetencia (groupby-nunique, drop_duplicates, merge)."""
+    competencia = df.groupby(ID)[PROV].nunique().reset_index()
+    competencia.columns = [ID, COLUMNA_CONTEO]
+    return df.drop_duplicates(subset=[ID]).merge(competencia, on=ID)
+
+
+def _normalizar(negocios):
+    return negocios.astype({ID: str, PROV: object}).sort_values(ID).reset_index(drop=True)[[ID, PROV, "Monto", COLUMNA_CONTEO]]
+
+
+def _tandas(df, filas):
+    return [df.iloc[i:i + filas] for i in range(0, len(df), filas)]
+
+
+@pytest.mark.parametrize("categorico", [False, True])
+def test_una_tanda_igual_al_radar_original(categorico):
+    df = _ofertas()
+    if categorico:
+        df = df.astype({ID: "category", PROV: "category"})
+    radar = RadarCompetencia(PROV, ID).agregar(df)
+    pd.testing.assert_frame_equal(_normalizar(radar.negocios()), _normalizar(_radar_original(df)))
+    unicornios, baja = calcular_radar(df, ID, PROV)
+    original = _radar_original(df)
+    assert sorted(unicornios[ID].astype(str)) == sorted(original.loc[original[COLUMNA_CONTEO] == 1, ID].astype(str))
+    assert sorted(baja[ID].astype(str)) == sorted(original.loc[original[COLUMNA_CONTEO] == 2, ID].astype(str))
+
+
+@pytest.mark.parametrize("filas_por_tanda", [7, 97, 1_000])
+def test_por_tandas_igual_a_todo_junto(filas_por_tanda):
+    df = _ofertas()
+    completo = RadarCompetencia(PROV, ID).agregar(df)
+    por_tandas = RadarCompetencia(PROV, ID)
+    for tanda in _tandas(df, filas_por_tanda):
+        por_tandas.agregar(tanda)
+    pd.testing.assert_frame_equal(_normalizar(por_tandas.negocios()), _normalizar(completo.negocios()))
+    assert por_tandas.filas == completo.filas == df[ID].notna().sum()
+
+
+def test_fusionar_trozos_igual_a_todo_junto():
+    df = _ofertas(semilla=1)
+    trozos = []
+    for parte in np.array_split(np.arange(len(df)), 3):
+        radar = RadarCompetencia(PROV, ID)
+        for tanda in _tandas(df.iloc[parte], 250):
+            radar.agregar(tanda)
+        trozos.append(radar)
+    fusionado = trozos[0].fusionar(trozos[1]).fusionar(trozos[2])
+    pd.testing.assert_frame_equal(_normalizar(fusionado.negocios()), _normalizar(_radar_original(df)))
+    assert fusionado.distribucion().to_dict() == _radar_original(df)[COLUMNA_CONTEO].value_counts().sort_index().to_dict()
+
+
+def test_solo_nulos():
+    df = pd.DataFrame({ID: [None, None], PROV: ["A", "B"], "Monto": [1.0, 2.0]})
+    radar = RadarCompetencia(PROV, ID).agregar(df)
+    assert radar.negocios().empty and radar.filas == 0
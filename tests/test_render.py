@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+
+from cortex_render import filtrar_y_ordenar, formatear_moneda, lttb, pagina, reducir_para_grafico
+
+
+# ==========================================
+# 📉 GRÁFICOS REDUCIDOS
+# ==========================================
+def test_lttb_conserva_extremos_y_picos():
+    x = np.arange(10_000, dtype=float)
+    y = np.sin(x / 500)
+    y[4321] = 50.0  # un pico aislado no puede perderse al reducir
+    indices = lttb(x, y, 300)
+    assert len(indices) == 300
+    assert indices[0] == 0 and indices[-1] == len(x) - 1
+    assert (np.diff(indices) > 0).all()
+    assert 4321 in indices
+
+
+def test_lttb_sin_reducir():
+    assert lttb(np.arange(5.0), np.arange(5.0), 10).tolist() == [0, 1, 2, 3, 4]
+    assert lttb(np.arange(5.0), np.arange(5.0), 2).tolist() == [0, 1, 2, 3, 4]
+
+
+def test_reducir_serie_temporal_desordenada():
+    fechas = pd.date_range("2024-01-01", periods=20_000, freq="min")
+    serie = pd.Series(np.random.default_rng(0).normal(size=len(fechas)), index=fechas).sample(frac=1, random_state=0)
+    reducida = reducir_para_grafico(serie, max_puntos=1_000)
+    assert len(reducida) == 1_000
+    assert reducida.index.is_monotonic_increasing
+    assert (reducida.index[0], reducida.index[-1]) == (fechas[0], fechas[-1])
+
+
+def test_reducir_varias_columnas_conserva_min_y_max():
+    df = pd.DataFrame({"Fecha": pd.date_range("2024-01-01", periods=5_000, freq="h"),
+                       "A": np.arange(5_000.0), "B": np.cos(np.arange(5_000) / 100), "Nombre": "x"})
+    reducida = reducir_para_grafico(df, "Fecha", max_puntos=400)
+    assert len(reducida) <= 400 + 2 and list(reducida.columns) == ["A", "B"]
+    assert reducida["B"].max() == df["B"].max() and reducida["B"].min() == df["B"].min()
+
+
+def test_reducir_serie_que_empieza_despues():
+    x = np.arange(10_000.0)
+    df = pd.DataFrame({"A": np.sin(x / 300), "B": np.where(x < 5_000, np.nan, np.cos(x / 300))}, index=x)
+    reducida = reducir_para_grafico(df, max_puntos=500)
+    assert len(reducida) <= 500 + 2 and (reducida.index[0], reducida.index[-1]) == (0, 9_999)
+    assert reducida["B"].max() == df["B"].max() and reducida["B"].min() == df["B"].min()
+    assert reducida["B"].first_valid_index() >= 5_000
+
+
+def test_eje_de_texto_no_se_reduce():
+    ranking = pd.Series(range(3_000), index=[f"Proveedor {i}" for i in range(3_000)])
+    assert len(reducir_para_grafico(ranking, max_puntos=100)) == 3_000
+
+
+# ==========================================
+# 📋 TABLAS PAGINADAS
+# ==========================================
+def test_filtrar_ordenar_y_paginar():
+    df = pd.DataFrame({"Proveedor": pd.Categorical(["Acme", "Beta", "acme sur", "Gamma"]), "Monto": [5, 1, 3, 2]})
+    filtrado = filtrar_y_ordenar(df, "ACME", "Monto")
+    assert filtrado["Proveedor"].tolist() == ["acme sur", "Acme"]
+    filas, paginas = pagina(df, 9, filas_por_pagina=3)
+    assert paginas == 2 and len(filas) == 1  # una página fuera de rango se acota a la última
+
+
+def test_formato_de_moneda_solo_en_la_pagina():
+    df = pd.DataFrame({"Monto": [1234567.4, np.nan], "Otro": [1, 2]})
+    formateado = formatear_moneda(df, ["Monto", "No existe"])
+    assert formateado["Monto"].tolist() == ["$1,234,567", ""]
+    assert df["Monto"].iloc[0] == 1234567.4
@@ -0,0 +1,35 @@
+import builtins
+
+import pytest
+
+import cortex_sandbox
+
+resource = pytest.importorskip("resource")
+
+
+def test_sin_proc_no_se_limita_la_memoria(monkeypatch):
+    abrir = builtins.open
+
+    def sin_proc(ruta, *args, **kwargs):
+        if str(ruta).startswith("/proc/"):
+            raise FileNotFoundError(ruta)
+        return abrir(ruta, *args, **kwargs)
+
+    monkeypatch.setattr(builtins, "open", sin_proc)
+    assert cortex_sandbox._memoria_virtual() is None
+    previo = resource.getrlimit(resource.RLIMIT_AS)
+    with cortex_sandbox._limites(cpu_s=60, memoria_mb=64):
+        assert resource.getrlimit(resource.RLIMIT_AS) == previo
+        bloque = bytearray(128 * 1024 * 1024)  # sobre el límite pedido: sin medición no se aplica
+    assert len(bloque) and resource.getrlimit(resource.RLIMIT_AS) == previo
+
+
+def test_con_proc_el_limite_es_relativo_y_se_restaura():
+    if cortex_sandbox._memoria_virtual() is None:
+        pytest.skip("sin /proc")
+    previo = resource.getrlimit(resource.RLIMIT_AS)
+    with cortex_sandbox._limites(cpu_s=60, memoria_mb=64):
+        assert resource.getrlimit(resource.RLIMIT_AS)[0] > cortex_sandbox._memoria_virtual()
+        with pytest.raises(MemoryError):
+            bytearray(512 * 1024 * 1024)
+    assert resource.getrlimit(resource.RLIMIT_AS) == previo
@@ -0,0 +1,113 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from cortex_datos import MemoriaColumna, detectar_formato_numerico, limpiar_fechas, limpiar_numeros
+
+
+def _montos(*valores, memoria=None):
+    return limpiar_numeros(pd.Series(valores, dtype=object), memoria).tolist()
+
+
+def _fechas(*valores, memoria=None):
+    return limpiar_fechas(pd.Series(valores, dtype=object), memoria).tolist()
+
+
+# ==========================================
+# 💰 MONTOS
+# ==========================================
+def test_formato_chileno():
+    assert _montos("1.234.567,89", "2.500", "1.500.000", "0,5") == [1234567.89, 2500, 1500000, 0.5]
+
+
+def test_formato_estadounidense():
+    assert _montos("1,234,567.89", "2,500.00", "1,500,000", "0.5") == [1234567.89, 2500, 1500000, 0.5]
+
+
+def test_detecta_formato_de_la_columna():
+    assert detectar_formato_numerico(pd.Series(["1.234,5", "2.000", "3,25"])) == "cl"
+    assert detectar_formato_numerico(pd.Series(["1,234.5", "2,000", "3.25"])) == "us"
+    # Sin señales, manda el formato de Mercado Público
+    assert detectar_formato_numerico(pd.Series(["1.500", "2.000"])) == "cl"
+
+
+def test_columna_con_formatos_mezclados():
+    # Cada valor inequívoco decide su separador; "1.500" sigue a la mayoría (chilena)
+    assert _montos("1.234.567,89", "1,234,567.89", "2,5", "1.500", "7.000,25") == [
+        1234567.89, 1234567.89, 2.5, 1500, 7000.25]
+    # Con mayoría estadounidense, el mismo "1.500" es uno y medio
+    assert _montos("1,234.5", "2,000.75", "3.25", "1.500") == [1234.5, 2000.75, 3.25, 1.5]
+
+
+def test_vacios_y_basura_quedan_en_cero():
+    assert _montos("", "   ", None, np.nan, "N/A", "1.000") == [0, 0, 0, 0, 0, 1000]
+
+
+def test_simbolos_de_moneda():
+    assert _montos("$ 1.234.567", "CLP 2.000", "US$ 1,500.50", "-$ 3.000", "12.000 pesos") == [
+        1234567, 2000, 1500.5, -3000, 12000]
+
+
+def test_columna_numerica_se_conserva():
+    serie = pd.Series([1.5, np.nan, 3])
+    assert limpiar_numeros(serie).tolist() == [1.5, 0, 3]
+
+
+def test_valores_no_texto_en_columna_de_objetos():
+    assert _montos(1500, 2.5, "3.000") == [1500, 2.5, 3000]
+
+
+def test_memoria_entre_tandas_da_el_mismo_resultado():
+    memoria = MemoriaColumna()
+    primera = _montos("1.234,5", "2.000", memoria=memoria)
+    segunda = _montos("2.000", "9,75", memoria=memoria)
+    assert primera == [1234.5, 2000]
+    assert segunda == [2000, 9.75]
+    assert memoria["2.000"] == 2000
+
+
+def test_formato_de_la_primera_tanda_vale_para_las_siguientes():
+    memoria = MemoriaColumna()
+    _montos("1.234,5", "7.000,25", memoria=memoria)
+    assert memoria.formato == "cl"
+    # Sola, esta tanda parece estadounidense y "1.500" sería 1,5; con la memoria sigue siendo chileno
+    assert _montos("1,234.5", "2,000.75", "1.500") == [1234.5, 2000.75, 1.5]
+    assert _montos("1,234.5", "2,000.75", "1.500", memoria=memoria) == [1234.5, 2000.75, 1500]
+
+
+# ==========================================
+# 📅 FECHAS
+# ==========================================
+@pytest.mark.parametrize("texto", [
+    "15-01-2024", "15/01/2024", "15-01-2024 10:30:00", "2024-01-15", "2024-01-15T10:30:00", "2024/01/15",
+])
+def test_formatos_de_fecha(texto):
+    (fecha,) = _fechas(texto)
+    assert fecha.date() == pd.Timestamp("2024-01-15").date()
+
+
+def test_dia_primero_cuando_es_ambiguo():
+    assert _fechas("03-04-2024", "12-11-2024") == [pd.Timestamp("2024-04-03"), pd.Timestamp("2024-11-12")]
+
+
+def test_formatos_de_fecha_mezclados():
+    assert _fechas("15-01-2024", "15-01-2024", "2024-02-20", "20/03/2024 08:00") == [
+        pd.Timestamp("2024-01-15"), pd.Timestamp("2024-01-15"), pd.Timestamp("2024-02-20"),
+        pd.Timestamp("2024-03-20 08:00")]
+
+
+def test_seriales_de_excel():
+    # 45306 es el 15-01-2024 en el calendario de Excel (origen 1899-12-30); la fracción es la hora
+    assert _fechas(45306, 45306.5, "45307") == [
+        pd.Timestamp("2024-01-15"), pd.Timestamp("2024-01-15 12:00"), pd.Timestamp("2024-01-16")]
+    serie = limpiar_fechas(pd.Series([45306, 45337]))
+    assert serie.tolist() == [pd.Timestamp("2024-01-15"), pd.Timestamp("2024-02-15")]
+
+
+def test_vacios_y_basura_quedan_nat():
+    assert all(pd.isna(f) for f in _fechas("", None, np.nan, "sin fecha"))
+
+
+def test_columna_de_fechas_se_conserva():
+    serie = pd.Series(pd.to_datetime(["2024-01-15", None]))
+    assert limpiar_fechas(serie) is serie